@@ -1,6 +1,12 @@
+import pandas as pd
 import streamlit as st
-from pandasai import Agent
-import os,pathlib
+from concurrent.futures import Future
+from typing import Any, Dict, Optional, Union
+from src.hanlders.outofcore_handlers import OutOfCoreConnector
+from src.hanlders.preview_handlers import page_count, preview_page
+from src.hanlders.profile_handlers import get_profile, profile_table
+from src.hanlders.streaming_handlers import DeferredTokenStream
+from utils.contsant import PREVIEW_PAGE_ROWS, PREVIEW_SAMPLE_ROWS
 
 
 def display_welcome_message(username: str) -> None:
@@ -33,14 +39,130 @@ def display_dataframes(dfs: list) -> None:
     """
     Display dataframes in Streamlit.
 
+    Each DataFrame is previewed page by page, see display_preview. Database tables that
+    are loaded on demand and out-of-core datasets are listed with their metadata instead,
+    see display_database_tables and display_out_of_core_datasets.
+
     Args:
         dfs (list): A list of dataframes to display.
     """
+    if dfs and isinstance(dfs[0], OutOfCoreConnector):
+        display_out_of_core_datasets(dfs)
+        return
+    if dfs and not isinstance(dfs[0], pd.DataFrame):
+        display_database_tables(dfs)
+        return
     for i, df in enumerate(dfs):
         st.info(f"Dataframe {i+1} with {df.shape[0]} rows and {df.shape[1]} columns")
-        st.dataframe(df, use_container_width=True)
+        if 'memory_before' in df.attrs and 'memory_after' in df.attrs:
+            before, after = df.attrs['memory_before'], df.attrs['memory_after']
+            saved = 100 * (1 - after / before) if before else 0
+            st.caption(f"Memory: {format_bytes(before)} → {format_bytes(after)} ({saved:.0f}% saved)")
+        display_preview(df, key=f"preview_{i}")
+
+
+def display_preview(df: pd.DataFrame, key: str) -> None:
+    """
+    Show a DataFrame one page at a time, with optional summary statistics.
+
+    Only the selected page is sent to the browser, and pages come from PREVIEW_CACHE,
+    so reruns do not convert the frame again. Frames that fit in one page are shown
+    without the page selector.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to preview.
+        key (str): Prefix of the widget keys, unique per previewed frame.
+    """
+    pages = page_count(df)
+    page = 0
+    if pages > 1:
+        cols = st.columns([1, 3], gap="small", vertical_alignment="bottom")
+        with cols[0]:
+            page = st.number_input("Page", min_value=1, max_value=pages, value=1, key=f"{key}_page") - 1
+        with cols[1]:
+            start = page * PREVIEW_PAGE_ROWS
+            st.caption(f"Rows {start + 1:,}–{min(start + PREVIEW_PAGE_ROWS, len(df)):,} of {len(df):,}")
+    st.dataframe(preview_page(df, page), use_container_width=True)
+    if st.toggle("Summary statistics", key=f"{key}_stats"):
+        st.dataframe(profile_table(get_profile(df)), use_container_width=True, hide_index=True)
+
+
+def display_database_tables(tables: list) -> None:
+    """
+    List the tables of a database session without loading them.
+
+    Shows each table's row estimate, column count and whether it has been loaded, and
+    the columns and sample rows of the table picked in a select box.
+
+    Args:
+        tables (list): The session's lazily loaded table connectors.
+    """
+    st.info(f"{len(tables)} tables, loaded when a question needs them")
+    st.dataframe(
+        pd.DataFrame({
+            "table": [t.info.qualified_name for t in tables],
+            "rows": [t.info.rows for t in tables],
+            "columns": [len(t.info.columns) for t in tables],
+            "loaded": [t.loaded for t in tables],
+        }),
+        use_container_width=True,
+        hide_index=True,
+    )
+    names = [t.info.qualified_name for t in tables]
+    name = st.selectbox("Table details", names, index=None, placeholder="Pick a table to see its columns")
+    if name is not None:
+        selected = tables[names.index(name)]
+        st.dataframe(pd.DataFrame(selected.info.columns, columns=["column", "type"]),
+                     use_container_width=True, hide_index=True)
+        st.dataframe(selected.head(), use_container_width=True)
+
+
+def display_out_of_core_datasets(connectors: list) -> None:
+    """
+    List out-of-core datasets without loading them.
+
+    Shows each dataset's row count, column count and size on disk, and the column
+    statistics and first rows of the dataset picked in a select box.
+
+    Args:
+        connectors (list): The session's out-of-core dataset connectors.
+    """
+    st.info(f"{len(connectors)} datasets kept on disk; questions load only the columns and rows they use")
+    st.dataframe(
+        pd.DataFrame({
+            "dataset": [c.dataset.name for c in connectors],
+            "rows": [c.dataset.rows for c in connectors],
+            "columns": [len(c.dataset.schema) for c in connectors],
+            "on disk": [format_bytes(c.dataset.disk_bytes) for c in connectors],
+        }),
+        use_container_width=True,
+        hide_index=True,
+    )
+    names = [c.dataset.name for c in connectors]
+    name = st.selectbox("Dataset details", names, index=None, placeholder="Pick a dataset to see its columns")
+    if name is not None:
+        selected = connectors[names.index(name)].dataset
+        st.dataframe(profile_table(selected.profile()), use_container_width=True, hide_index=True)
+        st.dataframe(selected.head(PREVIEW_SAMPLE_ROWS), use_container_width=True)
+
+
+def format_bytes(size: float) -> str:
+    """
+    Format a byte count as a human readable string.
+
+    Args:
+        size (float): The number of bytes.
+
+    Returns:
+        str: The size with a unit, e.g. "12.3 MB".
+    """
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
   
-def display_results(agent: Agent) -> None:
+def display_results(response: Dict[str, Any]) -> None:
     """
     Display the results of the agent's computation in Streamlit.
 
@@ -52,21 +174,25 @@ def display_results(agent: Agent) -> None:
     The function will also display the code that was executed to generate the result and an
     explanation of the code.
 
-    If the result is a plot, it will also be saved to a file and the user will be given the option
-    to download the plot as an image.
+    If a chart was generated, the user will be given the option to download it as an image.
+
+    If the answer was served from the result cache, this is indicated above the result.
 
     If the result is None, an error message will be displayed.
 
-    :param agent: The agent that generated the result
+    :param response: The response built by chatbot_handler
     """
-    PLOT_PATH=pathlib.Path(__file__).parent.parent.joinpath('exports/charts/temp_chart.png')
-    # agent.clear_memory()
-    result=agent.last_result
-    code=agent.last_code_executed
+    result=response['result']
+    code=response['code']
+    chart=response['chart']
 
     if 'download' not in st.session_state:
         st.session_state['download'] = False
     if result is not None:
+        if response.get('cached'):
+            st.caption(":material/bolt: Served from cache")
+        elif response.get('replayed'):
+            st.caption(":material/replay: Answered by replaying previously generated code")
         
         with st.expander("Result",expanded=True):
             if result['type'] == 'string':
@@ -81,21 +207,51 @@ def display_results(agent: Agent) -> None:
                 # st.info(result['value'])
         st.divider()
         with st.expander("Explanation",expanded=True):
-            st.markdown(agent.explain())
+            explanation = st.empty()
         st.divider()
         with st.expander("Code",expanded=True):
             if code is not None:
                 st.code(code,language='python',line_numbers=True,wrap_lines=True)
-        if os.path.exists(PLOT_PATH):
+        if chart is not None:
             st.divider()
             with st.expander("Chart",expanded=True):
-                st.image(str(PLOT_PATH), use_column_width=True)
-             # Open the image file in binary mode
-            with open(PLOT_PATH, "rb") as image_file:
-                download_chart = st.download_button("Download Chart", image_file, "chart.png", "image/png")
+                st.image(chart, use_column_width=True)
+            download_chart = st.download_button("Download Chart", chart, "chart.png", "image/png")
             
             if download_chart or st.session_state.get('download', False):
                 st.session_state['download'] = True
+
+        # Filled last: a fresh answer's explanation is still being generated in the background
+        display_explanation(explanation, response['explanation'], response.get('explanation_stream'))
                 
     else:
-        st.error('We are unable to retrieve any result. Please check your question and try again.')
\ No newline at end of file
+        st.error('We are unable to retrieve any result. Please check your question and try again.')
+
+
+def display_explanation(placeholder: Any, explanation: Union[str, Future, None],
+                        stream: Optional[DeferredTokenStream] = None) -> None:
+    """
+    Display an explanation in its placeholder, waiting for it if it is still being generated.
+
+    Args:
+        placeholder (Any): The st.empty placeholder of the explanation.
+        explanation (Union[str, Future, None]): The explanation, a Future resolving to it, or None.
+        stream (Optional[DeferredTokenStream]): The explanation's token stream, rendered into the
+            placeholder while the Future is pending.
+    """
+    if isinstance(explanation, Future):
+        try:
+            if stream is not None:
+                placeholder.caption("Generating explanation...")
+                stream.attach(placeholder)
+                explanation = explanation.result()
+            else:
+                with placeholder.container(), st.spinner("Generating explanation..."):
+                    explanation = explanation.result()
+        except Exception as e:
+            placeholder.warning(f"Could not generate an explanation: {e}")
+            return
+    if explanation:
+        placeholder.markdown(explanation)
+    else:
+        placeholder.caption("No explanation available.")
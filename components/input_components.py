@@ -1,10 +1,14 @@
 # components/input_components.py
+import os
 import time
-import pandas as pd
 import streamlit as st
 from streamlit_mic_recorder import mic_recorder
-from utils.contsant import PROVIDERS
-from utils.get_models import get_provider
+from utils.contsant import FILE_BACKEND, PROVIDERS
+from utils.get_models import get_models_cached, prefetch_model_catalogs
+from utils.fingerprint import fingerprint_options
+from src.hanlders.files_handlers import FILE_BACKENDS, list_sheet_names
+from src.hanlders.database_hanlders import is_database_session
+from src.hanlders.filter_handlers import parse_filter
 from typing import List, Tuple, Union, Optional,Any,Dict
 
 # Define type aliases for clarity
@@ -25,13 +29,55 @@ def get_model_and_key(provider_choice: str)-> Tuple[Optional[str], Optional[str]
     key = None
     for provider in PROVIDERS:
         if provider== provider_choice:
-            key = st.text_input(PROVIDERS[provider]['key'], type="password")
+            key = st.text_input(PROVIDERS[provider]['key'], type="password", key=f"{provider}_api_key_input")
             if key:
-                llm_choice=st.selectbox(f"{provider} Models",sorted(get_provider(provider, key).get_models()))
+                models, error = get_models_cached(provider, key)
+                if error:
+                    st.error(error)
+                llm_choice=st.selectbox(f"{provider} Models",sorted(models))
             else:
                 llm_choice=st.selectbox(f"{provider} Models",[])
     return  key,llm_choice
 
+def get_configured_api_keys() -> List[Tuple[str, str, str]]:
+    """
+    Collect every API key available to the sign-in dialog.
+
+    Keys typed into the dialog take precedence over the provider's environment variable.
+    The separate Groq key of the voice assistant is listed as "Groq voice".
+
+    Returns:
+        List[Tuple[str, str, str]]: (label, provider name, API key) triples.
+    """
+    api_keys = []
+    for provider in PROVIDERS:
+        key = st.session_state.get(f"{provider}_api_key_input") or os.environ.get(PROVIDERS[provider]['key'])
+        if key:
+            api_keys.append((provider, provider, key))
+    voice_key = st.session_state.get('groq_voice_key_input')
+    if voice_key:
+        api_keys.append(("Groq voice", "Groq", voice_key))
+    return api_keys
+
+
+def prefetch_credentials() -> Dict[str, Dict]:
+    """
+    List models and validate all configured API keys concurrently.
+
+    The prefetch only runs again when the set of keys changes; its results are kept in
+    st.session_state['prefetch'] and the model listings warm the model catalog cache.
+
+    Returns:
+        Dict[str, Dict]: The prefetch results per label, see prefetch_model_catalogs.
+    """
+    api_keys = get_configured_api_keys()
+    marker = fingerprint_options(api_keys=api_keys)
+    if st.session_state.get('prefetch_marker') != marker:
+        st.session_state['prefetch'] = prefetch_model_catalogs(api_keys)
+        st.session_state['prefetch_marker'] = marker
+    return st.session_state['prefetch']
+
+
 @st.dialog("Sign In to get in touch with DeltaX")
 def get_credentials():
     # Initialize session states if not set
@@ -43,6 +89,8 @@ def get_credentials():
         st.session_state['signed_in'] = False
     if 'groq_api_key' not in st.session_state:
         st.session_state['groq_api_key'] = None
+    # Warm the model listings of every configured provider in one concurrent round
+    prefetch = prefetch_credentials()
     # Get user input for username and provider selection
     st.session_state['username'] = st.text_input("Username")
     st.session_state['provider'] = st.selectbox("Provider", ["PandasAI", "OpenAI", "Google Gemini", "Groq", "Antropic"])
@@ -72,7 +120,10 @@ def get_credentials():
     if voice:
         st.session_state['voice'] = True
         if st.session_state['provider'] != 'Groq':
-            st.session_state['groq_api_key'] = st.text_input("Enter Groq API Key",type='password')
+            st.session_state['groq_api_key'] = st.text_input("Enter Groq API Key",type='password', key="groq_voice_key_input")
+            voice_status = prefetch.get("Groq voice")
+            if st.session_state['groq_api_key'] and voice_status and voice_status['valid'] is False:
+                st.error(f"Groq API key for the voice assistant is not valid: {voice_status['error']}")
     else:
         st.session_state['voice'] = False
 
@@ -117,19 +168,25 @@ def get_uploaded_files() -> Union[List[Any], Any]:
         Union[List[Any], Any]
     """
     file_type = st.selectbox("Select file type", ["CSV", "TSV", "XLSX"])
+    st.session_state['file_backend'] = st.selectbox(
+        "Parser", FILE_BACKENDS, index=FILE_BACKENDS.index(FILE_BACKEND),
+        help="Polars reads files on all cores and loads only the selected columns and rows",
+    )
     if file_type == "CSV":
         uploaded_files=st.file_uploader("Choose CSV files", type=["csv"], accept_multiple_files=True)
+        st.session_state['file_load_options'] = get_file_load_options()
         st.session_state['is_uploaded'] = True
         return uploaded_files if uploaded_files else None
     
     elif file_type == "TSV":
         uploaded_files=st.file_uploader("Choose TSV files", type=["tsv"], accept_multiple_files=True)
+        st.session_state['file_load_options'] = get_file_load_options()
         st.session_state['is_uploaded'] = True
         return uploaded_files if uploaded_files else None
     elif file_type == "XLSX":
         uploaded_file=st.file_uploader("Choose XLSX files", type=["xlsx", "xls"], accept_multiple_files=False)
         if uploaded_file is not None:
-            sheets=pd.ExcelFile(uploaded_file).sheet_names
+            sheets=list_sheet_names(uploaded_file)
             sheets_names = get_sheet_choice(sheets)
             st.session_state['selected_sheets'] = sheets_names
             st.session_state['is_uploaded'] = True
@@ -180,19 +237,124 @@ def get_database():
     db_choice=st.selectbox("Select Database", ["MySQL", "SQLite", "PostgreSQL", ])
     return db_choice
 
+TABLE_HELP = ("Leave empty to work with every table of the database, or enter `<schema>.*` for every table "
+              "of a schema. Tables are only loaded when a question needs them.")
+
+
+def get_pushdown_options(table: str) -> Dict[str, Any]:
+    """
+    Ask which slice of the table to load, so it can be selected on the database server.
+
+    Presents inputs for the columns to load, filters (one "column operator value" per
+    line), a row limit and a sampling percentage. Filter lines that cannot be parsed
+    are reported and ignored. Columns and filters name the columns of one table, so
+    they are disabled when the whole database or a schema is selected; the row limit
+    and sampling then apply to every table loaded.
+
+    Args:
+        table (str): The table entered by the user, empty, ``*`` or ``<schema>.*`` for every table.
+
+    Returns:
+        Dict[str, Any]: The columns, where conditions, limit and sample percentage; options
+        left at their defaults are omitted.
+    """
+    options = {}
+    whole_database = is_database_session({'table': table})
+    with st.expander("Load options"):
+        columns = st.text_input("Columns", disabled=whole_database,
+                                help="Comma-separated column names. Leave empty to load all columns. "
+                                     "Only available when a single table is selected.")
+        filters = st.text_area("Filters", disabled=whole_database,
+                               help="One condition per line, e.g. `year >= 2023` or `region IN ('EU', 'US')`. "
+                                    "Only available when a single table is selected.")
+        cols = st.columns(2, gap="small", vertical_alignment="center")
+        with cols[0]:
+            limit = st.number_input("Row limit", min_value=0, value=0, step=1000,
+                                    help="0 loads every matching row. Applies to each table loaded.")
+        with cols[1]:
+            sample = st.slider("Sample %", min_value=1, max_value=100, value=100,
+                               help="Share of rows sampled on the server. Applies to each table loaded.")
+
+    if not whole_database:
+        if columns.strip():
+            options['columns'] = [name.strip() for name in columns.split(',') if name.strip()]
+        where = parse_filters(filters)
+        if where:
+            options['where'] = where
+    if limit:
+        options['limit'] = int(limit)
+    if sample < 100:
+        options['sample'] = float(sample)
+    return options
+
+
+def parse_filters(filters: str) -> List[list]:
+    """
+    Parse "column operator value" lines into ``[column, operator, value]`` conditions.
+
+    Lines that cannot be parsed are reported and ignored; IS NULL and IS NOT NULL
+    conditions have no value.
+
+    Args:
+        filters (str): The filters as typed by the user, one per line.
+
+    Returns:
+        List[list]: The conditions.
+    """
+    where = []
+    for line in filters.splitlines():
+        if not line.strip():
+            continue
+        try:
+            where.append(parse_filter(line))
+        except ValueError as e:
+            st.warning(f"Ignoring filter that could not be parsed: {line} ({e})")
+    return where
+
+
+def get_file_load_options() -> Dict[str, Any]:
+    """
+    Ask which columns and rows of the uploaded CSV/TSV files to load.
+
+    With the Polars parser the columns and filters are pushed into the file scan; the
+    pandas parser applies them chunk by chunk.
+
+    Returns:
+        Dict[str, Any]: The columns, where conditions and row limit; options left at their
+        defaults are omitted.
+    """
+    options = {}
+    with st.expander("Load options"):
+        columns = st.text_input("Columns", help="Comma-separated column names. Leave empty to load all columns.")
+        filters = st.text_area("Filters", help="One condition per line, e.g. `year >= 2023` or `region IN ('EU', 'US')`.")
+        limit = st.number_input("Row limit", min_value=0, value=0, step=1000, help="0 loads every matching row.")
+
+    if columns.strip():
+        options['columns'] = [name.strip() for name in columns.split(',') if name.strip()]
+    where = parse_filters(filters)
+    if where:
+        options['where'] = where
+    if limit:
+        options['limit'] = int(limit)
+    return options
+
+
 def get_mysql_credentials() -> Dict:
     """
     Get the MySQL credentials from the user.
 
     Presents the user with six text input fields to enter the host, port, username, password, database, and table name for a MySQL database.
+    The table is optional: without one, every table of the database is made available.
+
+    Optional load options (columns, filters, row limit, sampling) are added to the credentials, see get_pushdown_options.
 
-    Returns a dictionary with the MySQL credentials if all fields are filled, otherwise returns None.
+    Returns a dictionary with the MySQL credentials if all required fields are filled, otherwise returns None.
 
     Parameters:
         None
 
     Returns:
-        Dict: A dictionary with the MySQL credentials if all fields are filled, otherwise None.
+        Dict: A dictionary with the MySQL credentials if all required fields are filled, otherwise None.
     """
     cols = st.columns(3, gap="small",vertical_alignment="center")
     with cols[0]:
@@ -207,9 +369,10 @@ def get_mysql_credentials() -> Dict:
     with cols[1]:
         database = st.text_input("Database")
     with cols[2]:
-        table = st.text_input("Table")
-    if all([host, port, user, password, database, table]):
-        return {"MySQL": {"host": host, "port": int(port), "username": user, "password": password, "database": database, "table": table}}
+        table = st.text_input("Table", help=TABLE_HELP)
+    options = get_pushdown_options(table)
+    if all([host, port, user, password, database]):
+        return {"MySQL": {"host": host, "port": int(port), "username": user, "password": password, "database": database, "table": table, **options}}
     else:
         
         return None
@@ -218,19 +381,23 @@ def get_sqlite_credentials() -> Dict:
     """Get the SQLite credentials from the user.
 
     Presents the user with two text input fields to enter the database and table name for a SQLite database.
+    The table is optional: without one, every table of the database is made available.
+
+    Optional load options (columns, filters, row limit, sampling) are added to the credentials, see get_pushdown_options.
 
-    Returns a dictionary with the SQLite credentials if both fields are filled, otherwise returns None.
+    Returns a dictionary with the SQLite credentials if the database is filled, otherwise returns None.
 
     Parameters:
         None
 
     Returns:
-        Dict: A dictionary with the SQLite credentials if both fields are filled, otherwise None.
+        Dict: A dictionary with the SQLite credentials if the database is filled, otherwise None.
     """
     database = st.text_input("Database")
-    table = st.text_input("Table")
-    if all([database, table]):
-        return {"SQLite": {"database": database, "table": table}}
+    table = st.text_input("Table", help=TABLE_HELP)
+    options = get_pushdown_options(table)
+    if database:
+        return {"SQLite": {"database": database, "table": table, **options}}
     else:
         
         return None
@@ -239,20 +406,23 @@ def get_postgresql_credentials() -> Dict:
     """Get the PostgreSQL credentials from the user.
 
     Presents the user with six text input fields to enter the host, port, username, password, database, and table name for a PostgreSQL database.
+    The table is optional: without one, every table of the database is made available.
 
-    Returns a dictionary with the PostgreSQL credentials if all fields are filled, otherwise returns None.
+    Optional load options (columns, filters, row limit, sampling) are added to the credentials, see get_pushdown_options.
+
+    Returns a dictionary with the PostgreSQL credentials if all required fields are filled, otherwise returns None.
 
     Parameters:
         None
 
     Returns:
-        Dict: A dictionary with the PostgreSQL credentials if all fields are filled, otherwise None.
+        Dict: A dictionary with the PostgreSQL credentials if all required fields are filled, otherwise None.
     """
     cols = st.columns(3, gap="small",vertical_alignment="center")
     with cols[0]:
         host = st.text_input("Host", "localhost")
     with cols[1]:
-        port = st.text_input("Port", "3306")
+        port = st.text_input("Port", "5432")
     with cols[2]: 
         user = st.text_input("User")
     with cols[0]:
@@ -260,9 +430,10 @@ def get_postgresql_credentials() -> Dict:
     with cols[1]:
         database = st.text_input("Database")
     with cols[2]:
-        table = st.text_input("Table")
-    if all([host, port, user, password, database, table]):
-        return {"PostgreSQL": {"host": host, "port": int(port), "user": user, "password": password, "database": database, "table": table}}
+        table = st.text_input("Table", help=TABLE_HELP)
+    options = get_pushdown_options(table)
+    if all([host, port, user, password, database]):
+        return {"PostgreSQL": {"host": host, "port": int(port), "username": user, "password": password, "database": database, "table": table, **options}}
     else:
         
         return None
@@ -0,0 +1,149 @@
+# src/hanlders/budget_handlers.py
+import logging
+import functools
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
+from pandasai.helpers.dataframe_serializer import DataframeSerializer, DataframeSerializerType
+from .profile_handlers import describe_frame
+from utils.contsant import (DB_SCHEMA_SAMPLE_ROWS, MODEL_CONTEXT_TOKENS, PROFILE_TOP_VALUES, PROFILE_VALUE_MAX_CHARS,
+                            PROMPT_CONTEXT_SHARE, PROMPT_MAX_TOKENS, PROMPT_RESERVED_TOKENS, PROVIDER_CONTEXT_TOKENS)
+
+logger = logging.getLogger(__name__)
+
+# Detail levels tried in turn until the dataframe context fits the budget, as
+# (sample rows, longest quoted value, top values per column, share of columns kept)
+CONTEXT_LEVELS: List[Tuple[int, int, int, float]] = [
+    (DB_SCHEMA_SAMPLE_ROWS, PROFILE_VALUE_MAX_CHARS, PROFILE_TOP_VALUES, 1.0),
+    (1, PROFILE_VALUE_MAX_CHARS, PROFILE_TOP_VALUES, 1.0),
+    (1, 20, 2, 1.0),
+    (0, 12, 1, 1.0),
+    (0, 12, 1, 0.5),
+    (0, 12, 0, 0.25),
+    (0, 12, 0, 0.1),
+]
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding(model: Optional[str]) -> Any:
+    """Return the tiktoken encoding closest to a model, or None if tiktoken is unavailable."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model or '')
+    except KeyError:
+        # Other providers' tokenizers are close enough to OpenAI's for budgeting
+        pass
+    try:
+        return tiktoken.get_encoding('cl100k_base')
+    except Exception:
+        # The encoding is downloaded on first use and may be unreachable
+        return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Count the tokens of a text for a model.
+
+    Uses tiktoken when it is installed and falls back to four characters per token.
+
+    Args:
+        text (str): The text to measure.
+        model (Optional[str]): The model the text is sent to.
+
+    Returns:
+        int: The number of tokens.
+    """
+    encoding = _encoding(model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def prompt_budget(credentials: Dict[str, Dict]) -> Tuple[Optional[str], int]:
+    """
+    Return the model and the prompt token budget for the configured provider.
+
+    The budget is PROMPT_CONTEXT_SHARE of the model's context window, capped at
+    PROMPT_MAX_TOKENS.
+
+    Args:
+        credentials (Dict[str, Dict]): The session's credentials, keyed by provider.
+
+    Returns:
+        Tuple[Optional[str], int]: The model name and the budget in tokens.
+    """
+    for provider, options in credentials.items():
+        model = options.get('model')
+        window = MODEL_CONTEXT_TOKENS.get(model, PROVIDER_CONTEXT_TOKENS.get(provider, PROMPT_MAX_TOKENS))
+        return model, min(PROMPT_MAX_TOKENS, int(window * PROMPT_CONTEXT_SHARE))
+    return None, PROMPT_MAX_TOKENS
+
+
+def describe_at_level(df: Any, level: Tuple[int, int, int, float]) -> Any:
+    """Describe a DataFrame or a lazily loaded table for the Agent at one of CONTEXT_LEVELS."""
+    sample_rows, max_chars, top_values, column_share = level
+    if isinstance(df, pd.DataFrame):
+        return describe_frame(df, max_chars, top_values, column_share)
+    max_columns = None if column_share >= 1 else max(1, int(df.columns_count * column_share))
+    return df.describe(sample_rows, max_chars, max_columns)
+
+
+def fit_context(dfs: List[Any], credentials: Dict[str, Dict]) -> Tuple[List[Any], Dict[str, Any]]:
+    """
+    Describe the data for the Agent in as much detail as the prompt budget allows.
+
+    The CONTEXT_LEVELS are tried in turn: sample rows are trimmed first, then quoted
+    values are shortened, then the least useful columns are left out, until the
+    serialized dataframes fit the budget minus PROMPT_RESERVED_TOKENS. If even the
+    most compact level does not fit, it is used anyway and a warning is logged.
+
+    Args:
+        dfs (List[Any]): The DataFrames or lazily loaded tables the Agent works on.
+        credentials (Dict[str, Dict]): The session's credentials, keyed by provider.
+
+    Returns:
+        Tuple[List[Any], Dict[str, Any]]: The connectors to pass to ``Agent(dfs=...)``, and the
+        model, budget, dataframe context tokens and level used.
+    """
+    model, budget = prompt_budget(credentials)
+    available = budget - PROMPT_RESERVED_TOKENS
+    serializer = DataframeSerializer()
+    for level, detail in enumerate(CONTEXT_LEVELS):
+        connectors = [describe_at_level(df, detail) for df in dfs]
+        tokens = sum(
+            count_tokens(serializer.serialize(connector, extras={'index': i, 'type': 'pd.DataFrame'},
+                                              type_=DataframeSerializerType.CSV), model)
+            for i, connector in enumerate(connectors)
+        )
+        if tokens <= available:
+            break
+    else:
+        logger.warning("Dataframe context of %d tokens exceeds the %d tokens available for model %s",
+                       tokens, available, model)
+    usage = {'model': model, 'budget': budget, 'context_tokens': tokens, 'level': level}
+    logger.info("Dataframe context: %d tokens at detail level %d of %d (budget %d for %s)",
+                tokens, level, len(CONTEXT_LEVELS) - 1, budget, model)
+    return connectors, usage
+
+
+def log_prompt_usage(usage: Dict[str, Any], prompt: Optional[str], query: str) -> Optional[int]:
+    """
+    Log the size of the prompt sent for a query against the budget.
+
+    Args:
+        usage (Dict[str, Any]): The budget details returned by fit_context.
+        prompt (Optional[str]): The prompt the Agent sent last, if any.
+        query (str): The user's query.
+
+    Returns:
+        Optional[int]: The prompt's token count, or None if no prompt was sent.
+    """
+    if prompt is None:
+        return None
+    tokens = count_tokens(prompt, usage['model'])
+    log = logger.warning if tokens > usage['budget'] else logger.info
+    log("Prompt for %r: %d tokens (budget %d, dataframe context %d tokens at detail level %d, model %s)",
+        query, tokens, usage['budget'], usage['context_tokens'], usage['level'], usage['model'])
+    return tokens
@@ -0,0 +1,122 @@
+# src/hanlders/chart_handlers.py
+import io
+import time
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional, Tuple
+from matplotlib.figure import Figure
+from pandasai.responses.response_parser import ResponseParser
+from utils.contsant import CHART_CACHE_MAX_BYTES
+from utils.fingerprint import fingerprint_options
+
+# Charts saved by code running in the current context. Every Streamlit session runs
+# in its own script thread, so captures of concurrent sessions never mix.
+CHART_SINK: contextvars.ContextVar[Optional[List[bytes]]] = contextvars.ContextVar('chart_sink', default=None)
+
+_savefig = Figure.savefig
+# Figure.savefig is replaced only while at least one capture is active
+_PATCH_LOCK = threading.Lock()
+_active_captures = 0
+
+
+def _capturing_savefig(self: Figure, fname: Any, *args: Any, **kwargs: Any) -> None:
+    """Figure.savefig that renders into memory instead of a file while a capture is active."""
+    sink = CHART_SINK.get()
+    if sink is None:
+        return _savefig(self, fname, *args, **kwargs)
+    buffer = io.BytesIO()
+    kwargs['format'] = 'png'
+    _savefig(self, buffer, *args, **kwargs)
+    sink.append(buffer.getvalue())
+
+
+@contextmanager
+def capture_charts() -> Iterator[List[bytes]]:
+    """
+    Capture the charts saved by code running inside the block as PNG bytes.
+
+    Generated code saves charts with plt.savefig, which ends up in Figure.savefig; that
+    method is patched while any capture is active and restored after the last one ends.
+    Code running outside a capture, in this or another session, still saves to files.
+    Nothing is written to disk while the capture is active, so concurrent sessions
+    cannot overwrite each other's charts.
+
+    Yields:
+        List[bytes]: The PNG bytes of every chart saved inside the block, in order.
+    """
+    global _active_captures
+    charts: List[bytes] = []
+    with _PATCH_LOCK:
+        if _active_captures == 0:
+            Figure.savefig = _capturing_savefig
+        _active_captures += 1
+    token = CHART_SINK.set(charts)
+    try:
+        yield charts
+    finally:
+        CHART_SINK.reset(token)
+        with _PATCH_LOCK:
+            _active_captures -= 1
+            if _active_captures == 0:
+                Figure.savefig = _savefig
+
+
+class ChartResponse(ResponseParser):
+    """Response parser that returns plots as the captured PNG bytes instead of a file path."""
+
+    def format_plot(self, result: dict) -> Any:
+        charts = CHART_SINK.get()
+        return charts[-1] if charts else result['value']
+
+
+class ChartCache:
+    """
+    Size-bounded LRU cache of rendered charts keyed by code hash and data fingerprint.
+
+    Attributes:
+        max_bytes (int): Maximum total size of the cached PNG images.
+    """
+
+    def __init__(self, max_bytes: int = CHART_CACHE_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        # Each chart is stored with the time it was cached
+        self._charts: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(code: str, data_fingerprint: str) -> str:
+        """Build the cache key for a piece of code run against a dataset."""
+        return fingerprint_options(code=code, data=data_fingerprint)
+
+    def get(self, key: str, ttl: Optional[float] = None) -> Optional[bytes]:
+        """Return the cached chart for a key, or None on a miss or if it was cached more than ttl seconds ago."""
+        with self._lock:
+            entry = self._charts.get(key)
+            if entry is None:
+                return None
+            chart, stored_at = entry
+            if ttl is not None and time.monotonic() - stored_at > ttl:
+                self._size -= len(self._charts.pop(key)[0])
+                return None
+            self._charts.move_to_end(key)
+            return chart
+
+    def put(self, key: str, chart: bytes) -> None:
+        """Store a chart and evict the least recently used ones if over budget."""
+        if len(chart) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._charts:
+                self._size -= len(self._charts.pop(key)[0])
+            self._charts[key] = (chart, time.monotonic())
+            self._size += len(chart)
+            while self._size > self.max_bytes:
+                _, (evicted, _) = self._charts.popitem(last=False)
+                self._size -= len(evicted)
+
+
+# Shared by every session of the Streamlit server
+CHART_CACHE = ChartCache()
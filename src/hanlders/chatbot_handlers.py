@@ -2,29 +2,239 @@
 
 import streamlit as st
 import pandas as pd
+from concurrent.futures import Future, wait
 from pandasai import SmartDatalake,Agent
-from pandasai.responses import StreamlitResponse
+from .chart_handlers import CHART_CACHE, ChartResponse, capture_charts
 from .llm_handlers import llm_handler
-from typing import List,Tuple
-def chatbot_handler(dfs: List[pd.DataFrame],query: str) -> Agent:
+from .budget_handlers import fit_context, log_prompt_usage
+from .duckdb_handlers import SQL_ENGINE_DESCRIPTION, get_sql_engine, sql_connectors, sql_functions
+from .outofcore_handlers import bind_agent
+from .result_cache_handlers import CODE_REPLAYS, RESULT_CACHE
+from .result_handlers import build_response, replay_code
+from utils.fingerprint import fingerprint_frames, fingerprint_options, schema_signature
+from typing import Any,Dict,List,Optional,Tuple
+def chatbot_handler(dfs: List[pd.DataFrame],query: str,followup: bool = False) -> Dict[str, Any]:
     """
-    Create an Agent that can process a query given a list of Pandas DataFrames.
+    Answer a query about a list of Pandas DataFrames, reusing earlier work when possible.
+
+    Answers are cached by the DataFrames' content fingerprint and the normalized query,
+    so asking the same question of the same data skips the LLM round-trip entirely.
+    For data whose values changed but whose schema did not, the code generated for the
+    same query is replayed; the LLM is only asked when there is no such code or it fails.
+    A follow-up question continues the session's conversation, so its cache and replay
+    keys also cover the questions asked before it; any other question starts a new one.
     
     Parameters:
         dfs (List[pd.DataFrame]): A list of Pandas DataFrames that the Agent will use to answer the query.
         query (str): The query to be answered by the Agent.
+        followup (bool): Whether the query refers to the earlier questions and answers.
     
     Returns:
-        Agent: The created Agent.
+        Dict[str, Any]: The response to display, see build_response.
     """
-    llm = llm_handler(credentials=st.session_state['credentials'])
+    data = fingerprint_frames(dfs)
+    conversation = get_conversation(data, followup)
+    history = [question for question, _ in conversation]
+    key = RESULT_CACHE.key(data, query, history)
+    response = RESULT_CACHE.get(key, cache_ttl(dfs))
+    if response is None:
+        replay_key = CODE_REPLAYS.key(schema_signature(dfs), query, history)
+        response = replay_handler(dfs, replay_key)
+        if response is not None:
+            RESULT_CACHE.put(key, response)
+        else:
+            response = agent_handler(dfs, query, conversation, key, replay_key)
+    if response['result'] is not None:
+        conversation.append((query, memory_message(response['result'])))
+    return response
 
-    
-    config={'llm':llm,
-            'response_parser':StreamlitResponse,
-            }
-    
-    agent=Agent(dfs=dfs,config=config)
-    
-    agent.chat(query)
-    return agent
\ No newline at end of file
+
+def agent_handler(dfs: List[pd.DataFrame], query: str, conversation: List[Tuple[str, str]],
+                  key: str, replay_key: str) -> Dict[str, Any]:
+    """
+    Answer a query with the session's Agent and cache the answer once it is explained.
+
+    The Agent's memory is replaced by the conversation the query continues, which also
+    holds the answers served from the caches.
+
+    Parameters:
+        dfs (List[pd.DataFrame]): The DataFrames the Agent works on.
+        query (str): The query to be answered.
+        conversation (List[Tuple[str, str]]): The earlier questions and answers, see get_conversation.
+        key (str): The RESULT_CACHE key of the answer.
+        replay_key (str): The CODE_REPLAYS key of the answer.
+
+    Returns:
+        Dict[str, Any]: The response to display, see build_response.
+    """
+    # An explanation still being generated for the previous answer uses the same Agent
+    pending = st.session_state.get('pending_explanation')
+    if pending is not None:
+        wait([pending])
+    agent = get_agent(dfs)
+    agent.start_new_conversation()
+    for question, answer in conversation:
+        agent.add_message(question, is_user=True)
+        agent.add_message(answer, is_user=False)
+    agent.last_prompt = None
+    with capture_charts() as charts:
+        agent.chat(query)
+    log_prompt_usage(st.session_state['prompt_usage'], agent.last_prompt, query)
+    response = build_response(agent, charts)
+    if response['result'] is not None and response['result']['type'] == 'plot' and response['code']:
+        CHART_CACHE.put(CHART_CACHE.key(response['code'], fingerprint_frames(dfs)), response['chart'])
+    if response['result'] is not None:
+        st.session_state['pending_explanation'] = response['explanation']
+        response['explanation'].add_done_callback(
+            lambda future: cache_explained_response(response, future, key, replay_key)
+        )
+    return response
+
+
+def get_conversation(data_fingerprint: str, followup: bool) -> List[Tuple[str, str]]:
+    """
+    Return the session's conversation a question continues, starting a new one if needed.
+
+    A new, empty conversation is started for questions that are not follow-ups and
+    whenever the data changed since the last question.
+
+    Parameters:
+        data_fingerprint (str): The fingerprint of the DataFrames, see fingerprint_frames.
+        followup (bool): Whether the question continues the current conversation.
+
+    Returns:
+        List[Tuple[str, str]]: The earlier questions with the answers as the Agent remembers them,
+        appended to as questions are answered.
+    """
+    if not followup or st.session_state.get('conversation_data') != data_fingerprint:
+        st.session_state['conversation'] = []
+        st.session_state['conversation_data'] = data_fingerprint
+    return st.session_state['conversation']
+
+
+def memory_message(result: Dict[str, Any]) -> str:
+    """Return an answer the way PandasAI records it in an Agent's memory."""
+    if result['type'] == 'dataframe':
+        return "Check it out: <dataframe>"
+    if result['type'] == 'plot':
+        return "Check it out: <plot>"
+    return str(result['value'])
+
+
+def cache_ttl(dfs: List[pd.DataFrame]) -> Optional[float]:
+    """
+    Return how long answers about the DataFrames stay cached, or None for the caches' default.
+
+    Database tables that are not loaded yet are fingerprinted by their schema rather
+    than their rows, and bound how long answers about them are reused via ``cache_ttl``.
+
+    Parameters:
+        dfs (List[pd.DataFrame]): The DataFrames, or lazily loaded tables, of the question.
+
+    Returns:
+        Optional[float]: The shortest ``cache_ttl`` of the tables, or None if none has one.
+    """
+    return min((df.cache_ttl for df in dfs if hasattr(df, 'cache_ttl')), default=None)
+
+
+def cache_explained_response(response: Dict[str, Any], explanation: Future, key: str, replay_key: str) -> None:
+    """
+    Store an answer in the result and replay caches once its explanation is ready.
+
+    Runs as a done-callback of the explanation future, outside the script thread.
+
+    Parameters:
+        response (Dict[str, Any]): The response built by build_response.
+        explanation (Future): The finished explanation future.
+        key (str): The RESULT_CACHE key of the answer.
+        replay_key (str): The CODE_REPLAYS key of the answer.
+    """
+    text = explanation.result() if explanation.exception() is None else None
+    response = {**response, 'explanation': text, 'explanation_stream': None}
+    RESULT_CACHE.put(key, response)
+    if response['code']:
+        CODE_REPLAYS.store(replay_key, {'code': response['code'], 'explanation': text})
+
+
+def replay_handler(dfs: List[pd.DataFrame], replay_key: str) -> Optional[Dict[str, Any]]:
+    """
+    Answer a query by re-running code generated earlier for data with the same schema.
+
+    Parameters:
+        dfs (List[pd.DataFrame]): The DataFrames to run the code against.
+        replay_key (str): The CODE_REPLAYS key of the query and the DataFrames' schema.
+
+    Returns:
+        Optional[Dict[str, Any]]: The response, or None if there is no stored code or it failed.
+    """
+    replay = CODE_REPLAYS.load(replay_key)
+    if replay is None:
+        return None
+    chart_key = CHART_CACHE.key(replay['code'], fingerprint_frames(dfs))
+    chart = CHART_CACHE.get(chart_key, cache_ttl(dfs))
+    if chart is not None:
+        # This code already rendered a chart of this exact data
+        result = {'type': 'plot', 'value': chart}
+    else:
+        result = replay_code(replay['code'], dfs, sql_functions(dfs))
+        if result is None:
+            return None
+        if result['type'] == 'plot':
+            CHART_CACHE.put(chart_key, result['value'])
+    return {
+        'result': result,
+        'code': replay['code'],
+        'explanation': replay['explanation'],
+        'chart': result['value'] if result['type'] == 'plot' else None,
+        'cached': False,
+        'replayed': True,
+    }
+
+
+def get_agent(dfs: List[pd.DataFrame]) -> Agent:
+    """
+    Return the session's Agent, building a new one only when the data or the model changed.
+
+    The Agent is stored in ``st.session_state['agent']`` together with a fingerprint of the
+    DataFrames and the credentials, so follow-up questions reuse the wrapped dataframes, the
+    LLM client and the Agent's conversation memory. The DataFrames are described to the
+    LLM by their column profiles rather than sample rows, in as much detail as the
+    model's prompt budget allows, see fit_context.
+
+    With the DuckDB SQL engine switched on, uploaded DataFrames are registered with the
+    session's DuckDB database and the Agent runs in PandasAI's direct SQL mode, so the
+    generated code does its heavy lifting in ``execute_sql_query`` calls. Lazily loaded
+    database tables are always analysed with pandas.
+
+    Parameters:
+        dfs (List[pd.DataFrame]): The DataFrames the Agent works on.
+
+    Returns:
+        Agent: The Agent for the current data source and model.
+    """
+    credentials = st.session_state['credentials']
+    use_sql = st.session_state.get('duckdb_engine', False) and all(isinstance(df, pd.DataFrame) for df in dfs)
+    data = fingerprint_frames(dfs)
+    key = fingerprint_options(data=data, credentials=credentials, sql=use_sql)
+    # Pooled clients are closed after a long idle period; a session holding an
+    # evicted client gets a new Agent around the replacement client
+    llm = llm_handler(credentials=credentials)
+    if st.session_state.get('agent_key') != key or st.session_state.get('agent_llm') is not llm:
+
+        config={'llm':llm,
+                'response_parser':ChartResponse,
+                }
+
+        connectors, usage = fit_context(dfs, credentials)
+        description = None
+        if use_sql:
+            config['direct_sql'] = True
+            connectors = sql_connectors(get_sql_engine(dfs), connectors)
+            description = SQL_ENGINE_DESCRIPTION
+        st.session_state['agent'] = Agent(dfs=connectors,config=config,description=description)
+        # Out-of-core datasets load only what the executed code uses
+        bind_agent(st.session_state['agent'])
+        st.session_state['prompt_usage'] = usage
+        st.session_state['agent_key'] = key
+        st.session_state['agent_llm'] = llm
+    return st.session_state['agent']
@@ -1,9 +1,398 @@
+import time
+import hashlib
+import threading
+import pandas as pd
+import pyarrow as pa
 import streamlit as st
-from typing import Optional, List, Dict, Any
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Any, Callable, Iterator, Tuple
+from sqlalchemy import Select, and_, column, create_engine, func, select, table, tablesample, text
+from sqlalchemy import inspect as inspect_database
+from sqlalchemy.engine import Connection, Engine, URL
+from sqlalchemy.engine.reflection import ObjectKind
 
 from pandasai.connectors import SQLConnector
 from pandasai.connectors import SqliteConnector
-class DatabaseConnector(SQLConnector):
+from pandasai.connectors.sql import SQLConnectorConfig, SqliteConnectorConfig
+from .dtype_handlers import optimize_dtypes
+from utils.contsant import DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE_SECONDS, DB_ENGINE_IDLE_SECONDS
+from utils.contsant import DB_STREAM_RESULTS, DB_FETCH_BATCH_ROWS, DB_FETCH_MEMORY_CAP_BYTES
+from utils.contsant import DB_CATALOG_TTL_SECONDS, DB_RESULT_TTL_SECONDS, DB_SCHEMA_SAMPLE_ROWS
+from utils.fingerprint import fingerprint_options
+
+EngineKey = Tuple[str, Optional[str], Optional[int], str, Optional[str], str]
+# Arrow text types converted to Arrow-backed pandas strings rather than Python objects
+ARROW_STRINGS = {pa.string(): pd.StringDtype('pyarrow'), pa.large_string(): pd.StringDtype('pyarrow')}
+
+
+class EnginePool:
+    """
+    Process-wide registry of SQLAlchemy engines shared across reruns and sessions.
+
+    Engines are keyed by dialect, host, port, database, user and a hash of the password,
+    and each keeps its own connection pool with pre-ping health checks and periodic
+    connection recycling. Connectors acquire an engine and release it when the user
+    switches sources; an engine no connector uses is disposed after it has been idle
+    for DB_ENGINE_IDLE_SECONDS, or at once through dispose(). The pooled connections of
+    an engine that is still acquired but idle, e.g. by a browser tab that was closed,
+    are closed as well; the engine opens new ones when it is used again.
+    """
+
+    def __init__(self, idle_timeout: float = DB_ENGINE_IDLE_SECONDS) -> None:
+        self.idle_timeout = idle_timeout
+        self._engines: Dict[EngineKey, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(dialect: str, host: Optional[str], port: Optional[int], database: str,
+            username: Optional[str], password: Optional[str]) -> EngineKey:
+        """Build the registry key of a database account."""
+        digest = hashlib.sha256((password or '').encode('utf-8')).hexdigest()
+        return dialect, host, port, database, username, digest
+
+    def acquire(self, key: EngineKey, factory: Callable[[], Engine]) -> Engine:
+        """
+        Return the engine for a key, creating it with factory on first use.
+
+        Every call must be matched by a release() once the caller is done with the engine.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._dispose_idle(now)
+            entry = self._engines.get(key)
+            if entry is None:
+                entry = self._engines[key] = [factory(), 0, now]
+            entry[1] += 1
+            entry[2] = now
+            return entry[0]
+
+    def touch(self, engine: Engine) -> None:
+        """Mark an engine as in use, e.g. when a connection is checked out of it."""
+        with self._lock:
+            for entry in self._engines.values():
+                if entry[0] is engine:
+                    entry[2] = time.monotonic()
+
+    def release(self, key: EngineKey) -> None:
+        """Mark one user of an engine as done; the engine stays pooled until idle."""
+        with self._lock:
+            entry = self._engines.get(key)
+            if entry is not None:
+                entry[1] = max(0, entry[1] - 1)
+                entry[2] = time.monotonic()
+
+    def dispose(self, key: EngineKey) -> None:
+        """Dispose the engine for a key if no connector is using it any more."""
+        with self._lock:
+            entry = self._engines.get(key)
+            if entry is None or entry[1] > 0:
+                return
+            del self._engines[key]
+        entry[0].dispose()
+
+    def _dispose_idle(self, now: float) -> None:
+        for key, entry in list(self._engines.items()):
+            engine, users, last_used = entry
+            if now - last_used <= self.idle_timeout:
+                continue
+            if users == 0:
+                del self._engines[key]
+            else:
+                entry[2] = now
+            # Checked-out connections are not affected, and a disposed engine can still connect
+            engine.dispose()
+
+
+# Shared by every session of the Streamlit server
+ENGINE_POOL = EnginePool()
+
+
+def create_pooled_engine(url: URL, connect_args: Optional[Dict[str, Any]] = None) -> Engine:
+    """Create an engine with the pool sizing, health checks and recycling used for every source."""
+    if url.get_backend_name() == 'sqlite':
+        # SQLite has no server connections to size or recycle
+        return create_engine(url, connect_args=connect_args or {}, pool_pre_ping=True)
+    return create_engine(
+        url,
+        connect_args=connect_args or {},
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        pool_recycle=DB_POOL_RECYCLE_SECONDS,
+    )
+
+
+class PooledConnectionMixin:
+    """
+    Makes a PandasAI SQL connector take its engine from ENGINE_POOL.
+
+    PandasAI creates a new engine and opens a connection in ``_init_connection``, which
+    a connector kept in session state would hold for as long as the session lives: it
+    goes stale once the server drops idle connections, and it pins a pool slot. This
+    override reuses the pooled engine of the same account and holds no connection;
+    PandasAI's queries run on a connection checked out for each call, see borrow().
+    """
+
+    _pool_key: Optional[EngineKey] = None
+    _connection = None
+
+    def _init_connection(self, config: Any) -> None:
+        key = ENGINE_POOL.key(config.dialect, getattr(config, 'host', None), getattr(config, 'port', None),
+                              config.database, getattr(config, 'username', None), getattr(config, 'password', None))
+        url = self._engine_url(config)
+        self._engine = ENGINE_POOL.acquire(key, lambda: create_pooled_engine(url, getattr(config, 'connect_args', None)))
+        self._pool_key = key
+
+    @contextmanager
+    def borrow(self) -> Iterator[Connection]:
+        """Check a connection out of the pool as ``self._connection`` for the duration of the block."""
+        if self._connection is not None:
+            yield self._connection
+            return
+        ENGINE_POOL.touch(self._engine)
+        with self._engine.connect() as connection:
+            self._connection = connection
+            try:
+                yield connection
+            finally:
+                self._connection = None
+
+    def head(self, n: int = 5) -> pd.DataFrame:
+        with self.borrow():
+            return super().head(n)
+
+    @property
+    def rows_count(self) -> int:
+        if self._rows_count is None:
+            with self.borrow():
+                self._rows_count = super().rows_count
+        return self._rows_count
+
+    def execute_direct_sql_query(self, sql_query: str) -> pd.DataFrame:
+        with self.borrow():
+            return super().execute_direct_sql_query(sql_query)
+
+    def _engine_url(self, config: Any) -> URL:
+        """Return the SQLAlchemy URL of the configured database."""
+        return URL.create(
+            f"{config.dialect}+{config.driver}" if config.driver else config.dialect,
+            username=config.username,
+            password=config.password,
+            host=config.host,
+            port=config.port,
+            database=config.database,
+        )
+
+    def release(self, dispose: bool = False) -> None:
+        """
+        Release the engine.
+
+        Args:
+            dispose (bool): Also dispose the engine if no other connector uses it.
+        """
+        if self._pool_key is not None:
+            ENGINE_POOL.release(self._pool_key)
+            if dispose:
+                ENGINE_POOL.dispose(self._pool_key)
+            self._pool_key = None
+
+
+# Filter operators accepted in ``where`` conditions, mapped to SQLAlchemy expressions
+FILTER_OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    '=': lambda col, value: col == value,
+    '!=': lambda col, value: col != value,
+    '<>': lambda col, value: col != value,
+    '<': lambda col, value: col < value,
+    '<=': lambda col, value: col <= value,
+    '>': lambda col, value: col > value,
+    '>=': lambda col, value: col >= value,
+    'LIKE': lambda col, value: col.like(value),
+    'NOT LIKE': lambda col, value: col.not_like(value),
+    'IN': lambda col, value: col.in_(value if isinstance(value, (list, tuple)) else [value]),
+    'NOT IN': lambda col, value: col.not_in(value if isinstance(value, (list, tuple)) else [value]),
+    'IS NULL': lambda col, value: col.is_(None),
+    'IS NOT NULL': lambda col, value: col.is_not(None),
+}
+
+
+class PushdownQueryMixin:
+    """
+    Pushes column selection, filters, sampling and a row limit down to the database.
+
+    Instead of PandasAI's ``SELECT *``, execute() runs a query that only returns the
+    requested slice of the table, so a large fact table is never pulled into pandas
+    in full. Identifiers are quoted and filter values are bound parameters.
+
+    Sampling keeps each row with the given probability on the server:
+    ``TABLESAMPLE BERNOULLI`` on PostgreSQL, ``RAND() < p`` on MySQL and a
+    ``random()`` filter on SQLite.
+
+    With streaming enabled the result is read through a server-side cursor in batches
+    of batch_size rows. Each batch is appended to a list of Arrow tables, so the Python
+    objects of one batch at most are held at any time, and fetching stops once the
+    fetched rows take memory_cap bytes. The dtypes are optimized once all batches are in.
+
+    Attributes:
+        columns (List[str]): Columns to load; empty loads every column.
+        where (List[List[Any]]): [column, operator, value] conditions, combined with AND.
+        limit (Optional[int]): Maximum number of rows to load.
+        sample (Optional[float]): Percentage of rows to sample, between 0 and 100.
+        stream (bool): Fetch the result in batches through a server-side cursor.
+        batch_size (int): Rows fetched per batch when streaming.
+        memory_cap (int): Memory the streamed rows may take before fetching stops.
+    """
+
+    columns: List[str] = []
+    where: List[List[Any]] = []
+    limit: Optional[int] = None
+    sample: Optional[float] = None
+    stream: bool = DB_STREAM_RESULTS
+    batch_size: int = DB_FETCH_BATCH_ROWS
+    memory_cap: int = DB_FETCH_MEMORY_CAP_BYTES
+
+    def set_pushdown(self, columns: Optional[List[str]] = None, where: Optional[List[List[Any]]] = None,
+                     limit: Optional[int] = None, sample: Optional[float] = None) -> None:
+        """Validate and store the slice of the table to load."""
+        for condition in where or []:
+            if len(condition) not in (2, 3) or str(condition[1]).upper() not in FILTER_OPERATORS:
+                raise ValueError(f"Invalid filter: {condition}")
+        if sample is not None and not 0 < sample <= 100:
+            raise ValueError("Sample percentage must be between 0 and 100")
+        self.columns = list(columns or [])
+        self.where = [list(condition) for condition in where or []]
+        self.limit = limit or None
+        self.sample = sample if sample and sample < 100 else None
+
+    def set_streaming(self, stream: Optional[bool] = None, batch_size: Optional[int] = None,
+                      memory_cap: Optional[int] = None) -> None:
+        """Validate and store how the result is fetched; None keeps the defaults from utils.contsant."""
+        if batch_size is not None and batch_size < 1:
+            raise ValueError("Batch size must be at least one row")
+        if memory_cap is not None and memory_cap < 1:
+            raise ValueError("Memory cap must be positive")
+        self.stream = DB_STREAM_RESULTS if stream is None else stream
+        self.batch_size = batch_size or DB_FETCH_BATCH_ROWS
+        self.memory_cap = memory_cap or DB_FETCH_MEMORY_CAP_BYTES
+
+    def build_query(self) -> Select:
+        """
+        Build the SELECT statement for the configured slice of the table.
+
+        Returns:
+            Select: The statement, ready for ``pd.read_sql``.
+        """
+        schema, _, name = self.config.table.rpartition('.')
+        source = table(name, schema=schema or None)
+        dialect = self._engine.dialect.name
+        conditions = [
+            FILTER_OPERATORS[str(op).upper()](column(col), value[0] if value else None)
+            for col, op, *value in self.where
+        ]
+
+        if self.sample is not None and dialect == 'postgresql':
+            source = tablesample(source, func.bernoulli(self.sample))
+        elif self.sample is not None and dialect == 'mysql':
+            conditions.append(func.rand() < self.sample / 100)
+        elif self.sample is not None:
+            # random() spans the signed 64-bit range on SQLite
+            conditions.append(func.abs(func.random()) % 1_000_000 < int(self.sample * 10_000))
+
+        query = select(*[column(col) for col in self.columns] or [text('*')]).select_from(source)
+        if conditions:
+            query = query.where(and_(*conditions))
+        if self.limit:
+            query = query.limit(self.limit)
+        return query
+
+    def execute(self) -> pd.DataFrame:
+        """
+        Load the configured slice of the table into a dtype-optimized DataFrame.
+
+        Returns:
+            pd.DataFrame: The rows and columns selected by the pushdown options.
+        """
+        if self.stream:
+            return self.fetch_batches()
+        with self.checkout() as connection:
+            return optimize_dtypes(pd.read_sql(self.build_query(), connection))
+
+    def checkout(self) -> Connection:
+        """Check a connection out of the engine's pool; use it as a context manager to return it."""
+        ENGINE_POOL.touch(self._engine)
+        return self._engine.connect()
+
+    def fetch_batches(self) -> pd.DataFrame:
+        """
+        Stream the configured slice of the table into a DataFrame, batch by batch.
+
+        Progress is shown while fetching. If the memory cap is reached, the rows fetched
+        so far are returned with ``attrs['truncated']`` set and a warning is shown.
+
+        Returns:
+            pd.DataFrame: The fetched rows.
+        """
+        name = self.config.table
+        tables: List[pa.Table] = []
+        held = rows = memory_before = 0
+        truncated = False
+        progress = st.progress(0.0, text=f"Fetching {name}...")
+        connection = self.checkout()
+        try:
+            result = connection.execution_options(yield_per=self.batch_size).execute(self.build_query())
+            columns = list(result.keys())
+            for batch in result.partitions():
+                chunk = pd.DataFrame.from_records(batch, columns=columns, coerce_float=True)
+                memory_before += int(chunk.memory_usage(deep=True).sum())
+                tables.append(pa.Table.from_pandas(chunk, preserve_index=False))
+                del chunk, batch
+                held += tables[-1].nbytes
+                rows += tables[-1].num_rows
+                done = max(held / self.memory_cap, rows / self.limit if self.limit else 0.0)
+                progress.progress(min(1.0, done), text=f"Fetching {name}: {rows:,} rows")
+                if held >= self.memory_cap:
+                    truncated = True
+                    break
+            if truncated:
+                # Closing a MySQL streaming cursor reads the rest of the result; drop the connection instead
+                connection.invalidate()
+            else:
+                result.close()
+        finally:
+            connection.close()
+            progress.empty()
+
+        df = self._combine_batches(tables) if tables else optimize_dtypes(pd.DataFrame(columns=columns))
+        df.attrs['memory_before'] = memory_before or df.attrs.get('memory_before', 0)
+        df.attrs['memory_after'] = int(df.memory_usage(deep=True).sum())
+        if truncated:
+            df.attrs['truncated'] = True
+            st.warning(f"The result of '{name}' exceeds the memory cap; working with the first {rows:,} rows. "
+                       "Narrow it down with columns, filters or sampling to load all of it.")
+        return df
+
+    @staticmethod
+    def _combine_batches(tables: List[pa.Table]) -> pd.DataFrame:
+        """
+        Concatenate fetched batches into one DataFrame and optimize its dtypes once.
+
+        Optimizing each batch on its own would pick dtypes from that batch's values
+        alone, e.g. a categorical in one batch and text in the next, which Arrow cannot
+        concatenate. Text is kept in Arrow memory until the optimizer converts it.
+        """
+        try:
+            # Widens e.g. an int32 column of one batch to the int64 of a later one
+            combined = pa.concat_tables(tables, promote_options='permissive')
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            # Batches inferred to incompatible types, e.g. numbers in one and text in another
+            frames = [table.to_pandas() for table in tables]
+            tables.clear()
+            return optimize_dtypes(pd.concat(frames, ignore_index=True))
+        tables.clear()
+        df = combined.to_pandas(self_destruct=True, split_blocks=True, types_mapper=ARROW_STRINGS.get)
+        return optimize_dtypes(df)
+
+
+class DatabaseConnector(PushdownQueryMixin, PooledConnectionMixin, SQLConnector):
     """
     Base class for handling database connections using PandasAI SQLConnector.
     This class provides the common functionality for all database connectors,
@@ -17,6 +406,12 @@ class DatabaseConnector(SQLConnector):
         password (Optional[str]): Database password (None for SQLite).
         table (str): Database table name to interact with.
         where (List[List[Any]]): Optional conditions to filter the query.
+        columns (List[str]): Optional columns to load instead of all of them.
+        limit (Optional[int]): Optional maximum number of rows to load.
+        sample (Optional[float]): Optional percentage of rows to sample on the server.
+        stream (Optional[bool]): Fetch the result in batches through a server-side cursor.
+        batch_size (Optional[int]): Rows fetched per batch when streaming.
+        memory_cap (Optional[int]): Memory the streamed rows may take before fetching stops.
     """
 
     def __init__(
@@ -28,6 +423,12 @@ class DatabaseConnector(SQLConnector):
         password: Optional[str],
         table: str,
         where: Optional[List[List[Any]]] = None,
+        columns: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        sample: Optional[float] = None,
+        stream: Optional[bool] = None,
+        batch_size: Optional[int] = None,
+        memory_cap: Optional[int] = None,
     ) -> None:
         self.host = host
         self.port = port
@@ -35,7 +436,8 @@ class DatabaseConnector(SQLConnector):
         self.username = username
         self.password = password
         self.table = table
-        self.where = where or []
+        self.set_pushdown(columns=columns, where=where, limit=limit, sample=sample)
+        self.set_streaming(stream=stream, batch_size=batch_size, memory_cap=memory_cap)
         # Initialize the parent class with config
         super().__init__(config=self.get_config())
 
@@ -57,20 +459,18 @@ class DatabaseConnector(SQLConnector):
             "username": self.username,
             "password": self.password,
             "table": self.table,
-            "where": self.where,
         }
 
     def connect(self) -> "SQLConnector":
         """
-        Establish a connection to the database using the provided configuration.
+        Check that the database accepts connections with the configured credentials.
 
         Returns:
-            SQLConnector: An initialized instance of SQLConnector.
+            SQLConnector: This connector.
         """
         try:
-            # Attempt to create a connection using the inherited functionality
-            super().__init__(config=self.get_config())
-            return self
+            with self.checkout():
+                return self
         except Exception as e:
             # Log the exception and raise it for further handling
             st.error(f"Failed to establish a connection: {e}")
@@ -97,6 +497,12 @@ class MySQLConnector(DatabaseConnector):
         password: str,
         table: str,
         where: Optional[List[List[Any]]] = None,
+        columns: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        sample: Optional[float] = None,
+        stream: Optional[bool] = None,
+        batch_size: Optional[int] = None,
+        memory_cap: Optional[int] = None,
     ) -> None:
         """
         Initialize a MySQL database connector.
@@ -109,8 +515,16 @@ class MySQLConnector(DatabaseConnector):
             password (str): Password for MySQL connection.
             table (str): The table in the MySQL database to interact with.
             where (Optional[List[List[Any]]]): Optional conditions for filtering data.
+            columns (Optional[List[str]]): Optional columns to load.
+            limit (Optional[int]): Optional maximum number of rows to load.
+            sample (Optional[float]): Optional percentage of rows to sample.
+            stream (Optional[bool]): Fetch the result in batches through a server-side cursor.
+            batch_size (Optional[int]): Rows fetched per batch when streaming.
+            memory_cap (Optional[int]): Memory the streamed rows may take before fetching stops.
         """
-        super().__init__(host, port, database, username, password, table, where=where)
+        super().__init__(host, port, database, username, password, table,
+                         where=where, columns=columns, limit=limit, sample=sample,
+                         stream=stream, batch_size=batch_size, memory_cap=memory_cap)
 
 
 class PostgresConnector(DatabaseConnector):
@@ -131,6 +545,12 @@ class PostgresConnector(DatabaseConnector):
         password: str,
         table: str,
         where: Optional[List[List[Any]]] = None,
+        columns: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        sample: Optional[float] = None,
+        stream: Optional[bool] = None,
+        batch_size: Optional[int] = None,
+        memory_cap: Optional[int] = None,
     ) -> None:
         """
         Initialize a PostgreSQL database connector.
@@ -143,18 +563,441 @@ class PostgresConnector(DatabaseConnector):
             password (str): Password for PostgreSQL connection.
             table (str): The table in the PostgreSQL database to interact with.
             where (Optional[List[List[Any]]]): Optional conditions for filtering data.
+            columns (Optional[List[str]]): Optional columns to load.
+            limit (Optional[int]): Optional maximum number of rows to load.
+            sample (Optional[float]): Optional percentage of rows to sample.
+            stream (Optional[bool]): Fetch the result in batches through a server-side cursor.
+            batch_size (Optional[int]): Rows fetched per batch when streaming.
+            memory_cap (Optional[int]): Memory the streamed rows may take before fetching stops.
         """
-        super().__init__(host, port, database, username, password, table, where=where)
+        super().__init__(host, port, database, username, password, table,
+                         where=where, columns=columns, limit=limit, sample=sample,
+                         stream=stream, batch_size=batch_size, memory_cap=memory_cap)
+
+class SqliteDatabaseConnector(PushdownQueryMixin, PooledConnectionMixin, SqliteConnector):
+    """Connector class for SQLite databases whose engine comes from ENGINE_POOL."""
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        columns: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        sample: Optional[float] = None,
+        stream: Optional[bool] = None,
+        batch_size: Optional[int] = None,
+        memory_cap: Optional[int] = None,
+    ) -> None:
+        """
+        Initialize a SQLite database connector.
+
+        Args:
+            config (Dict[str, Any]): The database, table and optional where conditions.
+            columns (Optional[List[str]]): Optional columns to load.
+            limit (Optional[int]): Optional maximum number of rows to load.
+            sample (Optional[float]): Optional percentage of rows to sample.
+            stream (Optional[bool]): Fetch the result in batches through a server-side cursor.
+            batch_size (Optional[int]): Rows fetched per batch when streaming.
+            memory_cap (Optional[int]): Memory the streamed rows may take before fetching stops.
+        """
+        config = dict(config)
+        self.set_pushdown(columns=columns, where=config.pop('where', None), limit=limit, sample=sample)
+        self.set_streaming(stream=stream, batch_size=batch_size, memory_cap=memory_cap)
+        super().__init__(config=config)
+
+    def _engine_url(self, config: Any) -> URL:
+        return URL.create(config.dialect, database=config.database)
+
+
+def truncate_text(df: pd.DataFrame, max_chars: int) -> pd.DataFrame:
+    """Return a copy of a DataFrame whose text values are cut to max_chars characters."""
+    df = df.copy()
+    for i in range(df.shape[1]):
+        col = df.iloc[:, i]
+        if col.dtype == object or pd.api.types.is_string_dtype(col):
+            df.isetitem(i, col.map(
+                lambda value: value[:max_chars - 3] + '...' if isinstance(value, str) and len(value) > max_chars else value
+            ))
+    return df
+
+
+class TableInfo:
+    """
+    Metadata of one table or view, introspected once and shared by every session.
+
+    Attributes:
+        name (str): The table name.
+        schema (Optional[str]): The schema holding the table, None for the default one.
+        columns (List[Tuple[str, str]]): Column names and SQL types.
+        rows (Optional[int]): Row count, estimated from statistics on MySQL and PostgreSQL.
+    """
+
+    def __init__(self, name: str, schema: Optional[str], columns: List[Tuple[str, str]], rows: Optional[int]) -> None:
+        self.name = name
+        self.schema = schema
+        self.columns = columns
+        self.rows = rows
+        self._sample: Optional[pd.DataFrame] = None
+        self._lock = threading.Lock()
+
+    @property
+    def qualified_name(self) -> str:
+        """The table name, prefixed with its schema when one was given."""
+        return f"{self.schema}.{self.name}" if self.schema else self.name
+
+    def sample(self, engine: Engine) -> pd.DataFrame:
+        """Return the first DB_SCHEMA_SAMPLE_ROWS rows of the table, read on first use."""
+        with self._lock:
+            if self._sample is None:
+                query = select(text('*')).select_from(table(self.name, schema=self.schema)).limit(DB_SCHEMA_SAMPLE_ROWS)
+                with engine.connect() as connection:
+                    self._sample = pd.read_sql(query, connection)
+            return self._sample
+
+
+class SchemaCatalog:
+    """
+    Process-wide cache of the tables and columns of connected databases.
+
+    Listing a warehouse's tables, their columns and row estimates takes a handful of
+    catalog queries; the result is kept per engine and schema for DB_CATALOG_TTL_SECONDS,
+    so reruns and other sessions on the same database skip them.
+    """
+
+    def __init__(self, ttl: float = DB_CATALOG_TTL_SECONDS) -> None:
+        self.ttl = ttl
+        self._entries: Dict[Tuple[EngineKey, Optional[str]], Tuple[List[TableInfo], float]] = {}
+        self._lock = threading.Lock()
+
+    def tables(self, key: EngineKey, engine: Engine, schema: Optional[str] = None) -> List[TableInfo]:
+        """
+        Return the tables of a database schema, introspecting it if needed.
+
+        Args:
+            key (EngineKey): The ENGINE_POOL key of the database.
+            engine (Engine): The database engine.
+            schema (Optional[str]): The schema to list, None for the default one.
+
+        Returns:
+            List[TableInfo]: The tables and views, sorted by name.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((key, schema))
+            if entry is not None and now - entry[1] < self.ttl:
+                return entry[0]
+        tables = self.introspect(engine, schema)
+        with self._lock:
+            self._entries[(key, schema)] = (tables, now)
+        return tables
+
+    def invalidate(self, key: EngineKey) -> None:
+        """Forget the metadata of every schema of a database."""
+        with self._lock:
+            for entry in [entry for entry in self._entries if entry[0] == key]:
+                del self._entries[entry]
+
+    @staticmethod
+    def introspect(engine: Engine, schema: Optional[str] = None) -> List[TableInfo]:
+        """Read the tables, views and columns of a schema from the database catalog."""
+        inspector = inspect_database(engine)
+        # One catalog query for all tables where the dialect supports it
+        columns = inspector.get_multi_columns(schema=schema, kind=ObjectKind.TABLE | ObjectKind.VIEW)
+        rows = SchemaCatalog._row_counts(engine, schema or inspector.default_schema_name,
+                                         [name for _, name in columns])
+        return [
+            TableInfo(name, schema, [(col['name'], SchemaCatalog._type_name(col['type'], engine)) for col in cols],
+                      rows.get(name))
+            for (_, name), cols in sorted(columns.items(), key=lambda item: item[0][1])
+        ]
+
+    @staticmethod
+    def _type_name(sql_type: Any, engine: Engine) -> str:
+        try:
+            return str(sql_type.compile(dialect=engine.dialect))
+        except Exception:
+            return type(sql_type).__name__
+
+    @staticmethod
+    def _row_counts(engine: Engine, schema: Optional[str], names: List[str]) -> Dict[str, int]:
+        """Estimate row counts from table statistics; SQLite has none, so its tables are counted."""
+        dialect = engine.dialect.name
+        try:
+            with engine.connect() as connection:
+                if dialect == 'postgresql':
+                    query = text("SELECT c.relname, c.reltuples::bigint FROM pg_class c "
+                                 "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                                 "WHERE n.nspname = :schema AND c.relkind IN ('r', 'p', 'm')")
+                    counts = connection.execute(query, {'schema': schema}).all()
+                elif dialect == 'mysql':
+                    query = text("SELECT table_name, table_rows FROM information_schema.tables "
+                                 "WHERE table_schema = COALESCE(:schema, DATABASE())")
+                    counts = connection.execute(query, {'schema': schema}).all()
+                elif dialect == 'sqlite':
+                    counts = [(name, connection.execute(select(func.count()).select_from(table(name))).scalar())
+                              for name in names]
+                else:
+                    return {}
+        except Exception:
+            # Estimates are only shown to the LLM; tables without one are still usable
+            return {}
+        # PostgreSQL reports -1 for tables that were never analyzed
+        return {name: int(count) for name, count in counts if count is not None and count >= 0}
+
+
+# Shared by every session of the Streamlit server
+SCHEMA_CATALOG = SchemaCatalog()
+
+
+class LazyTableConnector(PushdownQueryMixin, SQLConnector):
+    """
+    One table of a DatabaseSession, loaded only when generated code uses it.
+
+    The Agent only sees the table's columns, its row estimate and a few sample rows from
+    SCHEMA_CATALOG. PandasAI loads a connector only when the generated code references
+    its ``dfs[<index>]``; the loaded DataFrame is then kept by the session for later
+    questions. The connector holds no connection of its own and borrows one from the
+    session's engine while loading.
+
+    How much of the sample is shown can be reduced with describe(), which the prompt
+    token budget uses for large databases.
+
+    Attributes:
+        session (DatabaseSession): The database session the table belongs to.
+        info (TableInfo): The table's metadata.
+        sample_rows (int): Sample rows shown to the LLM.
+        max_chars (Optional[int]): Longest text value shown in the sample, None for no limit.
+        max_columns (Optional[int]): Columns shown in the sample, None for all of them.
+        cache_ttl (float): Seconds answers about the table stay cached, as its fingerprint
+            does not cover its rows.
+    """
+
+    cache_ttl = DB_RESULT_TTL_SECONDS
+
+    def __init__(self, session: "DatabaseSession", info: TableInfo, sample_rows: int = DB_SCHEMA_SAMPLE_ROWS,
+                 max_chars: Optional[int] = None, max_columns: Optional[int] = None) -> None:
+        self.session = session
+        self.info = info
+        self.sample_rows = sample_rows
+        self.max_chars = max_chars
+        self.max_columns = max_columns
+        self.set_pushdown(limit=session.limit, sample=session.sample)
+        self.set_streaming()
+        super().__init__(config=session.table_config(info.qualified_name))
+
+    def _load_connector_config(self, config: Any) -> Any:
+        if isinstance(config, dict):
+            return SqliteConnectorConfig(**config) if config['dialect'] == 'sqlite' else SQLConnectorConfig(**config)
+        return config
+
+    def _init_connection(self, config: Any) -> None:
+        self._engine = self.session.engine
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the table has been loaded into memory."""
+        return self.info.qualified_name in self.session.frames
+
+    def describe(self, sample_rows: int, max_chars: Optional[int] = None,
+                 max_columns: Optional[int] = None) -> "LazyTableConnector":
+        """Return a connector for the same table that shows less of its sample to the LLM."""
+        return LazyTableConnector(self.session, self.info, sample_rows, max_chars, max_columns)
+
+    @property
+    def column_types(self) -> List[Tuple[str, str]]:
+        """Column names and SQL types, from the catalog."""
+        return self.info.columns
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        A hash of the table's identity and schema, computed without loading it.
+
+        It stays the same when the catalog is re-read, so cached answers survive it;
+        their freshness is bounded by cache_ttl instead.
+        """
+        return fingerprint_options(source=self.session.key, table=self.info.qualified_name,
+                                   columns=self.info.columns, limit=self.limit, sample=self.sample)
+
+    def head(self, n: int = DB_SCHEMA_SAMPLE_ROWS) -> pd.DataFrame:
+        sample = self.info.sample(self._engine).head(min(n, self.sample_rows))
+        if self.max_columns is not None:
+            sample = sample.iloc[:, :self.max_columns]
+        if self.max_chars is not None:
+            sample = truncate_text(sample, self.max_chars)
+        return sample
+
+    @property
+    def rows_count(self) -> Optional[int]:
+        return self.info.rows
+
+    @property
+    def columns_count(self) -> int:
+        return len(self.info.columns)
+
+    @property
+    def column_hash(self) -> str:
+        return self.fingerprint
+
+    def execute(self) -> pd.DataFrame:
+        """
+        Load the table on first use and return it.
+
+        Returns:
+            pd.DataFrame: The table's rows, within the session's limit and sampling.
+        """
+        name = self.info.qualified_name
+        if name not in self.session.frames:
+            self.session.frames[name] = super().execute()
+        return self.session.frames[name]
+
+
+class DatabaseSession:
+    """
+    Every table of a database or schema, exposed to the Agent as lazily loaded connectors.
+
+    The session takes its engine from ENGINE_POOL and the table metadata from
+    SCHEMA_CATALOG; nothing is read from the tables themselves until a question needs
+    them. The row limit and sampling options apply to each table as it is loaded.
+
+    Attributes:
+        schema (Optional[str]): The schema whose tables are used, None for the default one.
+        limit (Optional[int]): Maximum number of rows loaded per table.
+        sample (Optional[float]): Percentage of rows sampled per table.
+        key (EngineKey): The ENGINE_POOL key of the database.
+        tables (List[LazyTableConnector]): One connector per table and view.
+        frames (Dict[str, pd.DataFrame]): The tables loaded so far, by qualified name.
+    """
+
+    def __init__(
+        self,
+        dialect: str,
+        driver: Optional[str],
+        database: str,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        schema: Optional[str] = None,
+        limit: Optional[int] = None,
+        sample: Optional[float] = None,
+    ) -> None:
+        self.config = {"dialect": dialect, "driver": driver, "host": host, "port": port,
+                       "database": database, "username": username, "password": password}
+        self.schema = schema
+        self.limit = limit
+        self.sample = sample
+        self.frames: Dict[str, pd.DataFrame] = {}
+        self.key = ENGINE_POOL.key(dialect, host, port, database, username, password)
+        url = URL.create(f"{dialect}+{driver}" if driver else dialect, username=username, password=password,
+                         host=host, port=port, database=database)
+        self.engine = ENGINE_POOL.acquire(self.key, lambda: create_pooled_engine(url))
+        self._pool_key: Optional[EngineKey] = self.key
+        try:
+            infos = SCHEMA_CATALOG.tables(self.key, self.engine, schema)
+        except Exception:
+            self.release()
+            raise
+        self.tables = [LazyTableConnector(self, info) for info in infos]
+
+    def table_config(self, name: str) -> Dict[str, Any]:
+        """Return the PandasAI connector config of one of the session's tables."""
+        if self.config['dialect'] == 'sqlite':
+            return {"dialect": "sqlite", "database": self.config['database'], "table": name}
+        return {**self.config, "table": name}
+
+    def refresh(self) -> None:
+        """Introspect the database again, e.g. after tables were added."""
+        SCHEMA_CATALOG.invalidate(self.key)
+        self.tables = [LazyTableConnector(self, info)
+                       for info in SCHEMA_CATALOG.tables(self.key, self.engine, self.schema)]
+
+    def release(self, dispose: bool = False) -> None:
+        """
+        Drop the loaded tables and release the engine.
+
+        Args:
+            dispose (bool): Also dispose the engine if no other connector uses it.
+        """
+        self.frames.clear()
+        if self._pool_key is not None:
+            ENGINE_POOL.release(self._pool_key)
+            if dispose:
+                ENGINE_POOL.dispose(self._pool_key)
+            self._pool_key = None
+
+
+# Connector options passed next to the SQLite config rather than inside it
+SQLITE_OPTIONS = ('columns', 'limit', 'sample', 'stream', 'batch_size', 'memory_cap')
+
+
+def is_database_session(config: Dict[str, Any]) -> bool:
+    """Whether credentials ask for a whole database or schema: no table, ``*`` or ``<schema>.*``."""
+    table_name = (config.get('table') or '').strip()
+    return table_name in ('', '*') or table_name.endswith('.*')
+
+
+def open_database_session(db: str, config: Dict[str, Any]) -> DatabaseSession:
+    """
+    Open a session on every table of a database, or of the schema named as ``<schema>.*``.
+
+    Args:
+        db (str): The database type, "MySQL", "SQLite" or "PostgreSQL".
+        config (Dict[str, Any]): The credentials, with the optional row limit and sampling.
+
+    Returns:
+        DatabaseSession: The session, with the table metadata introspected.
+    """
+    table_name = (config.get('table') or '').strip()
+    schema = table_name[:-2] if table_name.endswith('.*') else None
+    options = {'schema': schema, 'limit': config.get('limit'), 'sample': config.get('sample')}
+    if db == 'SQLite':
+        return DatabaseSession('sqlite', None, config['database'], **options)
+    connector_class = {'MySQL': MySQLConnector, 'PostgreSQL': PostgresConnector}[db]
+    return DatabaseSession(connector_class.dialect, connector_class.driver, config['database'],
+                           host=config['host'], port=config['port'], username=config['username'],
+                           password=config['password'], **options)
+
+
+def release_database_connection(dispose: bool = True) -> None:
+    """
+    Release the session's database connector, e.g. when the user switches sources.
+
+    Args:
+        dispose (bool): Also dispose the connector's engine if no other session uses it.
+    """
+    connector = st.session_state.pop('connector', None)
+    st.session_state.pop('connector_key', None)
+    if connector is not None:
+        connector.release(dispose=dispose)
+
 
 def handle_database_connection(credentials: Dict) -> Any:
     """
     Handles the database connection based on the credentials provided.
 
+    The connector is kept in session state and reused on reruns while the credentials
+    stay the same; a connector for different credentials replaces and releases it.
+    Credentials without a table, or with ``*`` or ``<schema>.*`` as table, open a
+    DatabaseSession over every table instead of a single-table connector.
+
     Args:
         credentials (Dict): A dictionary containing the database credentials.
     """
+    key = fingerprint_options(credentials=credentials)
+    if st.session_state.get('connector_key') == key:
+        return st.session_state['connector']
+    release_database_connection()
+
     # Implement the logic to handle the database connection based on the credentials
     for db in credentials:
+        if db in ('MySQL', 'SQLite', 'PostgreSQL') and is_database_session(credentials[db]):
+            try:
+                connector = open_database_session(db, credentials[db])
+                st.success(f"Connected to {db}: {len(connector.tables)} tables, loaded when a question needs them")
+            except Exception as e:
+                st.error(e)
+                st.stop()
+            continue
         match db:
             case 'MySQL':
                 try:
@@ -166,7 +1009,9 @@ def handle_database_connection(credentials: Dict) -> Any:
                     st.stop()
             case 'SQLite':
                 try:
-                    connector = SqliteConnector(config=credentials[db])
+                    options = {key: credentials[db][key] for key in SQLITE_OPTIONS if key in credentials[db]}
+                    config = {key: value for key, value in credentials[db].items() if key not in options}
+                    connector = SqliteDatabaseConnector(config=config, **options)
                     st.success("Connected to SQLite")
                 except Exception as e:
                     st.error(e)
@@ -182,4 +1027,6 @@ def handle_database_connection(credentials: Dict) -> Any:
             case _:
                 st.error("Database not supported")
     st.session_state['is_connected'] = True
+    st.session_state['connector'] = connector
+    st.session_state['connector_key'] = key
     return connector
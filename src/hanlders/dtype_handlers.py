@@ -0,0 +1,106 @@
+# src/hanlders/dtype_handlers.py
+import warnings
+import numpy as np
+import pandas as pd
+from typing import List, Optional
+from utils.contsant import DATETIME_MIN_PARSE_RATIO
+
+# Number of values inspected when guessing whether a text column holds dates
+DATETIME_SAMPLE_SIZE = 1000
+
+
+def optimize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Shrink the memory footprint of a DataFrame after ingestion.
+
+    Integer columns are downcast to int32 when their range allows it, float
+    columns to float32 when that is lossless, text columns that clearly hold dates are
+    parsed as datetimes and the remaining text columns use the Arrow-backed string
+    dtype. Text is never turned into a categorical, so grouping and comparing it in
+    generated code behaves as it did on the original column. Columns with mixed value
+    types are left untouched.
+
+    The memory usage before and after is recorded in ``df.attrs['memory_before']`` and
+    ``df.attrs['memory_after']``.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to optimize.
+
+    Returns:
+        pd.DataFrame: The optimized DataFrame.
+    """
+    memory_before = int(df.memory_usage(deep=True).sum())
+    optimized = df.copy(deep=False)
+    # Positional assignment keeps duplicated column labels intact
+    for i in range(df.shape[1]):
+        optimized.isetitem(i, optimize_series(df.iloc[:, i]))
+    optimized.attrs.setdefault('memory_before', memory_before)
+    optimized.attrs['memory_after'] = int(optimized.memory_usage(deep=True).sum())
+    return optimized
+
+
+def optimize_frames(dfs: List[pd.DataFrame]) -> List[pd.DataFrame]:
+    """Apply optimize_dtypes to every DataFrame of a list."""
+    return [optimize_dtypes(df) for df in dfs]
+
+
+def optimize_series(col: pd.Series) -> pd.Series:
+    """
+    Return a column converted to the most compact dtype that keeps its values.
+
+    Args:
+        col (pd.Series): The column to convert.
+
+    Returns:
+        pd.Series: The converted column, or the original one if nothing applies.
+    """
+    if pd.api.types.is_bool_dtype(col):
+        return col
+    if pd.api.types.is_integer_dtype(col) and not pd.api.types.is_extension_array_dtype(col):
+        # Narrower types than int32 overflow too easily in generated arithmetic
+        info = np.iinfo(np.int32)
+        if col.dtype.itemsize > 4 and (col.empty or (col.min() >= info.min and col.max() <= info.max)):
+            return col.astype(np.int32)
+        return col
+    if pd.api.types.is_float_dtype(col) and not pd.api.types.is_extension_array_dtype(col):
+        downcast = col.astype(np.float32)
+        # float32 only keeps ~7 significant digits; downcast only when nothing is lost
+        if np.array_equal(downcast.to_numpy(dtype=np.float64), col.to_numpy(), equal_nan=True):
+            return downcast
+        return col
+    if isinstance(col.dtype, pd.StringDtype) or (
+            col.dtype == object and pd.api.types.infer_dtype(col, skipna=True) == 'string'):
+        return _optimize_strings(col)
+    return col
+
+
+def _optimize_strings(col: pd.Series) -> pd.Series:
+    """Convert a text column to datetimes or an Arrow-backed string column."""
+    non_null = col.dropna()
+    if non_null.empty:
+        return col
+
+    parsed = _parse_datetimes(col, non_null)
+    if parsed is not None:
+        return parsed
+
+    # Categoricals would be smaller for low-cardinality text, but groupby then returns
+    # unobserved categories and comparisons with unseen values raise
+    return col.astype(pd.StringDtype('pyarrow'))
+
+
+def _parse_datetimes(col: pd.Series, non_null: pd.Series) -> Optional[pd.Series]:
+    """Parse a text column as datetimes if it clearly holds dates, otherwise return None."""
+    sample = non_null.sample(min(len(non_null), DATETIME_SAMPLE_SIZE), random_state=0)
+    # Plain numbers such as years or IDs would otherwise be read as timestamps
+    if sample.str.fullmatch(r'\s*[-+]?\d+(\.\d+)?\s*').any():
+        return None
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        if pd.to_datetime(sample, errors='coerce').notna().mean() < DATETIME_MIN_PARSE_RATIO:
+            return None
+        parsed = pd.to_datetime(col, errors='coerce')
+    # Only convert when no value would be turned into NaT
+    if parsed.notna().sum() != len(non_null):
+        return None
+    return parsed
@@ -0,0 +1,141 @@
+# src/hanlders/duckdb_handlers.py
+import threading
+import duckdb
+import pandas as pd
+import streamlit as st
+from typing import Any, Callable, Dict, List, Optional
+from pandasai.connectors import PandasConnector
+from .storage_handlers import ROOT_DIR
+from utils.contsant import DUCKDB_MEMORY_LIMIT, DUCKDB_TEMP_DIR, DUCKDB_THREADS
+from utils.fingerprint import fingerprint_frames
+
+# Added to the Agent's description so the LLM writes SQL that DuckDB runs
+SQL_ENGINE_DESCRIPTION = (
+    "The dataframes are tables in an embedded DuckDB database, named as in the name attribute "
+    "of each dataframe. Do filtering, joins, aggregations and sorting in DuckDB SQL through "
+    "execute_sql_query, and only use pandas on the (small) query results."
+)
+
+
+def table_name(index: int) -> str:
+    """Return the DuckDB table name of ``dfs[index]``."""
+    return f"df_{index}"
+
+
+class DuckDBEngine:
+    """
+    An embedded DuckDB database over the session's DataFrames.
+
+    Each DataFrame is registered as a view named ``df_<index>`` without copying it.
+    A DataFrame that is a sample of a larger upload is registered as the sample, so
+    SQL sees the same rows as pandas code, the profile and the answer caches. DuckDB
+    runs queries on DUCKDB_THREADS threads and spills to DUCKDB_TEMP_DIR past
+    DUCKDB_MEMORY_LIMIT, so group-bys and joins over large extracts run multi-threaded
+    and out-of-core. Generated SQL cannot reach anything else: external access (files,
+    extensions, attached databases) is disabled and the configuration is locked once
+    the DataFrames are registered.
+
+    Attributes:
+        fingerprint (str): Content fingerprint of the registered DataFrames.
+        tables (List[str]): The registered table names, in the order of the DataFrames.
+    """
+
+    def __init__(self, dfs: List[pd.DataFrame]) -> None:
+        temp_dir = ROOT_DIR.joinpath(DUCKDB_TEMP_DIR)
+        temp_dir.mkdir(parents=True, exist_ok=True)
+        self.fingerprint = fingerprint_frames(dfs)
+        self._connection = duckdb.connect(config={
+            'threads': DUCKDB_THREADS,
+            'memory_limit': DUCKDB_MEMORY_LIMIT,
+            'temp_directory': str(temp_dir),
+            'enable_external_access': False,
+        })
+        # A DuckDB connection must not run two queries at once
+        self._lock = threading.Lock()
+        self.tables = []
+        for i, df in enumerate(dfs):
+            self._connection.register(table_name(i), df)
+            self.tables.append(table_name(i))
+        self._connection.execute("SET lock_configuration = true")
+
+    def execute(self, sql_query: str) -> pd.DataFrame:
+        """
+        Run a query and return its result as a DataFrame.
+
+        Args:
+            sql_query (str): The DuckDB SQL query.
+
+        Returns:
+            pd.DataFrame: The query result.
+        """
+        with self._lock:
+            return self._connection.execute(sql_query).df()
+
+    def close(self) -> None:
+        """Close the database; registered DataFrames are not affected."""
+        self._connection.close()
+
+
+class DuckDBConnector(PandasConnector):
+    """
+    PandasAI connector for a DataFrame registered with a DuckDB engine.
+
+    PandasAI's direct SQL mode sends the LLM's queries to ``execute_direct_sql_query``
+    of the first connector; every connector of a session shares one engine, so
+    queries may join any of the session's tables.
+    """
+
+    def __init__(self, engine: DuckDBEngine, name: str, connector: PandasConnector) -> None:
+        super().__init__({'original_df': connector.pandas_df}, name=name, description=connector.description,
+                         custom_head=connector.custom_head, field_descriptions=connector.field_descriptions)
+        self.engine = engine
+        self.sql_enabled = True
+
+    def enable_sql_query(self, table_name: Optional[str] = None) -> None:
+        # Tables are registered by the engine
+        self.sql_enabled = True
+
+    def execute_direct_sql_query(self, sql_query: str) -> pd.DataFrame:
+        return self.engine.execute(sql_query)
+
+
+def get_sql_engine(dfs: List[pd.DataFrame]) -> DuckDBEngine:
+    """
+    Return the session's DuckDB engine, replacing it when the data changed.
+
+    Args:
+        dfs (List[pd.DataFrame]): The session's DataFrames.
+
+    Returns:
+        DuckDBEngine: The engine with the DataFrames registered.
+    """
+    engine = st.session_state.get('sql_engine')
+    if engine is None or engine.fingerprint != fingerprint_frames(dfs):
+        if engine is not None:
+            engine.close()
+        engine = st.session_state['sql_engine'] = DuckDBEngine(dfs)
+    return engine
+
+
+def sql_connectors(engine: DuckDBEngine, connectors: List[PandasConnector]) -> List[DuckDBConnector]:
+    """Turn the Agent's DataFrame connectors into connectors answered by a DuckDB engine."""
+    return [DuckDBConnector(engine, engine.tables[i], connector) for i, connector in enumerate(connectors)]
+
+
+def sql_functions(dfs: List[Any]) -> Dict[str, Callable[[str], pd.DataFrame]]:
+    """
+    Return the functions generated code may call besides pandas, for replaying it.
+
+    Code written in direct SQL mode calls ``execute_sql_query``; the engine behind it
+    is only started if the code actually calls it.
+
+    Args:
+        dfs (List[Any]): The session's data.
+
+    Returns:
+        Dict[str, Callable[[str], pd.DataFrame]]: The functions by name; empty unless every
+        entry of dfs is a DataFrame.
+    """
+    if not dfs or not all(isinstance(df, pd.DataFrame) for df in dfs):
+        return {}
+    return {'execute_sql_query': lambda sql_query: get_sql_engine(dfs).execute(sql_query)}
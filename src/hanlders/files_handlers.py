@@ -1,61 +1,455 @@
 # src/handlers/file_handlers.py
+import io
+import re
+import shutil
+import pathlib
+import tempfile
+import threading
+import zipfile
+import multiprocessing
+import numpy as np
 import streamlit as st
 import pandas as pd
 from abc import ABC, abstractmethod
-from typing import Any,List,Union
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from xml.etree import ElementTree
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from typing import Any,Callable,Dict,List,Optional,Tuple,Union
+import pyarrow as pa
+from .dtype_handlers import optimize_frames
+from .sampling_handlers import reservoir_update
+from .storage_handlers import COLUMNAR_CACHE, ColumnarCache
+from utils.contsant import (INGESTION_CACHE_MAX_BYTES, INGESTION_CACHE_MAX_ENTRIES, INGESTION_MAX_WORKERS,
+                            CSV_CHUNK_ROWS, CSV_MEMORY_BUDGET_BYTES, CSV_BUDGET_POLICY,
+                            EXCEL_ENGINE, EXCEL_MAX_WORKERS, EXCEL_PARALLEL_MIN_BYTES,
+                            FILE_BACKEND, POLARS_INFER_SCHEMA_ROWS)
+from utils.fingerprint import fingerprint_file, fingerprint_options
+
+FILE_BACKENDS = ('pandas', 'polars')
+
+
+def import_polars() -> Any:
+    """Import Polars, which is only needed by the "polars" file backend."""
+    try:
+        import polars
+    except ImportError as e:
+        raise ValueError("The polars backend requires the polars package (1.1 or newer)") from e
+    return polars
+
+
+def like_pattern(value: Any) -> str:
+    """Translate a SQL LIKE pattern into an anchored regular expression."""
+    return '(?s)^' + re.escape(str(value)).replace('%', '.*').replace('_', '.') + '$'
+
+
+def _as_list(value: Any) -> list:
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+# Comparisons shared by Polars expressions and pandas Series
+_COMPARISONS: Dict[str, Callable[[Any, Any], Any]] = {
+    '=': lambda col, value: col == value,
+    '!=': lambda col, value: col != value,
+    '<>': lambda col, value: col != value,
+    '<': lambda col, value: col < value,
+    '<=': lambda col, value: col <= value,
+    '>': lambda col, value: col > value,
+    '>=': lambda col, value: col >= value,
+}
+
+# Load option filters (see database_hanlders.FILTER_OPERATORS) as Polars expressions
+POLARS_FILTERS: Dict[str, Callable[[Any, Any], Any]] = {
+    **_COMPARISONS,
+    'LIKE': lambda col, value: col.str.contains(like_pattern(value)),
+    'NOT LIKE': lambda col, value: ~col.str.contains(like_pattern(value)),
+    'IN': lambda col, value: col.is_in(_as_list(value)),
+    'NOT IN': lambda col, value: ~col.is_in(_as_list(value)),
+    'IS NULL': lambda col, value: col.is_null(),
+    'IS NOT NULL': lambda col, value: col.is_not_null(),
+}
+
+# The same filters as pandas boolean masks; missing values never match, as in SQL
+PANDAS_FILTERS: Dict[str, Callable[[Any, Any], Any]] = {
+    **_COMPARISONS,
+    'LIKE': lambda col, value: col.astype('string').str.contains(like_pattern(value), na=False),
+    'NOT LIKE': lambda col, value: ~col.astype('string').str.contains(like_pattern(value), na=True),
+    'IN': lambda col, value: col.isin(_as_list(value)),
+    'NOT IN': lambda col, value: ~col.isin(_as_list(value)) & col.notna(),
+    'IS NULL': lambda col, value: col.isna(),
+    'IS NOT NULL': lambda col, value: col.notna(),
+}
+
 
 class BaseFileHandler(ABC):
-    """Base class for handling different file types."""
+    """
+    Base class for handling different file types.
+
+    Attributes:
+        backend (str): "pandas" or "polars", the library that parses the files.
+    """
 
-    def __init__(self, files) -> None:
+    def __init__(self, files, columnar_cache: Optional[ColumnarCache] = COLUMNAR_CACHE,
+                 backend: str = FILE_BACKEND) -> None:
+        if backend not in FILE_BACKENDS:
+            raise ValueError(f"Unknown file backend: {backend}")
         self.files = files
+        self.columnar_cache = columnar_cache
+        self.backend = backend
 
     @abstractmethod
     def read(self) -> pd.DataFrame:
         """Read the file and return a DataFrame."""
         pass
-class CSVFileHandler(BaseFileHandler):
-    """Class for handling CSV files."""
+
+    def read_cached(self, file: Any, parse: Callable[[], List[pd.DataFrame]], **options: Any) -> List[pd.DataFrame]:
+        """
+        Return the DataFrames of a file from the columnar cache, parsing it on a miss.
+
+        Freshly parsed DataFrames go through the dtype optimizer before they are cached.
+
+        Args:
+            file (Any): The uploaded file.
+            parse (Callable[[], List[pd.DataFrame]]): Parses the file when it is not cached.
+            **options (Any): Reader options that change the parsed result.
+
+        Returns:
+            List[pd.DataFrame]: The parsed DataFrames.
+        """
+        if self.columnar_cache is None:
+            return optimize_frames(parse())
+        key = self.columnar_cache.key(file, reader=type(self).__name__, backend=self.backend, **options)
+        dfs = self.columnar_cache.load(key)
+        if dfs is None:
+            dfs = optimize_frames(parse())
+            # Samples of over-budget files are not cached, so a later load with a
+            # larger budget is not silently served the sample
+            if not any('total_rows' in df.attrs for df in dfs):
+                self.columnar_cache.save(key, dfs)
+        return dfs
+class DelimitedFileHandler(BaseFileHandler):
+    """
+    Base class for delimiter-separated text files.
+
+    Files are read in fixed-size row chunks so that a single oversized upload cannot
+    exhaust the server's memory. Once the chunks held in memory exceed the memory
+    budget, the rest of the file is streamed through a uniform reservoir sample of the
+    rows that fit in the budget; with the "spill" policy the full dataset is also
+    written to the columnar cache.
+
+    With the "polars" backend the file is scanned lazily by Polars' multi-threaded
+    reader instead: only the selected columns are parsed and the filters are applied
+    while scanning, so rows and columns left out never reach memory. The result stays
+    in Arrow memory until it is converted to pandas once, for the Agent.
+
+    Attributes:
+        sep (str): The field delimiter.
+        label (str): The file type shown in error messages.
+        chunk_rows (Optional[int]): Rows per chunk, or None to read each file in one shot.
+        memory_budget (int): Maximum memory of the rows held for one file.
+        on_budget (str): "sample" or "spill", applied when the budget is exceeded.
+        columns (List[str]): Columns to load; empty loads every column.
+        where (List[list]): ``[column, operator, value]`` filters rows must match, see POLARS_FILTERS.
+        limit (Optional[int]): Maximum number of matching rows loaded.
+    """
+
+    sep = ','
+    label = 'CSV'
+
+    def __init__(self, files, columnar_cache: Optional[ColumnarCache] = COLUMNAR_CACHE,
+                 chunk_rows: Optional[int] = CSV_CHUNK_ROWS,
+                 memory_budget: int = CSV_MEMORY_BUDGET_BYTES,
+                 on_budget: str = CSV_BUDGET_POLICY,
+                 backend: str = FILE_BACKEND,
+                 columns: Optional[List[str]] = None,
+                 where: Optional[List[list]] = None,
+                 limit: Optional[int] = None) -> None:
+        if on_budget not in ('sample', 'spill'):
+            raise ValueError(f"Unknown memory budget policy: {on_budget}")
+        for condition in where or []:
+            if len(condition) not in (2, 3) or str(condition[1]).upper() not in POLARS_FILTERS:
+                raise ValueError(f"Invalid filter: {condition}")
+        super().__init__(files, columnar_cache=columnar_cache, backend=backend)
+        self.chunk_rows = chunk_rows
+        self.memory_budget = memory_budget
+        self.on_budget = on_budget
+        self.columns = list(columns or [])
+        self.where = [[col, str(op).upper(), *value] for col, op, *value in where or []]
+        self.limit = limit or None
 
     def read(self) -> List[pd.DataFrame]:
-        """Read the CSV file(s) and return a list of DataFrames."""
+        """Read the delimited file(s) and return a list of DataFrames."""
         all_dfs = []
         for file in self.files:
             if file is None or file.size == 0:
                 st.warning(f"File {file.name} is empty. Skipping.")
                 continue
             try:
-                df = pd.read_csv(file)
+                df = self.read_cached(file, lambda: [self.parse(file)], sep=self.sep,
+                                      chunk_rows=self.chunk_rows, memory_budget=self.memory_budget,
+                                      columns=self.columns, where=self.where, limit=self.limit)[0]
                 all_dfs.append(df)
-                st.session_state['data_frames'] = all_dfs  # Store DataFrames in session state
             except ValueError as e:
-                st.error(f"Error reading CSV file '{file.name}': {e}")
+                st.error(f"Error reading {self.label} file '{file.name}': {e}")
             except Exception as e:
                 st.error(f"Unexpected error reading file '{file.name}': {e}")
         return all_dfs
 
-class TSVFileHandler(BaseFileHandler):
-    """Class for handling TSV files."""
+    def parse(self, file: Any) -> pd.DataFrame:
+        """
+        Parse a single file, streaming it in chunks when chunk_rows is set.
 
-    def read(self) -> List[pd.DataFrame]:
-        """Read the CSV file(s) and return a list of DataFrames."""
-        all_dfs = []
-        for file in self.files:
-            if file is None or file.size == 0:
-                st.warning(f"File {file.name} is empty. Skipping.")
-                continue
+        Args:
+            file (Any): The uploaded file.
+
+        Returns:
+            pd.DataFrame: The full file, or a uniform random sample of its rows if it does not fit in the memory budget.
+        """
+        if self.backend == 'polars':
+            return self.parse_polars(file)
+        usecols = self._usecols()
+        if not self.chunk_rows:
+            return self._limit(self._filter(pd.read_csv(file, sep=self.sep, usecols=usecols, nrows=self._nrows())))
+
+        file.seek(0)
+        progress = st.progress(0.0, text=f"Reading {file.name}...")
+        chunks, held, rows_seen = [], 0, 0
+        sample, spill = None, None
+        rng = np.random.default_rng()
+        try:
+            for chunk in pd.read_csv(file, sep=self.sep, chunksize=self.chunk_rows, usecols=usecols,
+                                     nrows=self._nrows()):
+                chunk = self._filter(chunk)
+                if self.limit and rows_seen + len(chunk) >= self.limit:
+                    chunk = chunk.iloc[:self.limit - rows_seen]
+                if spill is not None:
+                    spill = self._spill(spill, chunk)
+                if sample is None:
+                    chunks.append(chunk)
+                    held += int(chunk.memory_usage(deep=True).sum())
+                    if held > self.memory_budget:
+                        # Over budget: keep as many rows as fit in it and sample the rest
+                        sample = pd.concat(chunks, ignore_index=True)
+                        capacity = max(1, int(len(sample) * self.memory_budget / held))
+                        sample = sample.sample(n=capacity, random_state=rng.integers(2 ** 32)).reset_index(drop=True)
+                        if self.on_budget == 'spill':
+                            spill = self.columnar_cache.writer(self._spill_key(file)) \
+                                if self.columnar_cache is not None else None
+                            for held_chunk in chunks:
+                                spill = self._spill(spill, held_chunk)
+                        chunks = []
+                else:
+                    sample = reservoir_update(sample, chunk, rows_seen, rng)
+                rows_seen += len(chunk)
+                done = min(1.0, file.tell() / file.size) if file.size else 1.0
+                progress.progress(done, text=f"Reading {file.name}: {rows_seen:,} rows")
+                if self.limit and rows_seen >= self.limit:
+                    break
+        except BaseException:
+            if spill is not None:
+                spill.abort()
+            raise
+        finally:
+            progress.empty()
+
+        if sample is None:
+            if chunks:
+                return pd.concat(chunks, ignore_index=True)
+            file.seek(0)
+            return self._filter(pd.read_csv(file, sep=self.sep, usecols=usecols, nrows=0))
+        return self._sampled(file, sample, spill, rows_seen)
+
+    def parse_polars(self, file: Any) -> pd.DataFrame:
+        """
+        Parse a single file with Polars, pushing the load options down into the scan.
+
+        The scan is streamed into an uncompressed Arrow file on disk, so the matching
+        rows never have to fit in memory. That file is memory-mapped and only loaded when
+        it fits in the memory budget; otherwise a uniform random sample of its rows is
+        taken, and with the "spill" policy the file itself becomes the spilled dataset.
+
+        Args:
+            file (Any): The uploaded file.
+
+        Returns:
+            pd.DataFrame: The matching rows, or a uniform random sample of them if they do not fit in the memory budget.
+        """
+        pl = import_polars()
+        if self.columnar_cache is not None:
+            spill = self.columnar_cache.writer(self._spill_key(file))
+            target, discard = spill.file, spill.abort
+        else:
+            spill, staging = None, tempfile.mkdtemp(prefix='deltax-')
+            target, discard = pathlib.Path(staging).joinpath('0.arrow'), lambda: shutil.rmtree(staging, ignore_errors=True)
+        try:
+            file.seek(0)
+            with st.spinner(f"Reading {file.name} with Polars..."):
+                try:
+                    scan_delimited(pl, file, self.sep, self.columns, self.where, self.limit).sink_ipc(
+                        target, compression=None, compat_level=pl.CompatLevel.oldest())
+                except pl.exceptions.PolarsError as e:
+                    # e.g. a filter on a missing column, or comparing a number column with text
+                    raise ValueError(f"Could not read the file with these load options: {e}") from e
+            table = ColumnarCache.read_table(target)
+            if table.nbytes <= self.memory_budget:
+                df = table.to_pandas()
+                discard()
+                return df
+
+            rows_seen = table.num_rows
+            capacity = max(1, int(rows_seen * self.memory_budget / table.nbytes))
+            # Only the pages of the sampled rows are read from the memory-mapped file
+            rows = np.sort(np.random.default_rng().choice(rows_seen, size=capacity, replace=False))
+            sample = table.take(rows).to_pandas(split_blocks=True, self_destruct=True)
+        except BaseException:
+            discard()
+            raise
+        del table
+        if self.on_budget != 'spill' or spill is None:
+            # Without a columnar cache the full dataset has nowhere to be kept
+            discard()
+            spill = None
+        return self._sampled(file, sample, spill, rows_seen)
+
+    def _sampled(self, file: Any, sample: pd.DataFrame, spill: Any, rows_seen: int) -> pd.DataFrame:
+        """Warn that a file was sampled and record where its full data was spilled, if anywhere."""
+        message = (f"'{file.name}' has {rows_seen:,} rows and exceeds the memory budget; "
+                   f"working with a random sample of {len(sample):,} rows.")
+        if spill is not None:
+            sample.attrs['spill_path'] = str(spill.commit())
+            message += " The full dataset was saved to the columnar cache."
+        st.warning(message)
+        sample.attrs['total_rows'] = rows_seen
+        return sample
+
+    def _spill_key(self, file: Any) -> str:
+        """Cache key of the full dataset spilled for a file read with these options."""
+        options = self.columnar_cache.key(file, reader=type(self).__name__, sep=self.sep, backend=self.backend,
+                                          columns=self.columns, where=self.where, limit=self.limit)
+        return f"{options}-full"
+
+    def _nrows(self) -> Optional[int]:
+        # Without filters the row limit can be handed to the reader
+        return self.limit if self.limit and not self.where else None
+
+    def _usecols(self) -> Optional[List[str]]:
+        """Columns to parse: the selected ones and the ones the filters read, None for all of them."""
+        if not self.columns:
+            return None
+        return list(dict.fromkeys(self.columns + [col for col, *_ in self.where]))
+
+    def _filter(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Keep the rows of a chunk that match every filter, and only the selected columns.
+
+        Raises:
+            ValueError: If a filter column is missing or its values cannot be compared with the filter's.
+        """
+        if not self.where:
+            return df
+        mask = np.ones(len(df), dtype=bool)
+        for col, op, *value in self.where:
+            if col not in df.columns:
+                raise ValueError(f"Filter column '{col}' is not in the file")
             try:
-                df = pd.read_csv(file, sep='\t')
-                all_dfs.append(df)
-                st.session_state['data_frames'] = all_dfs # Store DataFrames in session state
-            except ValueError as e:
-                st.error(f"Error reading CSV file '{file.name}': {e}")
-            except Exception as e:
-                st.error(f"Unexpected error reading file '{file.name}': {e}")
-        return all_dfs
+                mask &= np.asarray(PANDAS_FILTERS[op](df[col], value[0] if value else None), dtype=bool)
+            except TypeError as e:
+                raise ValueError(f"Cannot apply the filter {col} {op} {value[0] if value else ''}: {e}") from e
+        df = df[mask]
+        if self.columns:
+            # Columns parsed only for the filters
+            df = df.drop(columns=[col for col in df.columns if col not in self.columns])
+        return df
+
+    def _limit(self, df: pd.DataFrame) -> pd.DataFrame:
+        return df.iloc[:self.limit] if self.limit else df
+
+    def _spill(self, spill: Any, chunk: pd.DataFrame) -> Any:
+        """Append a chunk to the spill file, abandoning the spill if its schema drifts."""
+        if spill is None:
+            return None
+        try:
+            spill.write(chunk)
+            return spill
+        except pa.ArrowException as e:
+            st.warning(f"Could not spill the full dataset to disk: {e}")
+            spill.abort()
+            return None
+
+
+def scan_delimited(pl: Any, source: Any, sep: str, columns: Optional[List[str]] = None,
+                   where: Optional[List[list]] = None, limit: Optional[int] = None) -> Any:
+    """
+    Build a lazy Polars scan of a delimited file with the load options pushed down.
+
+    Only the selected columns are parsed, rows are filtered while the file is scanned
+    and the scan stops once ``limit`` matching rows were found.
+
+    Args:
+        pl (Any): The polars module.
+        source (Any): A path or binary file-like object.
+        sep (str): The field delimiter.
+        columns (Optional[List[str]]): Columns to load; None or empty loads every column.
+        where (Optional[List[list]]): ``[column, operator, value]`` filters, see POLARS_FILTERS.
+        limit (Optional[int]): Maximum number of rows.
+
+    Returns:
+        Any: The ``pl.LazyFrame``; nothing is read until it is collected.
+    """
+    frame = pl.scan_csv(source, separator=sep, infer_schema_length=POLARS_INFER_SCHEMA_ROWS)
+    if where:
+        frame = frame.filter(*[POLARS_FILTERS[str(op).upper()](pl.col(col), value[0] if value else None)
+                               for col, op, *value in where])
+    if columns:
+        frame = frame.select(columns)
+    if limit:
+        frame = frame.head(limit)
+    return frame
+
+
+def to_pandas(pl: Any, data: Any) -> pd.DataFrame:
+    """
+    Convert a Polars DataFrame to pandas through Arrow.
+
+    Numeric and boolean columns without missing values are handed over without copying
+    the data; text columns are converted once and then shrunk by the dtype optimizer.
+    """
+    return data.to_arrow(compat_level=pl.CompatLevel.oldest()).to_pandas(split_blocks=True, self_destruct=True)
+
+
+class CSVFileHandler(DelimitedFileHandler):
+    """Class for handling CSV files."""
+
+    sep = ','
+    label = 'CSV'
+
+
+class TSVFileHandler(DelimitedFileHandler):
+    """Class for handling TSV files."""
+
+    sep = '\t'
+    label = 'TSV'
 
 class ExcelFileHandler(BaseFileHandler):
-    """Class for handling Excel files."""
+    """
+    Class for handling Excel files.
+
+    With the "polars" backend every selected sheet is read in one ``pl.read_excel`` call
+    on Polars' calamine-based reader, and the engine and worker settings are not used.
+
+    Attributes:
+        engine (str): "openpyxl" or "calamine", see WorkbookLoader.
+        max_workers (int): Maximum number of sheets read at the same time.
+        sheets (List[str]): The sheets to read; empty reads every sheet.
+    """
+
+    def __init__(self, files, columnar_cache: Optional[ColumnarCache] = COLUMNAR_CACHE,
+                 engine: str = EXCEL_ENGINE, max_workers: int = EXCEL_MAX_WORKERS,
+                 backend: str = FILE_BACKEND, sheets: Optional[List[str]] = None) -> None:
+        super().__init__(files, columnar_cache=columnar_cache, backend=backend)
+        self.engine = engine
+        self.max_workers = max_workers
+        self.sheets = list(sheets or [])
 
     def read(self) -> List[pd.DataFrame]:
         """Read selected sheets from the Excel file and return a list of DataFrames."""
@@ -67,41 +461,261 @@ class ExcelFileHandler(BaseFileHandler):
             return all_dfs  # Return empty if no valid file
 
         try:
-            # Open the Excel file
-            xls = pd.ExcelFile(file)
-            sheet_names = xls.sheet_names
-            # Get selected sheets from session state or default to all sheets
-            selected_sheets = st.session_state.get('selected_sheets', [])
-
-            # Check if sheets have been selected
-            if not selected_sheets:
-                selected_sheets = st.multiselect("Select Sheets to Read", sheet_names, default=sheet_names)
-                st.session_state['selected_sheets'] = selected_sheets  # Store the selected sheets in session state
+            # The sheets are chosen on the script thread, see file_reader; default to all of them
+            selected_sheets = self.sheets or list_sheet_names(file)
 
             st.write(f"Selected Sheets: {selected_sheets}")
 
             # Read the selected sheets and append to all_dfs
-            for sheet_name in selected_sheets:
-                df = pd.read_excel(xls, sheet_name=sheet_name,engine='openpyxl')
-                all_dfs.append(df)
-
-            # Store the DataFrames in session state
-            st.session_state['data_frames'] = all_dfs
+            if self.backend == 'polars':
+                parse = lambda: read_sheets_polars(file.getvalue(), selected_sheets)
+            else:
+                loader = WorkbookLoader(file, engine=self.engine)
+                parse = lambda: loader.read_sheets(selected_sheets, max_workers=self.max_workers)
+            all_dfs = self.read_cached(file, parse, sheets=list(selected_sheets))
 
         except Exception as e:
             st.error(f"Error reading Excel file '{file.name}': {e}")
         
         return all_dfs
 
-def handle_uploaded_files(uploaded_files: Union[List[Any], Any]) -> List[pd.DataFrame]:
+
+class WorkbookLoader:
+    """
+    Reads several sheets of one uploaded workbook through a single opened handle.
+
+    With the "openpyxl" engine the workbook is opened once as a ``pd.ExcelFile`` and
+    every sheet is read from that handle. The "calamine" engine uses the Rust-based
+    python-calamine reader, which streams cell values without building openpyxl's
+    cell objects and is several times faster on large workbooks. Large workbooks are
+    read concurrently by a pool of worker processes that each open the workbook once.
+
+    Attributes:
+        data (bytes): The raw workbook content.
+        engine (str): "openpyxl" or "calamine".
+    """
+
+    ENGINES = ('openpyxl', 'calamine')
+
+    def __init__(self, file: Any, engine: str = EXCEL_ENGINE) -> None:
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown Excel engine: {engine}")
+        self.data = file.getvalue()
+        self.engine = engine
+        self._handle = None
+
+    def open(self) -> Any:
+        """Open the workbook on first use and return the shared handle."""
+        if self._handle is None:
+            self._handle = open_workbook(self.data, self.engine)
+        return self._handle
+
+    def read_sheets(self, sheets: List[str], max_workers: int = EXCEL_MAX_WORKERS) -> List[pd.DataFrame]:
+        """
+        Read the given sheets, concurrently when the workbook is large enough to benefit.
+
+        Args:
+            sheets (List[str]): Names of the sheets to read.
+            max_workers (int): Maximum number of worker processes. 1 reads the sheets in-process.
+
+        Returns:
+            List[pd.DataFrame]: One DataFrame per sheet, in the order of sheets.
+        """
+        workers = min(max_workers, len(sheets))
+        if workers <= 1 or len(self.data) < EXCEL_PARALLEL_MIN_BYTES:
+            handle = self.open()
+            return [read_sheet(handle, sheet, self.engine) for sheet in sheets]
+
+        # Spawned workers avoid forking the multi-threaded Streamlit server
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_sheet_worker, initargs=(self.data, self.engine)) as executor:
+            return list(executor.map(_read_sheet_in_worker, sheets))
+
+
+def open_workbook(data: bytes, engine: str) -> Any:
+    """
+    Open a workbook from its raw bytes with the given engine.
+
+    Args:
+        data (bytes): The raw workbook content.
+        engine (str): "openpyxl" or "calamine".
+
+    Returns:
+        Any: A ``pd.ExcelFile`` or a ``python_calamine.CalamineWorkbook``.
+    """
+    if engine == 'calamine':
+        try:
+            from python_calamine import CalamineWorkbook
+        except ImportError as e:
+            raise ValueError("The calamine engine requires the python-calamine package") from e
+        return CalamineWorkbook.from_filelike(io.BytesIO(data))
+    # Legacy .xls files are not zip archives and need pandas' default (xlrd) engine
+    return pd.ExcelFile(io.BytesIO(data), engine='openpyxl' if zipfile.is_zipfile(io.BytesIO(data)) else None)
+
+
+def read_sheet(handle: Any, sheet: str, engine: str) -> pd.DataFrame:
+    """Read one sheet from a workbook opened by open_workbook, using its first row as the header."""
+    if engine == 'calamine':
+        rows = handle.get_sheet_by_name(sheet).to_python(skip_empty_area=True)
+        if not rows:
+            return pd.DataFrame()
+        return pd.DataFrame(rows[1:], columns=rows[0])
+    return pd.read_excel(handle, sheet_name=sheet)
+
+
+def read_sheets_polars(data: bytes, sheets: List[str]) -> List[pd.DataFrame]:
+    """
+    Read the given sheets of a workbook with Polars, using each sheet's first row as the header.
+
+    Args:
+        data (bytes): The raw workbook content.
+        sheets (List[str]): Names of the sheets to read.
+
+    Returns:
+        List[pd.DataFrame]: One DataFrame per sheet, in the order of sheets.
+    """
+    if not sheets:
+        return []
+    pl = import_polars()
+    try:
+        frames = pl.read_excel(io.BytesIO(data), sheet_name=list(sheets))
+    except ImportError as e:
+        raise ValueError("Reading Excel files with the polars backend requires the fastexcel package") from e
+    return [to_pandas(pl, frames[sheet]) for sheet in sheets]
+
+
+# Workbook opened once per worker process by _init_sheet_worker
+_WORKER_WORKBOOK = None
+_WORKER_ENGINE = None
+
+
+def _init_sheet_worker(data: bytes, engine: str) -> None:
+    global _WORKER_WORKBOOK, _WORKER_ENGINE
+    _WORKER_WORKBOOK = open_workbook(data, engine)
+    _WORKER_ENGINE = engine
+
+
+def _read_sheet_in_worker(sheet: str) -> pd.DataFrame:
+    return read_sheet(_WORKER_WORKBOOK, sheet, _WORKER_ENGINE)
+
+
+# Sheet names of recent uploads, keyed by content fingerprint
+_SHEET_NAMES: "OrderedDict[str, List[str]]" = OrderedDict()
+
+
+def list_sheet_names(file: Any) -> List[str]:
+    """
+    Return the sheet names of an uploaded workbook without parsing any cell data.
+
+    For .xlsx files only the small ``xl/workbook.xml`` part of the archive is read;
+    legacy .xls files fall back to pandas. Results are memoised by content fingerprint
+    so reruns do not reopen the workbook.
+
+    Args:
+        file (Any): The uploaded workbook.
+
+    Returns:
+        List[str]: The sheet names in workbook order.
+    """
+    key = fingerprint_file(file)
+    if key in _SHEET_NAMES:
+        _SHEET_NAMES.move_to_end(key)
+        return _SHEET_NAMES[key]
+
+    data = io.BytesIO(file.getvalue())
+    if zipfile.is_zipfile(data):
+        with zipfile.ZipFile(data) as archive:
+            root = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+        namespace = root.tag.split('}')[0] + '}' if root.tag.startswith('{') else ''
+        sheet_names = [sheet.get('name') for sheet in root.iter(f'{namespace}sheet')]
+    else:
+        sheet_names = pd.ExcelFile(data).sheet_names
+
+    _SHEET_NAMES[key] = sheet_names
+    if len(_SHEET_NAMES) > INGESTION_CACHE_MAX_ENTRIES:
+        _SHEET_NAMES.popitem(last=False)
+    return sheet_names
+
+class IngestionCache:
+    """
+    Size-bounded LRU cache of parsed uploads.
+
+    Entries are keyed by the content hash of an upload plus the reader options used to
+    parse it, so a Streamlit rerun with the same upload returns the already-parsed
+    DataFrames instead of parsing the file again. The least recently used entries are
+    evicted once either the entry count or the total DataFrame memory exceeds its limit.
+
+    Attributes:
+        max_bytes (int): Maximum total memory of the cached DataFrames.
+        max_entries (int): Maximum number of cached uploads.
+    """
+
+    def __init__(self, max_bytes: int = INGESTION_CACHE_MAX_BYTES,
+                 max_entries: int = INGESTION_CACHE_MAX_ENTRIES) -> None:
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[List[pd.DataFrame], int]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(file: Any, **options: Any) -> Tuple[str, str]:
+        """Build the cache key for an upload and the options used to read it."""
+        return fingerprint_file(file), fingerprint_options(**options)
+
+    def get(self, key: Tuple[str, str]) -> Optional[List[pd.DataFrame]]:
+        """
+        Return the cached DataFrames for a key, or None on a miss.
+
+        Shallow copies are returned so that in-place changes made by generated code
+        (dropping or adding columns) do not leak back into the cache.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return [df.copy(deep=False) for df in entry[0]]
+
+    def put(self, key: Tuple[str, str], dfs: List[pd.DataFrame]) -> None:
+        """Store parsed DataFrames under a key and evict old entries if over budget."""
+        size = sum(int(df.memory_usage(deep=True).sum()) for df in dfs)
+        if size > self.max_bytes:
+            # A single upload larger than the whole budget is never worth caching
+            return
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[1]
+            self._entries[key] = ([df.copy(deep=False) for df in dfs], size)
+            self._size += size
+            while self._entries and (self._size > self.max_bytes or len(self._entries) > self.max_entries):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+    def clear(self) -> None:
+        """Drop every cached upload."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+# Process-wide cache shared by every session; keys are content hashes so sessions
+# uploading the same file share the parsed result.
+INGESTION_CACHE = IngestionCache()
+
+
+def handle_uploaded_files(uploaded_files: Union[List[Any], Any], max_workers: int = INGESTION_MAX_WORKERS) -> List[pd.DataFrame]:
     """
     Process the uploaded files and return a list of DataFrames.
     
     Handles both single and multiple file uploads, determining file type
-    and passing each file to the appropriate handler.
+    and passing each file to the appropriate handler. Multiple files are
+    parsed concurrently on a bounded thread pool; the returned DataFrames
+    keep the order of the uploaded files.
 
     Parameters:
         uploaded_files (Union[List[Any], Any]): List of uploaded files or a single file object.
+        max_workers (int): Maximum number of files parsed at the same time. 1 parses them one by one.
 
     Returns:
         List[pd.DataFrame]: A list of DataFrames generated from the uploaded files.
@@ -113,19 +727,56 @@ def handle_uploaded_files(uploaded_files: Union[List[Any], Any]) -> List[pd.Data
         if isinstance(uploaded_files, list):
             for file in uploaded_files:
                 st.write(f"Uploaded file: {file.name}")
-                # Process each file based on its type
-                dfs.extend(handle_file(file))
+            # Process each file based on its type
+            if max_workers > 1 and len(uploaded_files) > 1:
+                results = handle_files_concurrently(uploaded_files, max_workers)
+            else:
+                results = [handle_file(file) for file in uploaded_files]
+            for file_dfs in results:
+                dfs.extend(file_dfs)
         
         # If a single file is uploaded
         elif uploaded_files is not None:
             # Process the single file
             dfs = handle_file(uploaded_files)
+        st.session_state['data_frames'] = dfs
     except Exception as e:
         st.error(f"An error occurred while processing the files: {e}")
     
     return dfs
 
 
+def handle_files_concurrently(files: List[Any], max_workers: int) -> List[List[pd.DataFrame]]:
+    """
+    Parse several files on a bounded thread pool.
+
+    The handler and options of every file, including the Excel sheets, are chosen from
+    the session on the script thread before any worker starts; the workers only parse
+    and return their DataFrames, which the caller merges. They are attached to the
+    current Streamlit script run, so the per-file st.warning/st.error messages raised
+    by the handlers still reach the page.
+
+    Parameters:
+        files (List[Any]): The uploaded files.
+        max_workers (int): Maximum number of worker threads.
+
+    Returns:
+        List[List[pd.DataFrame]]: The DataFrames of each file, in the order of files.
+    """
+    readers = [file_reader(file) for file in files]
+    ctx = get_script_run_ctx()
+
+    def attach_context() -> None:
+        add_script_run_ctx(threading.current_thread(), ctx)
+
+    def read(file: Any, reader: Optional[Tuple[type, Dict[str, Any]]]) -> List[pd.DataFrame]:
+        return read_file(file, *reader) if reader is not None else []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(files)), initializer=attach_context) as executor:
+        # map yields results in submission order, whatever order the files finish in
+        return list(executor.map(read, files, readers))
+
+
 def handle_file(file: Any) -> List[pd.DataFrame]:
     """
     Handle an individual file by determining its type and reading it using the appropriate handler.
@@ -136,28 +787,66 @@ def handle_file(file: Any) -> List[pd.DataFrame]:
     Returns:
         List[pd.DataFrame]: A list of DataFrames containing the file data.
     """
-    try:
-        # Handle CSV file
-        if file.name.endswith('.csv'):
-            handler = CSVFileHandler([file])
-            dfs = handler.read()
+    reader = file_reader(file)
+    return read_file(file, *reader) if reader is not None else []
 
-        # Handle TSV file
-        elif file.name.endswith('.tsv'):
-            handler = TSVFileHandler([file])
-            dfs = handler.read()
 
-        # Handle Excel file (XLSX)
-        elif file.name.endswith(('.xlsx', '.xls')):
-            handler = ExcelFileHandler([file])
-            dfs = handler.read()
+def file_reader(file: Any) -> Optional[Tuple[type, Dict[str, Any]]]:
+    """
+    Choose the handler class and the options to read a file with, from the session's settings.
 
-        else:
-            st.error("Unsupported file type. Please upload a CSV, TSV, or XLSX file.")
-            dfs = []
+    Reads st.session_state, so it must run on the script thread.
+
+    Parameters:
+        file (Any): A single file object to be processed.
+
+    Returns:
+        Optional[Tuple[type, Dict[str, Any]]]: The handler class and its options, None for an unsupported file.
+    """
+    backend = st.session_state.get('file_backend') or FILE_BACKEND
+    # Handle CSV file
+    if file.name.endswith('.csv'):
+        return CSVFileHandler, {'backend': backend, 'sep': ',', **(st.session_state.get('file_load_options') or {})}
+
+    # Handle TSV file
+    if file.name.endswith('.tsv'):
+        return TSVFileHandler, {'backend': backend, 'sep': '\t', **(st.session_state.get('file_load_options') or {})}
+
+    # Handle Excel file (XLSX)
+    if file.name.endswith(('.xlsx', '.xls')):
+        return ExcelFileHandler, {'backend': backend, 'sheets': list(st.session_state.get('selected_sheets') or [])}
+
+    st.error("Unsupported file type. Please upload a CSV, TSV, or XLSX file.")
+    return None
+
+
+def read_file(file: Any, handler_class: type, options: Dict[str, Any]) -> List[pd.DataFrame]:
+    """
+    Read a file with a handler, reusing the parsed result if it was read with the same options.
+
+    Does not touch st.session_state, so it can run on worker threads.
+
+    Parameters:
+        file (Any): A single file object to be processed.
+        handler_class (type): The file handler, see file_reader.
+        options (Dict[str, Any]): The handler's options, see file_reader.
+
+    Returns:
+        List[pd.DataFrame]: A list of DataFrames containing the file data.
+    """
+    try:
+        # Reuse the parsed result if this exact upload was read with the same options
+        key = INGESTION_CACHE.key(file, reader=handler_class.__name__, **options)
+        dfs = INGESTION_CACHE.get(key)
+        if dfs is None:
+            # The separator is a class attribute of the handler
+            load_options = {name: value for name, value in options.items() if name != 'sep'}
+            dfs = handler_class([file], **load_options).read()
+            if dfs:
+                INGESTION_CACHE.put(key, dfs)
 
     except ValueError as ve:
         st.error(f"Error processing file '{file.name}': {ve}")
         dfs = []
     
-    return dfs
\ No newline at end of file
+    return dfs
@@ -0,0 +1,73 @@
+# src/hanlders/filter_handlers.py
+import re
+import shlex
+from typing import Any
+
+# "column operator value" filter lines typed by the user, e.g. "year >= 2023" or "year>=2023".
+# Word operators must be set off from the column name; symbols need no spaces around them.
+FILTER_PATTERN = re.compile(
+    r"^\s*([\w.]+|`[^`]+`|\"[^\"]+\")"
+    r"(?:\s*(!=|<>|<=|>=|=|<|>)|\s+(IS\s+NOT\s+NULL|IS\s+NULL|NOT\s+LIKE|LIKE|NOT\s+IN|IN)\b)\s*(.*?)\s*$",
+    re.IGNORECASE,
+)
+
+
+def parse_filter_value(value: str) -> Any:
+    """
+    Convert a filter value typed by the user into a Python value.
+
+    Quoted values stay strings, numbers become int or float, and a parenthesised,
+    comma-separated list becomes a list of values. Commas inside quoted list items
+    are kept, e.g. ``('US, North', 'EU')`` has two items.
+
+    Args:
+        value (str): The value as typed.
+
+    Returns:
+        Any: The parsed value.
+
+    Raises:
+        ValueError: If a quote in a list is not closed.
+    """
+    value = value.strip()
+    if value.startswith('(') and value.endswith(')'):
+        # Non-POSIX mode keeps the quotes, so quoted numbers stay strings
+        lexer = shlex.shlex(value[1:-1], posix=False)
+        lexer.whitespace += ','
+        lexer.whitespace_split = True
+        lexer.commenters = ''
+        return [parse_filter_value(item) for item in lexer]
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+        return value[1:-1]
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def parse_filter(line: str) -> list:
+    """
+    Parse one "column operator value" line into a ``[column, operator, value]`` condition.
+
+    IS NULL and IS NOT NULL conditions have no value.
+
+    Args:
+        line (str): The filter as typed by the user.
+
+    Returns:
+        list: The condition.
+
+    Raises:
+        ValueError: If the line is not a condition, or a quote in a list is not closed.
+    """
+    match = FILTER_PATTERN.match(line)
+    if match is None:
+        raise ValueError("expected a column, an operator and a value")
+    name, symbol, words, value = match.groups()
+    operator = symbol or ' '.join(words.upper().split())
+    condition = [name.strip('`"'), operator]
+    if not operator.startswith('IS'):
+        condition.append(parse_filter_value(value))
+    return condition
@@ -1,45 +1,231 @@
 # src/hanlders/llm_handlers.py
+import time
+import hashlib
+import threading
+import httpx
 from pandasai.llm import BambooLLM,GoogleGemini,LangchainLLM
 from langchain_groq import ChatGroq
 from langchain_openai.chat_models import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
-from typing import Union
+from langchain_core.language_models.chat_models import BaseChatModel
+from typing import Any,Callable,Dict,Optional,Tuple,Union
+from utils.contsant import LLM_CLIENT_IDLE_SECONDS, LLM_KEEPALIVE_SECONDS, LLM_MAX_KEEPALIVE_CONNECTIONS
+from pandasai.exceptions import APIKeyNotFoundError
+from pandasai.helpers.optional import import_dependency
+from .streaming_handlers import TOKEN_SINK
 
-def llm_handler(credentials:dict) -> Union[ChatGroq, ChatOpenAI, GoogleGemini, BambooLLM, ChatAnthropic]:
+ClientKey = Tuple[str, Optional[str], Optional[float], str]
+
+# Serializes genai.configure with the request that uses the configured key
+GEMINI_LOCK = threading.Lock()
+
+
+class LLMClientRegistry:
+    """
+    Process-wide pool of LLM clients shared across reruns and sessions.
+
+    Clients are keyed by provider, model, temperature and a hash of the API key, so the
+    raw key is never kept as a dictionary key. Reusing a client reuses its HTTP
+    connection pool and avoids a new TLS handshake for every question. Clients unused
+    for longer than ``idle_timeout`` seconds are closed and dropped.
+
+    Attributes:
+        idle_timeout (float): Seconds a client may stay unused before it is evicted.
+    """
+
+    def __init__(self, idle_timeout: float = LLM_CLIENT_IDLE_SECONDS) -> None:
+        self.idle_timeout = idle_timeout
+        self._clients: Dict[ClientKey, Tuple[Any, Optional[httpx.Client], float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(provider: str, model: Optional[str], temperature: Optional[float], api_key: str) -> ClientKey:
+        """Build the registry key for a provider configuration."""
+        return provider, model, temperature, hashlib.sha256(api_key.encode('utf-8')).hexdigest()
+
+    def get(self, key: ClientKey, factory: Callable[[Optional[httpx.Client]], Any], pooled_http: bool = False) -> Any:
+        """
+        Return the client for a key, creating it with factory on first use.
+
+        Args:
+            key (ClientKey): The registry key.
+            factory (Callable[[Optional[httpx.Client]], Any]): Builds the client from a shared HTTP client (or None).
+            pooled_http (bool): Whether to give the factory a keep-alive HTTP client owned by the registry.
+
+        Returns:
+            Any: The pooled LLM client.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._clients.get(key)
+            if entry is None:
+                http_client = new_http_client() if pooled_http else None
+                try:
+                    entry = (factory(http_client), http_client, now)
+                except Exception:
+                    _close(http_client)
+                    raise
+            self._clients[key] = (entry[0], entry[1], now)
+            return entry[0]
+
+    def dispose(self, key: ClientKey) -> None:
+        """Close and drop the client for a key, if any."""
+        with self._lock:
+            entry = self._clients.pop(key, None)
+        if entry is not None:
+            _close(entry[1])
+
+    def _evict_idle(self, now: float) -> None:
+        for key, (_, http_client, last_used) in list(self._clients.items()):
+            if now - last_used > self.idle_timeout:
+                del self._clients[key]
+                _close(http_client)
+
+
+def new_http_client() -> httpx.Client:
+    """Create an HTTP client that keeps idle connections alive for reuse."""
+    limits = httpx.Limits(max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+                          keepalive_expiry=LLM_KEEPALIVE_SECONDS)
+    return httpx.Client(limits=limits, timeout=httpx.Timeout(600.0, connect=10.0))
+
+
+def _close(http_client: Optional[httpx.Client]) -> None:
+    if http_client is not None:
+        http_client.close()
+
+
+class StreamingLangchainLLM(LangchainLLM):
+    """
+    LangchainLLM that streams its output to the active token stream, if any.
+
+    Without an active stream (see streaming_handlers.stream_tokens) it behaves exactly
+    like LangchainLLM; with one, the response is requested with ``stream()`` and each
+    chunk is forwarded while the full text is still returned to PandasAI.
+    """
+
+    def call(self, instruction, context=None, suffix: str = "") -> str:
+        sink = TOKEN_SINK.get()
+        if sink is None:
+            return super().call(instruction, context, suffix)
+
+        prompt = instruction.to_string() + suffix
+        memory = context.memory if context else None
+        prompt = self.prepend_system_prompt(prompt, memory)
+        self.last_prompt = prompt
+
+        parts = []
+        sink.start()
+        try:
+            for chunk in self.langchain_llm.stream(prompt):
+                text = _chunk_text(chunk.content if isinstance(self.langchain_llm, BaseChatModel) else chunk)
+                if text:
+                    parts.append(text)
+                    sink.write(text)
+        finally:
+            sink.end()
+        return "".join(parts)
+
+
+class StreamingGoogleGemini(GoogleGemini):
+    """
+    GoogleGemini that streams its output to the active token stream, if any.
+
+    ``genai.configure`` sets the API key for the whole process, so a client never relies
+    on a key configured earlier: every request configures its own key and binds a new
+    GenerativeModel to it under GEMINI_LOCK. Streamed chunks are read after the lock is
+    released, the model keeps the transport it was bound to.
+    """
+
+    def _configure(self, api_key: str):
+        if not api_key:
+            raise APIKeyNotFoundError("Google Gemini API key is required")
+        err_msg = "Install google-generativeai >= 0.3 for Google Gemini API"
+        self.google_gemini = import_dependency("google.generativeai", extra=err_msg)
+        self._api_key = api_key
+
+    def _generate_content(self, prompt: str, stream: bool) -> Any:
+        with GEMINI_LOCK:
+            self.google_gemini.configure(api_key=self._api_key)
+            return self.google_gemini.GenerativeModel(self.model).generate_content(
+                contents=prompt,
+                generation_config={
+                    "temperature": self.temperature,
+                    "top_p": self.top_p,
+                    "top_k": self.top_k,
+                    "max_output_tokens": self.max_output_tokens,
+                },
+                stream=stream,
+            )
+
+    def _generate_text(self, prompt: str, memory=None) -> str:
+        self._validate()
+        updated_prompt = self.prepend_system_prompt(prompt, memory)
+        self.last_prompt = updated_prompt
+        sink = TOKEN_SINK.get()
+        if sink is None:
+            return self._generate_content(updated_prompt, stream=False).text
+
+        completion = self._generate_content(updated_prompt, stream=True)
+        parts = []
+        sink.start()
+        try:
+            for chunk in completion:
+                if chunk.parts:
+                    parts.append(chunk.text)
+                    sink.write(chunk.text)
+        finally:
+            sink.end()
+        return "".join(parts)
+
+
+def _chunk_text(content: Any) -> str:
+    """Return the text of a streamed chunk, which some chat models split into content blocks."""
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+
+
+# Shared by every session of the Streamlit server
+LLM_CLIENTS = LLMClientRegistry()
+
+
+def llm_handler(credentials:dict) -> Union[StreamingLangchainLLM, StreamingGoogleGemini, BambooLLM]:
     """
     Returns an instance of a Langchain LLM based on the provider.
 
+    LangChain-backed providers and Gemini are wrapped so their output can be streamed
+    to the page, see streaming_handlers. Instances come from the process-wide LLM_CLIENTS pool, so repeated calls with the
+    same provider, model, temperature and API key return the same client.
+
     Parameters:
         credentials (dict): A dictionary containing the credentials for the LLM provider.
 
     Returns:
-        Union[ChatGroq, ChatOpenAI, GoogleGemini, BambooLLM, ChatAnthropic]: An instance of the LLM provider.
+        Union[StreamingLangchainLLM, StreamingGoogleGemini, BambooLLM]: An instance of the LLM provider.
 
     Raises:
         ValueError: If no LLM provider is found in the environment.
     """
     for provider in credentials:
+        model = credentials[provider].get('model')
+        temperature = credentials[provider].get('temperature')
+        api_key = credentials[provider]['api_key']
+        key = LLM_CLIENTS.key(provider, model, temperature, api_key)
         if provider == "Groq":
-            
-            langchain_llm=ChatGroq(model=credentials[provider]['model'],
-                            temperature=credentials[provider]['temperature'],
-                            api_key=credentials[provider]['api_key'])
-            llm=LangchainLLM(langchain_llm=langchain_llm)
+            llm = LLM_CLIENTS.get(key, lambda http_client: StreamingLangchainLLM(langchain_llm=ChatGroq(
+                model=model, temperature=temperature, api_key=api_key, http_client=http_client)), pooled_http=True)
         elif provider == "OpenAI":
-            langchain_llm=ChatOpenAI(model=credentials[provider]['model'],
-                              temperature=credentials[provider]['temperature'],
-                              api_key=credentials[provider]['api_key'])
-            llm=LangchainLLM(langchain_llm=langchain_llm)
+            llm = LLM_CLIENTS.get(key, lambda http_client: StreamingLangchainLLM(langchain_llm=ChatOpenAI(
+                model=model, temperature=temperature, api_key=api_key, http_client=http_client)), pooled_http=True)
         elif provider == "Google Gemini":
-            llm=GoogleGemini(model=credentials[provider]['model'],
-                                     temperature=credentials[provider]['temperature'],
-                                     api_key=credentials[provider]['api_key'])
+            llm = LLM_CLIENTS.get(key, lambda _: StreamingGoogleGemini(model=model, temperature=temperature, api_key=api_key))
         elif provider == "PandasAI":
-            llm=BambooLLM(api_key=credentials[provider]['api_key'])
+            llm = LLM_CLIENTS.get(key, lambda _: BambooLLM(api_key=api_key))
         elif provider == "Antropic":
-            llm=ChatAnthropic(model=credentials[provider]['model'],
-                              temperature=credentials[provider]['temperature'],
-                              api_key=credentials[provider]['api_key'])
+            # The Anthropic SDK keeps its own keep-alive pool per client instance
+            llm = LLM_CLIENTS.get(key, lambda _: StreamingLangchainLLM(langchain_llm=ChatAnthropic(
+                model=model, temperature=temperature, api_key=api_key)))
         else:
             raise ValueError("No LLM provider found in environment")
-    return llm
\ No newline at end of file
+    return llm
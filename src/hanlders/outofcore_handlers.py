@@ -0,0 +1,888 @@
+# src/hanlders/outofcore_handlers.py
+import ast
+import os
+import shutil
+import pathlib
+import tempfile
+import time
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pa_fs
+import pyarrow.parquet as pq
+import streamlit as st
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pandasai.connectors import BaseConnector
+from .database_hanlders import truncate_text
+from .files_handlers import handle_file
+from .profile_handlers import format_profile, rank_columns
+from .storage_handlers import ROOT_DIR
+from utils.contsant import (DB_RESULT_TTL_SECONDS, DB_SCHEMA_SAMPLE_ROWS, OUT_OF_CORE_DIR,
+                            OUT_OF_CORE_FILE_ROW_GROUPS, OUT_OF_CORE_MAX_BYTES, OUT_OF_CORE_MAX_LOAD_BYTES,
+                            OUT_OF_CORE_ROW_GROUP_ROWS, PROFILE_TOP_VALUES, PROFILE_VALUE_MAX_CHARS)
+from utils.fingerprint import fingerprint_file, fingerprint_options
+
+# Filters as Arrow dataset expressions, with pandas' treatment of missing values:
+# they fail every comparison except "!=", as NaN does
+ARROW_FILTERS: Dict[str, Callable[[Any, Any], Any]] = {
+    '=': lambda col, value: col == value,
+    '!=': lambda col, value: (col != value) | col.is_null(),
+    '<>': lambda col, value: (col != value) | col.is_null(),
+    '<': lambda col, value: col < value,
+    '<=': lambda col, value: col <= value,
+    '>': lambda col, value: col > value,
+    '>=': lambda col, value: col >= value,
+    'LIKE': lambda col, value: pc.match_like(col, str(value)),
+    'NOT LIKE': lambda col, value: ~pc.match_like(col, str(value)),
+    'IN': lambda col, value: col.isin(list(value) if isinstance(value, (list, tuple)) else [value]),
+    'NOT IN': lambda col, value: ~col.isin(list(value) if isinstance(value, (list, tuple)) else [value]) & col.is_valid(),
+    'IS NULL': lambda col, value: col.is_null(),
+    'IS NOT NULL': lambda col, value: col.is_valid(),
+}
+
+# Comparison operators of generated code, as filter operators
+_CODE_COMPARISONS = {ast.Eq: '=', ast.NotEq: '!=', ast.Lt: '<', ast.LtE: '<=', ast.Gt: '>', ast.GtE: '>='}
+# The same comparisons with their operands swapped, e.g. 5 < df['a']
+_SWAPPED = {'=': '=', '!=': '!=', '<': '>', '<=': '>=', '>': '<', '>=': '<='}
+# DataFrame methods that keep every column and take column names as string arguments
+_ROW_METHODS = {'copy', 'head', 'tail', 'sort_values', 'nlargest', 'nsmallest', 'reset_index'}
+
+
+def filter_expression(where: List[list]) -> Optional[Any]:
+    """Combine ``[column, operator, value]`` filters into one Arrow expression, None if there are none."""
+    expression = None
+    for col, op, *value in where:
+        condition = ARROW_FILTERS[str(op).upper()](pc.field(col), value[0] if value else None)
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+class OutOfCoreDataset:
+    """
+    A dataset kept on disk as Parquet files and read through memory maps.
+
+    The rows are stored in row groups of OUT_OF_CORE_ROW_GROUP_ROWS rows, several row
+    groups per file. Reading selects columns and filters rows through Arrow's dataset
+    scanner, which reads only the requested column chunks and skips row groups whose
+    min/max statistics rule out the filter. The row count, schema and column profile
+    come from the Parquet footers, so nothing is scanned to describe the data.
+
+    Attributes:
+        path (pathlib.Path): The dataset directory.
+        name (str): The name the dataset was created from, e.g. the uploaded file name.
+    """
+
+    def __init__(self, path: pathlib.Path, name: str) -> None:
+        self.path = path
+        self.name = name
+        self.dataset = ds.dataset(str(path), format='parquet', filesystem=pa_fs.LocalFileSystem(use_mmap=True))
+        self._profile: Optional[List[Dict[str, Any]]] = None
+
+    @property
+    def schema(self) -> pa.Schema:
+        return self.dataset.schema
+
+    @property
+    def rows(self) -> int:
+        # Counted from the Parquet footers
+        return self.dataset.count_rows()
+
+    @property
+    def disk_bytes(self) -> int:
+        return sum(f.stat().st_size for f in self.path.glob('*.parquet'))
+
+    @property
+    def column_types(self) -> List[Tuple[str, str]]:
+        """Column names and Arrow types."""
+        return [(field.name, str(field.type)) for field in self.schema]
+
+    def head(self, n: int) -> pd.DataFrame:
+        """Return the first n rows, reading only the first row group."""
+        return self.dataset.head(n).to_pandas()
+
+    def profile(self) -> List[Dict[str, Any]]:
+        """
+        Summarise every column from the Parquet statistics, in the format of profile_frame.
+
+        Null rates, minima and maxima are aggregated over the row groups' statistics;
+        distinct counts and frequent values would need a scan and are left out.
+
+        Returns:
+            List[Dict[str, Any]]: One summary per column.
+        """
+        if self._profile is not None:
+            return self._profile
+        rows = 0
+        nulls = [0] * len(self.schema)
+        minima: List[Any] = [None] * len(self.schema)
+        maxima: List[Any] = [None] * len(self.schema)
+        exact = [True] * len(self.schema)
+        for fragment in self.dataset.get_fragments():
+            metadata = fragment.metadata
+            positions = {metadata.schema.column(j).path: j for j in range(metadata.num_columns)}
+            for r in range(metadata.num_row_groups):
+                row_group = metadata.row_group(r)
+                rows += row_group.num_rows
+                for i, field in enumerate(self.schema):
+                    j = positions.get(field.name)
+                    stats = row_group.column(j).statistics if j is not None else None
+                    if stats is None or not stats.has_null_count:
+                        exact[i] = False
+                        continue
+                    nulls[i] += stats.null_count
+                    if stats.has_min_max:
+                        minima[i] = stats.min if minima[i] is None else min(minima[i], stats.min)
+                        maxima[i] = stats.max if maxima[i] is None else max(maxima[i], stats.max)
+        profile = []
+        for i, field in enumerate(self.schema):
+            summary: Dict[str, Any] = {'column': field.name, 'dtype': str(field.type),
+                                       'null_rate': nulls[i] / rows if rows and exact[i] else 0.0}
+            if minima[i] is not None and (pa.types.is_integer(field.type) or pa.types.is_floating(field.type)
+                                          or pa.types.is_temporal(field.type) or pa.types.is_decimal(field.type)):
+                summary['min'] = minima[i]
+                summary['max'] = maxima[i]
+            profile.append(summary)
+        self._profile = profile
+        return profile
+
+    def estimate_bytes(self, columns: Optional[List[str]] = None, expression: Optional[Any] = None) -> int:
+        """
+        Estimate the memory of a read from the uncompressed sizes of the column chunks it touches.
+
+        Row groups that the filter rules out by their statistics are not counted.
+        """
+        wanted = set(columns) if columns is not None else None
+        total = 0
+        for fragment in self.dataset.get_fragments(filter=expression):
+            metadata = fragment.metadata
+            for row_group in fragment.split_by_row_group(filter=expression):
+                for info in row_group.row_groups:
+                    chunk = metadata.row_group(info.id)
+                    total += sum(chunk.column(j).total_uncompressed_size for j in range(chunk.num_columns)
+                                 if wanted is None or chunk.column(j).path_in_schema in wanted)
+        return total
+
+    def read(self, columns: Optional[List[str]] = None, where: Optional[List[list]] = None) -> pd.DataFrame:
+        """
+        Load some columns and rows of the dataset into a DataFrame.
+
+        Args:
+            columns (Optional[List[str]]): Columns to load, None for all of them.
+            where (Optional[List[list]]): ``[column, operator, value]`` filters, see ARROW_FILTERS.
+
+        Returns:
+            pd.DataFrame: The selected data.
+
+        Raises:
+            MemoryError: If the selection is larger than OUT_OF_CORE_MAX_LOAD_BYTES.
+        """
+        expression = filter_expression(where or [])
+        size = self.estimate_bytes(columns, expression)
+        if size > OUT_OF_CORE_MAX_LOAD_BYTES:
+            raise MemoryError(
+                f"Loading {', '.join(columns) if columns else 'every column'} of {self.name} needs about "
+                f"{size / 1024 ** 3:.1f} GB, more than the {OUT_OF_CORE_MAX_LOAD_BYTES / 1024 ** 3:.0f} GB allowed. "
+                "Select only the columns needed and filter rows with constant comparisons such as "
+                "df[df['year'] == 2023] before using the data."
+            )
+        table = self.dataset.to_table(columns=columns, filter=expression)
+        return table.to_pandas(self_destruct=True, split_blocks=True)
+
+
+class DatasetStore:
+    """
+    On-disk store of out-of-core datasets, one directory of Parquet files per dataset.
+
+    Entries are written to a temporary directory and renamed into place, and the least
+    recently used ones are removed once the store grows past its size limit, as in
+    ColumnarCache.
+
+    Attributes:
+        directory (pathlib.Path): Directory holding the datasets.
+        max_bytes (int): Maximum disk space used by the store.
+    """
+
+    def __init__(self, directory: str = OUT_OF_CORE_DIR, max_bytes: int = OUT_OF_CORE_MAX_BYTES) -> None:
+        self.directory = ROOT_DIR.joinpath(directory)
+        self.max_bytes = max_bytes
+
+    def open(self, key: str, name: str) -> Optional[OutOfCoreDataset]:
+        """Return the dataset stored under a key, or None if there is none."""
+        entry = self.directory.joinpath(key)
+        if not entry.is_dir():
+            return None
+        try:
+            dataset = OutOfCoreDataset(entry, name)
+        except (OSError, pa.ArrowException) as e:
+            st.warning(f"Ignoring unreadable dataset '{key}': {e}")
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+        # Mark the entry as recently used for the eviction policy
+        os.utime(entry)
+        return dataset
+
+    def writer(self, key: str, name: str) -> "DatasetWriter":
+        """Open a writer that streams chunks into a new dataset; call commit() or abort() when done."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return DatasetWriter(self, key, name)
+
+    def evict(self) -> None:
+        """Remove the least recently used datasets until the store fits its size limit."""
+        usage = {}
+        for path in self.directory.iterdir():
+            if not path.is_dir() or path.name.startswith('.tmp-'):
+                continue
+            try:
+                usage[path] = (path.stat().st_mtime, sum(f.stat().st_size for f in path.iterdir()))
+            except OSError:
+                # Removed by a concurrent eviction
+                continue
+        total = sum(size for _, size in usage.values())
+        for path, (_, size) in sorted(usage.items(), key=lambda item: item[1][0]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+
+class DatasetWriter:
+    """
+    Streams chunks of rows into the Parquet files of a new dataset.
+
+    Only the chunk being written is held in memory. A new file is started every
+    OUT_OF_CORE_FILE_ROW_GROUPS row groups. Every chunk must share the schema of the
+    first one; chunks are cast to it where Arrow allows.
+
+    Attributes:
+        store (DatasetStore): The store the dataset belongs to.
+        key (str): The key of the dataset being written.
+        name (str): The dataset's display name.
+        rows (int): Rows written so far.
+    """
+
+    def __init__(self, store: DatasetStore, key: str, name: str) -> None:
+        self.store = store
+        self.key = key
+        self.name = name
+        self.rows = 0
+        self._staging = pathlib.Path(tempfile.mkdtemp(dir=store.directory, prefix='.tmp-'))
+        self._writer = None
+        self._schema = None
+        self._files = 0
+        self._file_rows = 0
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Append a DataFrame chunk."""
+        self.write_table(pa.Table.from_pandas(df, preserve_index=False))
+
+    def write_table(self, table: pa.Table) -> None:
+        """
+        Append an Arrow table or record batch.
+
+        Raises:
+            pa.ArrowException: If the rows cannot be converted to the dataset's schema.
+        """
+        if isinstance(table, pa.RecordBatch):
+            table = pa.Table.from_batches([table])
+        if self._schema is None:
+            # A column without any value in the first chunk is typed by the values of later ones
+            self._schema = pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                                      for field in table.schema.remove_metadata()])
+        if not table.schema.equals(self._schema, check_metadata=False):
+            table = table.cast(self._schema)
+        if self._writer is None:
+            path = self._staging.joinpath(f"part-{self._files:05d}.parquet")
+            self._writer = pq.ParquetWriter(str(path), self._schema)
+        self._writer.write_table(table, row_group_size=OUT_OF_CORE_ROW_GROUP_ROWS)
+        self.rows += table.num_rows
+        self._file_rows += table.num_rows
+        if self._file_rows >= OUT_OF_CORE_ROW_GROUP_ROWS * OUT_OF_CORE_FILE_ROW_GROUPS:
+            self._close()
+
+    def commit(self) -> OutOfCoreDataset:
+        """Close the current file, publish the dataset and open it."""
+        self._close()
+        entry = self.store.directory.joinpath(self.key)
+        if entry.exists():
+            shutil.rmtree(entry, ignore_errors=True)
+        os.replace(self._staging, entry)
+        self.store.evict()
+        return OutOfCoreDataset(entry, self.name)
+
+    def abort(self) -> None:
+        """Close the current file and discard everything written so far."""
+        try:
+            self._close()
+        finally:
+            shutil.rmtree(self._staging, ignore_errors=True)
+
+    def _close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._files += 1
+            self._file_rows = 0
+
+
+# Process-wide dataset store shared by every session
+DATASET_STORE = DatasetStore()
+
+
+def plan_access(code: Optional[str], index: int, columns: List[str]) -> Tuple[Optional[List[str]], List[list]]:
+    """
+    Work out which columns and rows of ``dfs[index]`` a piece of generated code can see.
+
+    Columns are narrowed down when every use of the DataFrame, directly or through a
+    variable assigned from it, selects columns by name: ``df['a']``, ``df[['a', 'b']]``,
+    ``df.a``, ``df.loc[mask, 'a']``, ``df.groupby('a')['b']``, or row-wise operations
+    such as filtering, ``sort_values('a')`` and ``head()`` whose result is used the same
+    way. Any other use, e.g. ``df.describe()`` or passing the DataFrame to a function,
+    needs every column.
+
+    Rows are narrowed down only when the code never sees the unfiltered DataFrame: the
+    DataFrame is used solely through one ``df[mask]`` or ``df.loc[mask]`` whose mask is
+    made of constant comparisons, ``isin`` and ``isna``/``notna`` joined by ``&``, and no
+    variable holds the whole DataFrame at one point and filtered rows at another.
+
+    Args:
+        code (Optional[str]): The generated code, None if unknown.
+        index (int): Position of the DataFrame in ``dfs``.
+        columns (List[str]): The DataFrame's columns.
+
+    Returns:
+        Tuple[Optional[List[str]], List[list]]: The columns to load (None for all of them) and
+        the ``[column, operator, value]`` filters every row the code sees matches.
+    """
+    if not code:
+        return None, []
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None, []
+    return _AccessPlanner(tree, index, columns).plan()
+
+
+class _AccessPlanner:
+    """Static analysis behind plan_access."""
+
+    def __init__(self, tree: ast.AST, index: int, columns: List[str]) -> None:
+        self.tree = tree
+        self.index = index
+        self.names = list(columns)
+        self.known = set(columns)
+        self.columns: List[str] = []
+        self.parents: Dict[ast.AST, ast.AST] = {}
+        for node in ast.walk(tree):
+            for child in ast.iter_child_nodes(node):
+                self.parents[child] = node
+        # Names bound to the whole DataFrame, and names bound to rows or a copy of it
+        self.base: set = set()
+        self.derived: set = set()
+        # Names bound to the whole DataFrame at one point and to rows of it at another
+        self.rebound: set = set()
+        self._find_aliases()
+
+    def plan(self) -> Tuple[Optional[List[str]], List[list]]:
+        # Any use of dfs other than dfs[<index>], e.g. iterating over it, may touch everything
+        for node in ast.walk(self.tree):
+            if isinstance(node, ast.Name) and node.id == 'dfs' and not self._is_dfs_item(self.parents.get(node)):
+                return None, []
+        occurrences = [node for node in ast.walk(self.tree) if self._is_frame(node)]
+        if not occurrences:
+            return None, []
+        for node in occurrences:
+            if not self._column_safe(node):
+                return None, []
+        # Code that only counts rows still needs one column to count them
+        columns = [col for col in dict.fromkeys(self.columns) if col in self.known] or self.names[:1]
+        return columns or None, self._row_filters(occurrences)
+
+    # Aliases
+
+    def _is_dfs_item(self, node: Optional[ast.AST], index: Optional[int] = None) -> bool:
+        return (isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) and node.value.id == 'dfs'
+                and isinstance(node.slice, ast.Constant) and isinstance(node.slice.value, int)
+                and (index is None or node.slice.value == index))
+
+    def _find_aliases(self) -> None:
+        assignments = [(target.id, node.value) for node in ast.walk(self.tree) if isinstance(node, ast.Assign)
+                       for target in node.targets if isinstance(target, ast.Name)]
+        base, derived = self.base, self.derived
+
+        def is_whole(value: ast.AST) -> bool:
+            return self._is_dfs_item(value, self.index) or isinstance(value, ast.Name) and value.id in base
+
+        changed = True
+        while changed:
+            changed = False
+            for name, value in assignments:
+                if name not in base and is_whole(value):
+                    base.add(name)
+                    changed = True
+                elif name not in derived and name not in base and (
+                        self._frame_source(value) is not None or isinstance(value, ast.Name) and value.id in derived):
+                    derived.add(name)
+                    changed = True
+        # A name also bound to something else cannot be told apart statically, nor can its aliases
+        changed = True
+        while changed:
+            changed = False
+            for name, value in assignments:
+                if name in base and not is_whole(value):
+                    base.discard(name)
+                    derived.add(name)
+                    self.rebound.add(name)
+                    changed = True
+
+    def _frame_source(self, node: ast.AST) -> Optional[ast.AST]:
+        """Return the frame a row-wise expression such as ``df[mask]`` or ``df.head()`` is taken from."""
+        if isinstance(node, ast.Subscript):
+            inner = node.value
+            if isinstance(inner, ast.Attribute) and inner.attr == 'loc' and not isinstance(node.slice, ast.Tuple):
+                inner = inner.value
+            elif self._column_selection(node.slice) is not None:
+                return None
+            return inner if self._is_frame(inner) or self._frame_source(inner) is not None else None
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr in _ROW_METHODS:
+            inner = node.func.value
+            return inner if self._is_frame(inner) or self._frame_source(inner) is not None else None
+        return None
+
+    def _is_frame(self, node: ast.AST) -> bool:
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+            return node.id in self.base or node.id in self.derived
+        return self._is_dfs_item(node, self.index)
+
+    # Columns
+
+    def _column_selection(self, node: ast.AST) -> Optional[List[str]]:
+        """Return the names selected by a ``'a'`` or ``['a', 'b']`` subscript, None for anything else."""
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            return [node.value]
+        if isinstance(node, (ast.List, ast.Tuple)) and node.elts and all(
+                isinstance(elt, ast.Constant) and isinstance(elt.value, str) for elt in node.elts):
+            return [elt.value for elt in node.elts]
+        return None
+
+    def _string_arguments(self, call: ast.Call) -> List[str]:
+        values = list(call.args) + [keyword.value for keyword in call.keywords]
+        names = []
+        for value in values:
+            names.extend(self._column_selection(value) or [])
+        return names
+
+    def _column_safe(self, node: ast.AST) -> bool:
+        """Whether a frame expression is only used through columns selected by name."""
+        parent = self.parents.get(node)
+        if isinstance(parent, ast.Assign) and parent.value is node and all(
+                isinstance(target, ast.Name) for target in parent.targets):
+            # A new alias, whose own uses are checked
+            return True
+        if isinstance(parent, ast.Call) and isinstance(parent.func, ast.Name) and parent.func.id == 'len':
+            return True
+        if isinstance(parent, ast.Subscript) and parent.value is node:
+            selected = self._column_selection(parent.slice)
+            if selected is not None:
+                self.columns.extend(selected)
+                return True
+            # Rows selected by a mask, whose own uses are checked
+            return self._column_safe(parent)
+        if isinstance(parent, ast.Attribute) and parent.value is node:
+            if parent.attr in self.known:
+                self.columns.append(parent.attr)
+                return True
+            grandparent = self.parents.get(parent)
+            if parent.attr == 'shape':
+                # The row count; the column count changes with the columns loaded
+                return (isinstance(grandparent, ast.Subscript) and isinstance(grandparent.slice, ast.Constant)
+                        and grandparent.slice.value == 0)
+            if parent.attr == 'loc' and isinstance(grandparent, ast.Subscript):
+                if isinstance(grandparent.slice, ast.Tuple) and len(grandparent.slice.elts) == 2:
+                    selected = self._column_selection(grandparent.slice.elts[1])
+                    if selected is None:
+                        return False
+                    self.columns.extend(selected)
+                    return True
+                return self._column_safe(grandparent)
+            if isinstance(grandparent, ast.Call) and grandparent.func is parent:
+                if parent.attr in _ROW_METHODS:
+                    self.columns.extend(self._string_arguments(grandparent))
+                    return self._column_safe(grandparent)
+                if parent.attr == 'groupby':
+                    keys = self._string_arguments(grandparent)
+                    selection = self.parents.get(grandparent)
+                    if keys and isinstance(selection, ast.Subscript) and selection.value is grandparent:
+                        selected = self._column_selection(selection.slice)
+                        if selected is not None:
+                            self.columns.extend(keys + selected)
+                            return True
+        return False
+
+    # Rows
+
+    def _row_filters(self, occurrences: List[ast.AST]) -> List[list]:
+        """Return the filters of the one mask the whole DataFrame is seen through, if any."""
+        if self.rebound:
+            # Some uses of a rebound name see every row
+            return []
+        whole = [node for node in occurrences
+                 if isinstance(node, ast.Name) and node.id in self.base or self._is_dfs_item(node, self.index)]
+        masks = set()
+        for node in whole:
+            parent = self.parents.get(node)
+            if isinstance(parent, ast.Assign) and parent.value is node:
+                continue
+            mask = self._enclosing_mask(node)
+            if mask is None:
+                return []
+            masks.add(mask)
+        if len(masks) != 1:
+            return []
+        subscript = masks.pop()
+        return self._conditions(subscript.slice) or []
+
+    def _enclosing_mask(self, node: ast.AST) -> Optional[ast.Subscript]:
+        """Return the ``df[mask]`` or ``df.loc[mask]`` a use of the whole DataFrame belongs to."""
+        parent = self.parents.get(node)
+        if isinstance(parent, ast.Attribute) and parent.attr == 'loc' and parent.value is node:
+            node, parent = parent, self.parents.get(parent)
+        if (isinstance(parent, ast.Subscript) and parent.value is node
+                and self._column_selection(parent.slice) is None and not isinstance(parent.slice, ast.Tuple)):
+            return parent
+        # A use inside the mask of a filter on the DataFrame, e.g. df['a'] in df[df['a'] > 5]
+        while parent is not None:
+            grandparent = self.parents.get(parent)
+            if isinstance(grandparent, ast.Subscript) and grandparent.slice is parent:
+                target = grandparent.value
+                if isinstance(target, ast.Attribute) and target.attr == 'loc':
+                    target = target.value
+                if self._is_frame(target) and (isinstance(target, ast.Name) and target.id in self.base
+                                               or self._is_dfs_item(target, self.index)):
+                    return grandparent
+            parent = grandparent
+        return None
+
+    def _conditions(self, node: ast.AST) -> Optional[List[list]]:
+        """Translate a mask into filters, None if any part of it is not a supported condition."""
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitAnd):
+            left, right = self._conditions(node.left), self._conditions(node.right)
+            return left + right if left is not None and right is not None else None
+        if isinstance(node, ast.Compare) and len(node.ops) == 1 and type(node.ops[0]) in _CODE_COMPARISONS:
+            op = _CODE_COMPARISONS[type(node.ops[0])]
+            left, right = node.left, node.comparators[0]
+            if self._column_of(left) is not None and isinstance(right, ast.Constant):
+                return [[self._column_of(left), op, right.value]]
+            if self._column_of(right) is not None and isinstance(left, ast.Constant):
+                return [[self._column_of(right), _SWAPPED[op], left.value]]
+            return None
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+            col = self._column_of(node.func.value)
+            if col is None:
+                return None
+            if node.func.attr in ('isna', 'isnull') and not node.args:
+                return [[col, 'IS NULL']]
+            if node.func.attr in ('notna', 'notnull') and not node.args:
+                return [[col, 'IS NOT NULL']]
+            if node.func.attr == 'isin' and len(node.args) == 1 and isinstance(node.args[0], (ast.List, ast.Tuple)) \
+                    and all(isinstance(elt, ast.Constant) for elt in node.args[0].elts):
+                return [[col, 'IN', [elt.value for elt in node.args[0].elts]]]
+        return None
+
+    def _column_of(self, node: ast.AST) -> Optional[str]:
+        """Return the column of a ``df['a']`` or ``df.a`` expression on the DataFrame, None otherwise."""
+        if isinstance(node, ast.Subscript) and self._is_frame(node.value):
+            selected = self._column_selection(node.slice)
+            return selected[0] if selected and isinstance(node.slice, ast.Constant) and selected[0] in self.known \
+                else None
+        if isinstance(node, ast.Attribute) and self._is_frame(node.value) and node.attr in self.known:
+            return node.attr
+        return None
+
+
+class OutOfCoreConnector(BaseConnector):
+    """
+    PandasAI connector for an out-of-core dataset, loading only what generated code uses.
+
+    The Agent sees the dataset's column profile from the Parquet statistics and a few
+    sample rows. When PandasAI runs generated code it asks the connector for its data;
+    the connector reads the code from the Agent's pipeline context and loads only the
+    columns and rows the code can see, see plan_access. If the same code asks again
+    while answering the same question, i.e. after it failed on the narrowed data,
+    every column is loaded. The connector
+    lets go of the data once PandasAI has read it, so it is freed with the code's results.
+
+    Attributes:
+        dataset (OutOfCoreDataset): The data on disk.
+        index (int): Position of the dataset in the Agent's ``dfs``.
+        sample_rows (int): Sample rows shown to the LLM.
+        max_chars (Optional[int]): Longest text value shown, None for no limit.
+        max_columns (Optional[int]): Columns described to the LLM, the most useful first; None for all.
+    """
+
+    def __init__(self, dataset: OutOfCoreDataset, index: int, sample_rows: int = DB_SCHEMA_SAMPLE_ROWS,
+                 max_chars: Optional[int] = None, max_columns: Optional[int] = None) -> None:
+        self.dataset = dataset
+        self.index = index
+        self.sample_rows = sample_rows
+        self.max_chars = max_chars
+        self.max_columns = max_columns
+        self._context = None
+        self._frame: Optional[pd.DataFrame] = None
+        # The prompt ID and code of the Agent's last read, to recognise a retry of the same code
+        self._last_run: Optional[Tuple[Any, str]] = None
+        profile = dataset.profile()
+        keep = len(profile) if max_columns is None else max(1, max_columns)
+        self._positions = sorted(rank_columns(profile)[:keep])
+        description = (f"{dataset.name}: out-of-core dataset, loaded column by column. "
+                       "Select the columns you need and filter rows before computing.\n"
+                       + format_profile([profile[i] for i in self._positions],
+                                        max_chars or PROFILE_VALUE_MAX_CHARS, PROFILE_TOP_VALUES))
+        super().__init__(config={}, description=description)
+
+    def _load_connector_config(self, config: Any) -> Any:
+        return config
+
+    def bind(self, context: Any) -> None:
+        """Read the code to be executed from an Agent's pipeline context."""
+        self._context = context
+
+    def describe(self, sample_rows: int, max_chars: Optional[int] = None,
+                 max_columns: Optional[int] = None) -> "OutOfCoreConnector":
+        """Return a connector for the same dataset that shows less of it to the LLM."""
+        return OutOfCoreConnector(self.dataset, self.index, sample_rows, max_chars, max_columns)
+
+    @property
+    def column_types(self) -> List[Tuple[str, str]]:
+        return self.dataset.column_types
+
+    @property
+    def fingerprint(self) -> str:
+        """A hash of the dataset's identity, computed without reading it."""
+        return fingerprint_options(dataset=self.dataset.path.name, columns=self.dataset.column_types)
+
+    def head(self, n: int = DB_SCHEMA_SAMPLE_ROWS) -> pd.DataFrame:
+        sample = self.dataset.head(min(n, self.sample_rows)).iloc[:, self._positions]
+        if self.max_chars is not None:
+            sample = truncate_text(sample, self.max_chars)
+        return sample
+
+    @property
+    def rows_count(self) -> int:
+        return self.dataset.rows
+
+    @property
+    def columns_count(self) -> int:
+        return len(self.dataset.schema)
+
+    @property
+    def column_hash(self) -> str:
+        return self.fingerprint
+
+    @property
+    def fallback_name(self) -> str:
+        return self.dataset.name
+
+    @property
+    def pandas_df(self) -> pd.DataFrame:
+        # Hand the loaded data over instead of keeping it: PandasAI caches connectors
+        # for as long as the Agent lives, and the data can be gigabytes
+        frame = self._frame if self._frame is not None else self.load()
+        self._frame = None
+        return frame
+
+    def execute(self) -> pd.DataFrame:
+        """Load the data for the code the bound Agent is executing, until PandasAI reads pandas_df."""
+        self._frame = self.load()
+        return self._frame
+
+    def load(self, code: Optional[str] = None) -> pd.DataFrame:
+        """
+        Load the columns and rows of the dataset that a piece of code uses.
+
+        The connector keeps no reference to the returned DataFrame.
+
+        Args:
+            code (Optional[str]): The code; by default the code the bound Agent is executing.
+                Without code, the whole dataset is loaded.
+
+        Returns:
+            pd.DataFrame: The loaded data.
+        """
+        run = None
+        if code is None and self._context is not None:
+            code = self._context.get('current_code_executed')
+            run = (self._context.get('last_prompt_id'), code)
+        if run is not None and run == self._last_run:
+            # The narrowed data was not enough for this code
+            columns, where = None, []
+        else:
+            columns, where = plan_access(code, self.index, self.dataset.schema.names)
+        self._last_run = run
+        try:
+            return self.dataset.read(columns, where)
+        except (pa.ArrowNotImplementedError, pa.ArrowInvalid, pa.ArrowTypeError):
+            # A constant the column's type cannot be compared with; filter in pandas instead
+            return self.dataset.read(columns)
+
+
+def bind_agent(agent: Any) -> None:
+    """Let an Agent's out-of-core connectors see the code it executes."""
+    for connector in agent.context.dfs:
+        if isinstance(connector, OutOfCoreConnector):
+            connector.bind(agent.context)
+
+
+def persist_upload(file: Any, index: int) -> List[OutOfCoreConnector]:
+    """
+    Store an uploaded file as out-of-core datasets and return their connectors.
+
+    CSV/TSV files are streamed through Arrow's block-wise CSV reader straight into
+    Parquet, so a file larger than memory is never held in memory. The column and row
+    load options are applied while streaming. Excel sheets are read as usual and then
+    stored. Datasets are keyed by content, so uploading the same file again reuses them.
+
+    Args:
+        file (Any): The uploaded file.
+        index (int): Position of the first dataset in the Agent's ``dfs``.
+
+    Returns:
+        List[OutOfCoreConnector]: One connector per dataset.
+    """
+    if file.name.endswith(('.csv', '.tsv')):
+        sep = ',' if file.name.endswith('.csv') else '\t'
+        options = st.session_state.get('file_load_options') or {}
+        key = f"{fingerprint_file(file)}-{fingerprint_options(sep=sep, **options)[:16]}"
+        dataset = DATASET_STORE.open(key, file.name) or _stream_delimited(file, key, sep, options)
+        return [OutOfCoreConnector(dataset, index)]
+
+    key = f"{fingerprint_file(file)}-{fingerprint_options(sheets=st.session_state.get('selected_sheets'))[:16]}"
+    connectors = []
+    for i, df in enumerate(handle_file(file)):
+        name = f"{file.name} ({i + 1})"
+        dataset = DATASET_STORE.open(f"{key}-{i}", name)
+        if dataset is None:
+            writer = DATASET_STORE.writer(f"{key}-{i}", name)
+            try:
+                writer.write(df)
+            except BaseException:
+                writer.abort()
+                raise
+            dataset = writer.commit()
+        connectors.append(OutOfCoreConnector(dataset, index + i))
+    return connectors
+
+
+def _stream_delimited(file: Any, key: str, sep: str, options: Dict[str, Any]) -> OutOfCoreDataset:
+    file.seek(0)
+    columns, where = options.get('columns') or [], options.get('where') or []
+    # The filter columns are parsed too, and dropped once the rows are filtered
+    include = list(dict.fromkeys(columns + [col for col, *_ in where])) or None
+    convert = pa_csv.ConvertOptions(include_columns=include)
+    reader = pa_csv.open_csv(file, parse_options=pa_csv.ParseOptions(delimiter=sep), convert_options=convert)
+    expression = filter_expression(where)
+    limit = options.get('limit')
+    writer = DATASET_STORE.writer(key, file.name)
+    progress = st.progress(0.0, text=f"Storing {file.name}...")
+    try:
+        for batch in reader:
+            table = pa.Table.from_batches([batch])
+            if expression is not None:
+                table = table.filter(expression)
+                if columns:
+                    table = table.select(columns)
+            if limit and writer.rows + table.num_rows > limit:
+                table = table.slice(0, limit - writer.rows)
+            writer.write_table(table)
+            done = min(1.0, file.tell() / file.size) if file.size else 1.0
+            progress.progress(done, text=f"Storing {file.name}: {writer.rows:,} rows")
+            if limit and writer.rows >= limit:
+                break
+        if writer.rows == 0:
+            # Keep the columns of a file without matching rows
+            schema = reader.schema
+            writer.write_table(schema.empty_table().select(columns) if columns else schema.empty_table())
+    except BaseException:
+        writer.abort()
+        raise
+    finally:
+        progress.empty()
+    return writer.commit()
+
+
+def handle_uploaded_files_out_of_core(uploaded_files: Any) -> List[OutOfCoreConnector]:
+    """
+    Store uploaded files as out-of-core datasets, see persist_upload.
+
+    Args:
+        uploaded_files (Any): A list of uploaded files or a single file.
+
+    Returns:
+        List[OutOfCoreConnector]: The connectors the Agent works on.
+    """
+    files = uploaded_files if isinstance(uploaded_files, list) else [uploaded_files]
+    connectors: List[OutOfCoreConnector] = []
+    for file in files:
+        try:
+            connectors.extend(persist_upload(file, len(connectors)))
+        except (ValueError, OSError, pa.ArrowException) as e:
+            st.error(f"Error storing file '{file.name}': {e}")
+    return connectors
+
+
+def persist_query(connector: Any) -> OutOfCoreConnector:
+    """
+    Stream the result of a single-table database connector into an out-of-core dataset.
+
+    The rows are fetched in batches of the connector's batch size on a connection of
+    their own and written to Parquet as they arrive, so the result may be larger than
+    memory; the connector's memory cap does not apply. Datasets are keyed by the
+    connection and the query, so every session running the same query reuses one; as
+    the table's rows can change, a dataset is only reused for DB_RESULT_TTL_SECONDS
+    after it was stored. A session keeps its dataset while the query stays the same.
+
+    Args:
+        connector (Any): A connector with the pushdown query support of database_hanlders.
+
+    Returns:
+        OutOfCoreConnector: The connector the Agent works on.
+    """
+    # The SQL text leaves out bound values such as the limit, so the options are keyed instead
+    key = fingerprint_options(connection=st.session_state.get('connector_key'), table=connector.config.table,
+                              columns=connector.columns, where=connector.where, limit=connector.limit,
+                              sample=connector.sample)
+    cached = st.session_state.get('out_of_core_query')
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    name = connector.config.table
+    # A new snapshot of the table every DB_RESULT_TTL_SECONDS; older ones are evicted as least recently used
+    store_key = f"query-{key[:32]}-{int(time.time() // DB_RESULT_TTL_SECONDS)}"
+    dataset = OutOfCoreConnector(DATASET_STORE.open(store_key, name) or _stream_query(connector, store_key), 0)
+    st.session_state['out_of_core_query'] = (key, dataset)
+    return dataset
+
+
+def _stream_query(connector: Any, key: str) -> OutOfCoreDataset:
+    name = connector.config.table
+    writer = DATASET_STORE.writer(key, name)
+    progress = st.progress(0.0, text=f"Storing {name}...")
+    connection = connector._engine.connect()
+    try:
+        result = connection.execution_options(yield_per=connector.batch_size).execute(connector.build_query())
+        columns = list(result.keys())
+        for batch in result.partitions():
+            writer.write(pd.DataFrame.from_records(batch, columns=columns, coerce_float=True))
+            done = writer.rows / connector.limit if connector.limit else 0.0
+            progress.progress(min(1.0, done), text=f"Storing {name}: {writer.rows:,} rows")
+        if writer.rows == 0:
+            writer.write(pd.DataFrame(columns=columns))
+        result.close()
+    except BaseException:
+        writer.abort()
+        raise
+    finally:
+        connection.close()
+        progress.empty()
+    return writer.commit()
@@ -0,0 +1,94 @@
+# src/hanlders/preview_handlers.py
+import threading
+import pandas as pd
+import pyarrow as pa
+from collections import OrderedDict
+from typing import Optional, Tuple, Union
+from utils.contsant import PREVIEW_CACHE_MAX_BYTES, PREVIEW_PAGE_ROWS
+from utils.fingerprint import fingerprint_frame
+
+PageKey = Tuple[str, int, int]
+
+
+class PreviewCache:
+    """
+    Size-bounded LRU cache of data preview pages, already converted to Arrow.
+
+    ``st.dataframe`` converts a DataFrame to Arrow on every rerun before sending it to
+    the browser. Pages are cached as Arrow tables keyed by the frame's content
+    fingerprint, the page number and the page size, so an unchanged preview is not
+    converted again while the user types a question.
+
+    Attributes:
+        max_bytes (int): Maximum total size of the cached pages.
+    """
+
+    def __init__(self, max_bytes: int = PREVIEW_CACHE_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._pages: "OrderedDict[PageKey, pa.Table]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: PageKey) -> Optional[pa.Table]:
+        """Return the cached page for a key, or None on a miss."""
+        with self._lock:
+            page = self._pages.get(key)
+            if page is not None:
+                self._pages.move_to_end(key)
+            return page
+
+    def put(self, key: PageKey, page: pa.Table) -> None:
+        """Store a page and evict the least recently used ones if over budget."""
+        if page.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._pages:
+                self._size -= self._pages.pop(key).nbytes
+            self._pages[key] = page
+            self._size += page.nbytes
+            while self._size > self.max_bytes:
+                _, evicted = self._pages.popitem(last=False)
+                self._size -= evicted.nbytes
+
+
+# Shared by every session of the Streamlit server
+PREVIEW_CACHE = PreviewCache()
+
+
+def page_count(df: pd.DataFrame, page_rows: int = PREVIEW_PAGE_ROWS) -> int:
+    """Return the number of preview pages of a DataFrame; an empty one still has one page."""
+    return max(1, -(-len(df) // page_rows))
+
+
+def preview_page(df: pd.DataFrame, page: int, page_rows: int = PREVIEW_PAGE_ROWS) -> Union[pa.Table, pd.DataFrame]:
+    """
+    Return one page of a DataFrame as an Arrow table, ready for ``st.dataframe``.
+
+    Only the rows of the page are converted; the row labels are kept so the preview
+    shows the rows' positions in the full frame. Frames with duplicated column names,
+    which Arrow tables cannot hold, and pages Arrow cannot convert, e.g. object columns
+    mixing numbers and strings, are returned as a DataFrame slice instead.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to preview.
+        page (int): The zero-based page number.
+        page_rows (int): Rows per page.
+
+    Returns:
+        Union[pa.Table, pd.DataFrame]: The page.
+    """
+    key = (fingerprint_frame(df), page, page_rows)
+    table = PREVIEW_CACHE.get(key)
+    if table is None:
+        window = df.iloc[page * page_rows:(page + 1) * page_rows]
+        if not window.columns.is_unique:
+            return window
+        # Arrow needs string column names
+        window = window.rename(columns=str) if not all(isinstance(col, str) for col in window.columns) else window
+        try:
+            table = pa.Table.from_pandas(window, preserve_index=True)
+        except (pa.ArrowTypeError, pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            # Object columns mixing types, e.g. numbers and strings; st.dataframe converts those itself
+            return window
+        PREVIEW_CACHE.put(key, table)
+    return table
@@ -0,0 +1,239 @@
+# src/hanlders/profile_handlers.py
+import threading
+import pandas as pd
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from pandasai.connectors import PandasConnector
+from utils.contsant import PROFILE_CACHE_MAX_ENTRIES, PROFILE_TOP_VALUES, PROFILE_VALUE_MAX_CHARS
+from utils.contsant import PROFILE_HIGH_CARDINALITY
+from utils.fingerprint import fingerprint_frame
+
+
+def profile_series(col: pd.Series) -> Dict[str, Any]:
+    """
+    Summarise one column: dtype, null rate, cardinality, range and most frequent values.
+
+    Min and max are computed for numeric and datetime columns, the most frequent values
+    for every other column.
+
+    Args:
+        col (pd.Series): The column to summarise.
+
+    Returns:
+        Dict[str, Any]: The column's summary.
+    """
+    non_null = col.dropna()
+    summary: Dict[str, Any] = {
+        'dtype': str(col.dtype),
+        'null_rate': 1 - len(non_null) / len(col) if len(col) else 0.0,
+    }
+    try:
+        summary['distinct'] = int(non_null.nunique())
+    except TypeError:
+        # Unhashable values such as lists or dicts
+        return summary
+    if non_null.empty:
+        return summary
+    if (pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_bool_dtype(col)) \
+            or pd.api.types.is_datetime64_any_dtype(col):
+        summary['min'] = non_null.min()
+        summary['max'] = non_null.max()
+    else:
+        summary['top'] = non_null.value_counts().head(PROFILE_TOP_VALUES).index.tolist()
+    return summary
+
+
+def profile_frame(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Summarise every column of a DataFrame, see profile_series.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to profile.
+
+    Returns:
+        List[Dict[str, Any]]: One summary per column, with its name under 'column'.
+    """
+    return [{'column': str(df.columns[i]), **profile_series(df.iloc[:, i])} for i in range(df.shape[1])]
+
+
+def format_profile(profile: List[Dict[str, Any]], max_chars: int = PROFILE_VALUE_MAX_CHARS,
+                   top_values: int = PROFILE_TOP_VALUES) -> str:
+    """
+    Render a profile as one compact line per column, for the LLM prompt.
+
+    Example line: ``region (string): 2% null, 4 distinct, top EU | US | APAC``.
+
+    Args:
+        profile (List[Dict[str, Any]]): The profile built by profile_frame, or a subset of its columns.
+        max_chars (int): Longest value quoted, longer ones are cut.
+        top_values (int): Most frequent values listed per column.
+
+    Returns:
+        str: The profile as text.
+    """
+    lines = []
+    for summary in profile:
+        parts = [f"{summary['null_rate']:.0%} null"]
+        if 'distinct' in summary:
+            parts.append(f"{summary['distinct']:,} distinct")
+        if 'min' in summary:
+            parts.append(f"min {_format_value(summary['min'], max_chars)}, max {_format_value(summary['max'], max_chars)}")
+        if summary.get('top') and top_values:
+            parts.append("top " + " | ".join(_format_value(value, max_chars) for value in summary['top'][:top_values]))
+        lines.append(f"{summary['column']} ({summary['dtype']}): {', '.join(parts)}")
+    return "\n".join(lines)
+
+
+def profile_table(profile: List[Dict[str, Any]], max_chars: int = PROFILE_VALUE_MAX_CHARS) -> pd.DataFrame:
+    """
+    Render a profile as a table with one row per column, for display.
+
+    Args:
+        profile (List[Dict[str, Any]]): The profile built by profile_frame.
+        max_chars (int): Longest value shown, longer ones are cut.
+
+    Returns:
+        pd.DataFrame: The column, dtype, null rate, distinct count, range and top values.
+    """
+    return pd.DataFrame({
+        'column': [summary['column'] for summary in profile],
+        'dtype': [summary['dtype'] for summary in profile],
+        'null %': [round(100 * summary['null_rate'], 1) for summary in profile],
+        'distinct': [summary.get('distinct') for summary in profile],
+        # Values of mixed types are shown as text so the table converts to Arrow
+        'min': [_format_value(summary['min'], max_chars) if 'min' in summary else None for summary in profile],
+        'max': [_format_value(summary['max'], max_chars) if 'max' in summary else None for summary in profile],
+        'top': [" | ".join(_format_value(value, max_chars) for value in summary.get('top', [])) or None
+                for summary in profile],
+    })
+
+
+def _format_value(value: Any, max_chars: int) -> str:
+    text = str(value).replace('"', "'").replace('\n', ' ')
+    if len(text) > max_chars:
+        text = text[:max_chars - 3] + '...'
+    return text
+
+
+def rank_columns(profile: List[Dict[str, Any]]) -> List[int]:
+    """
+    Order a profile's columns from most to least useful for answering questions.
+
+    Constant and empty columns come last; sparse columns and high-cardinality text
+    columns (identifiers, free text) rank below dense ones. Ties keep the column order.
+
+    Args:
+        profile (List[Dict[str, Any]]): The profile built by profile_frame.
+
+    Returns:
+        List[int]: Column positions, most useful first.
+    """
+    def value(summary: Dict[str, Any]) -> float:
+        if summary.get('distinct', 2) <= 1:
+            return 0.0
+        score = 1 - summary['null_rate']
+        if 'top' in summary and summary.get('distinct', 0) > PROFILE_HIGH_CARDINALITY:
+            score /= 2
+        return score
+
+    return sorted(range(len(profile)), key=lambda i: -value(profile[i]))
+
+
+class ProfileCache:
+    """
+    LRU cache of DataFrame profiles keyed by the DataFrame's content fingerprint.
+
+    Profiling scans every column once; the same data uploaded again, re-read on a
+    rerun or opened by another session gets its profile from here.
+
+    Attributes:
+        max_entries (int): Maximum number of cached profiles.
+    """
+
+    def __init__(self, max_entries: int = PROFILE_CACHE_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the cached profile for a fingerprint, or None on a miss."""
+        with self._lock:
+            profile = self._entries.get(key)
+            if profile is not None:
+                self._entries.move_to_end(key)
+            return profile
+
+    def put(self, key: str, profile: List[Dict[str, Any]]) -> None:
+        """Store a profile and evict the least recently used ones if over the limit."""
+        with self._lock:
+            self._entries[key] = profile
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# Shared by every session of the Streamlit server
+PROFILE_CACHE = ProfileCache()
+
+
+def get_profile(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Return the profile of a DataFrame, computing and caching it on first use.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to profile.
+
+    Returns:
+        List[Dict[str, Any]]: The profile, see profile_frame.
+    """
+    key = fingerprint_frame(df)
+    profile = PROFILE_CACHE.get(key)
+    if profile is None:
+        profile = profile_frame(df)
+        PROFILE_CACHE.put(key, profile)
+    return profile
+
+
+def profile_frames(dfs: List[Any]) -> None:
+    """
+    Profile freshly ingested DataFrames so the first question does not wait for it.
+
+    Database tables that are loaded on demand are skipped; they are described by their
+    catalog metadata.
+
+    Args:
+        dfs (List[Any]): The ingested DataFrames.
+    """
+    for df in dfs:
+        if isinstance(df, pd.DataFrame):
+            get_profile(df)
+
+
+def describe_frame(df: pd.DataFrame, max_chars: int = PROFILE_VALUE_MAX_CHARS, top_values: int = PROFILE_TOP_VALUES,
+                   column_share: float = 1.0) -> PandasConnector:
+    """
+    Wrap a DataFrame for the Agent so the prompt carries its profile instead of sample rows.
+
+    The DataFrame becomes a PandasConnector whose description is the formatted profile
+    and whose head has no rows, so PandasAI serializes the column names, the row count
+    and one summary line per column.
+
+    Args:
+        df (pd.DataFrame): The DataFrame the Agent works on.
+        max_chars (int): Longest value quoted in the profile.
+        top_values (int): Most frequent values listed per column.
+        column_share (float): Share of the columns described, the most useful ones
+            first (see rank_columns); the others are left out of the prompt.
+
+    Returns:
+        PandasConnector: The connector to pass to ``Agent(dfs=...)``.
+    """
+    profile = get_profile(df)
+    keep = len(profile) if column_share >= 1 else max(1, int(len(profile) * column_share))
+    positions = sorted(rank_columns(profile)[:keep])
+    return PandasConnector(
+        {'original_df': df},
+        description=format_profile([profile[i] for i in positions], max_chars, top_values),
+        custom_head=df.iloc[:0, positions],
+    )
+
@@ -0,0 +1,177 @@
+# src/hanlders/result_cache_handlers.py
+import re
+import time
+import pickle
+import pathlib
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+from utils.contsant import RESULT_CACHE_PATH, RESULT_CACHE_TTL_SECONDS, RESULT_CACHE_MAX_ENTRIES
+from utils.fingerprint import fingerprint_options
+
+ROOT_DIR = pathlib.Path(__file__).parent.parent.parent
+
+
+# A quoted literal: quotes not inside a word, so the apostrophe of "what's" does not open one
+QUOTED_LITERAL = re.compile(r"""(?<!\w)(["'`])(.*?)\1(?!\w)""")
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normalize a question so trivially different phrasings share a cache entry.
+
+    Case, surrounding whitespace, repeated whitespace and trailing punctuation are ignored,
+    except inside quoted literals such as ``'North'``, which the generated code may
+    compare values with.
+
+    Args:
+        question (str): The question as typed or transcribed.
+
+    Returns:
+        str: The normalized question.
+    """
+    parts, last = [], 0
+    for match in QUOTED_LITERAL.finditer(question):
+        parts.append(re.sub(r'\s+', ' ', question[last:match.start()]).lower())
+        parts.append(match.group(0))
+        last = match.end()
+    parts.append(re.sub(r'\s+', ' ', question[last:]).lower())
+    return ''.join(parts).strip().rstrip('?.! ')
+
+
+def conversation_options(history: Sequence[str]) -> Dict[str, List[str]]:
+    """Return the key options of the questions a follow-up continues; none for a new conversation."""
+    # A question starting a conversation is keyed by itself alone
+    return {'history': [normalize_question(question) for question in history]} if history else {}
+
+
+class ResultCache:
+    """
+    Persistent cache of answers keyed by dataset fingerprint and normalized question.
+
+    Answers are stored in a local SQLite database, so they survive server restarts and
+    are shared by every session. Entries older than ``ttl`` seconds are ignored and
+    removed; beyond ``max_entries`` the least recently used entries are dropped.
+
+    Attributes:
+        path (pathlib.Path): The SQLite database file.
+        ttl (float): Seconds an entry stays valid.
+        max_entries (int): Maximum number of entries kept.
+    """
+
+    table = 'results'
+
+    def __init__(self, path: str = RESULT_CACHE_PATH, ttl: float = RESULT_CACHE_TTL_SECONDS,
+                 max_entries: int = RESULT_CACHE_MAX_ENTRIES) -> None:
+        self.path = ROOT_DIR.joinpath(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._initialized = False
+
+    @staticmethod
+    def key(data_fingerprint: str, question: str, history: Sequence[str] = ()) -> str:
+        """Build the cache key for a dataset and a question, following up on the questions in history."""
+        return fingerprint_options(data=data_fingerprint, question=normalize_question(question),
+                                   **conversation_options(history))
+
+    def get(self, key: str, ttl: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached response for a key, or None on a miss or an expired entry.
+
+        Args:
+            key (str): The cache key.
+            ttl (Optional[float]): Seconds the entry stays valid if shorter than the cache's own ttl.
+
+        Returns:
+            Optional[Dict[str, Any]]: The cached response, marked with ``cached=True``.
+        """
+        response = self.load(key, ttl)
+        if response is not None:
+            response['cached'] = True
+        return response
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        """
+        Store a response built by build_response.
+
+        Args:
+            key (str): The cache key.
+            response (Dict[str, Any]): The response to store.
+        """
+        self.store(key, {**response, 'cached': False})
+
+    def load(self, key: str, ttl: Optional[float] = None) -> Optional[Any]:
+        """Return the unpickled value stored under a key, or None on a miss or an entry older than ttl."""
+        now = time.time()
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._connect() as connection:
+            row = connection.execute(f"SELECT payload, created_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > ttl:
+                connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return None
+            connection.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+        try:
+            return pickle.loads(row[0])
+        except Exception:
+            # Written by an incompatible version of a library; treat as a miss
+            return None
+
+    def store(self, key: str, value: Any) -> None:
+        """Pickle and store a value, then drop expired and least recently used entries."""
+        now = time.time()
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._connect() as connection:
+            connection.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, payload, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, payload, now, now),
+            )
+            connection.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (now - self.ttl,))
+            connection.execute(
+                f"DELETE FROM {self.table} WHERE key NOT IN "
+                f"(SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection for one transaction, creating the table on first use."""
+        if not self._initialized:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            if not self._initialized:
+                connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                    "key TEXT PRIMARY KEY, payload BLOB NOT NULL, "
+                    "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+                )
+                self._initialized = True
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+
+class CodeReplayStore(ResultCache):
+    """
+    Persistent store of generated code keyed by schema signature and normalized question.
+
+    When the same question is asked of data with the same columns and dtypes (a
+    refreshed upload or a re-pulled table), the stored code and its explanation can be
+    replayed with replay_code instead of asking the LLM again.
+    """
+
+    table = 'replays'
+
+    @staticmethod
+    def key(signature: str, question: str, history: Sequence[str] = ()) -> str:
+        """Build the store key for a schema signature and a question, following up on the questions in history."""
+        return fingerprint_options(schema=signature, question=normalize_question(question),
+                                   **conversation_options(history))
+
+
+# Shared by every session of the Streamlit server
+RESULT_CACHE = ResultCache()
+CODE_REPLAYS = CodeReplayStore()
@@ -0,0 +1,149 @@
+# src/hanlders/result_handlers.py
+import threading
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from pandasai import Agent
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from .chart_handlers import capture_charts
+from .outofcore_handlers import OutOfCoreConnector
+from .streaming_handlers import TOKEN_SINK, DeferredTokenStream
+
+RESULT_TYPES = ('string', 'number', 'dataframe', 'plot')
+# Generates explanations in the background while the rest of an answer renders
+EXPLAINERS = ThreadPoolExecutor(max_workers=4, thread_name_prefix='explain')
+
+
+def build_response(agent: Agent, charts: List[bytes]) -> Dict[str, Any]:
+    """
+    Collect everything display_results needs from an Agent that has answered a question.
+
+    Plot results hold the PNG bytes captured while the Agent ran, see
+    chart_handlers.capture_charts, and the same buffer backs both the image and its
+    download button. The explanation is a second LLM
+    round-trip, so it is started in the background and returned as a Future that
+    display_results resolves after rendering the result, code and chart. While
+    responses are streamed, the explanation is streamed as well, into the stream
+    returned as ``explanation_stream``, which display_results attaches to its place.
+
+    Args:
+        agent (Agent): The Agent after ``agent.chat``.
+        charts (List[bytes]): The charts captured while the Agent answered.
+
+    Returns:
+        Dict[str, Any]: The result, generated code, explanation (a Future, or None without a result),
+        explanation stream (None unless streaming) and chart bytes.
+    """
+    result = agent.last_result
+    chart = charts[-1] if charts else None
+    if result is not None and result['type'] == 'plot' and chart is not None:
+        result = {'type': 'plot', 'value': chart}
+    stream = DeferredTokenStream() if result is not None and TOKEN_SINK.get() is not None else None
+    return {
+        'result': result,
+        'code': agent.last_code_executed,
+        'explanation': submit_explanation(agent, stream) if result is not None else None,
+        'explanation_stream': stream,
+        'chart': chart,
+        'cached': False,
+    }
+
+
+def submit_explanation(agent: Agent, stream: Optional[DeferredTokenStream] = None) -> Future:
+    """
+    Start generating an Agent's explanation of its last answer on EXPLAINERS.
+
+    The worker runs in a copy of the caller's context, attached to the caller's
+    Streamlit script run, so it sees the same context variables and can render.
+
+    Args:
+        agent (Agent): The Agent after ``agent.chat``.
+        stream (Optional[DeferredTokenStream]): Receives the explanation as it is generated.
+
+    Returns:
+        Future: Resolves to the explanation.
+    """
+    ctx = get_script_run_ctx()
+    context = contextvars.copy_context()
+    # The answer's own stream is cleared once it is rendered; the explanation gets its own
+    context.run(TOKEN_SINK.set, stream)
+
+    def explain() -> str:
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return agent.explain()
+
+    return EXPLAINERS.submit(context.run, explain)
+
+
+def replay_code(code: str, dfs: List[pd.DataFrame],
+                functions: Optional[Dict[str, Callable]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Execute previously generated analysis code against new DataFrames.
+
+    The code is run the way PandasAI runs it: with the DataFrames bound to ``dfs`` and
+    the answer read from the ``result`` variable it assigns. The DataFrames are passed
+    as shallow copies so the code cannot drop or add columns of the session's data.
+    Database tables that are not loaded yet are only loaded if the code uses them.
+
+    Args:
+        code (str): Code previously executed by the Agent.
+        dfs (List[pd.DataFrame]): The DataFrames, or lazily loaded tables, to run it against.
+        functions (Optional[Dict[str, Callable]]): Functions the code may call besides pandas,
+            such as ``execute_sql_query``, by name.
+
+    Returns:
+        Optional[Dict[str, Any]]: The ``{'type': ..., 'value': ...}`` result, or None if the code failed
+        or did not produce a valid result.
+    """
+    environment = {'pd': pd, 'np': np, 'plt': plt, **(functions or {})}
+    # pyplot's figures are shared by every session, close only the ones this replay opens
+    figures = set(plt.get_fignums())
+    with capture_charts() as charts:
+        try:
+            # Loading out-of-core data can fail as well, e.g. with MemoryError
+            environment['dfs'] = replay_frames(code, dfs)
+            exec(code, environment)
+        except Exception:
+            return None
+        finally:
+            for number in set(plt.get_fignums()) - figures:
+                plt.close(number)
+    result = environment.get('result')
+    if not isinstance(result, dict) or result.get('type') not in RESULT_TYPES or 'value' not in result:
+        return None
+    if result['type'] == 'plot' and charts:
+        # Without a capture the value is the path the chart was saved to
+        result = {'type': 'plot', 'value': charts[-1]}
+    return result
+
+
+def replay_frames(code: str, dfs: List[Any]) -> List[Optional[pd.DataFrame]]:
+    """
+    Return shallow copies of the DataFrames a piece of code runs against.
+
+    Lazily loaded tables are loaded only when the code references their ``dfs[<index>]``
+    or iterates over all of them, the same rule PandasAI applies; the others are None.
+    Of out-of-core datasets only the columns and rows the code uses are loaded.
+
+    Args:
+        code (str): The code to run.
+        dfs (List[Any]): DataFrames or lazily loaded tables.
+
+    Returns:
+        List[Optional[pd.DataFrame]]: The DataFrames, in the order of dfs.
+    """
+    uses_all = 'for df in dfs' in code or 'pd.concat(dfs' in code
+    frames = []
+    for i, df in enumerate(dfs):
+        if isinstance(df, pd.DataFrame):
+            frames.append(df.copy(deep=False))
+        elif isinstance(df, OutOfCoreConnector) and (uses_all or f'dfs[{i}]' in code):
+            frames.append(df.load(code))
+        elif uses_all or f'dfs[{i}]' in code:
+            frames.append(df.execute().copy(deep=False))
+        else:
+            frames.append(None)
+    return frames
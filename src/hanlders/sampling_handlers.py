@@ -0,0 +1,30 @@
+# src/hanlders/sampling_handlers.py
+import numpy as np
+import pandas as pd
+
+
+def reservoir_update(sample: pd.DataFrame, chunk: pd.DataFrame, rows_seen: int,
+                     rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Feed a chunk through a reservoir sample so that every row read so far is kept with equal probability.
+
+    Args:
+        sample (pd.DataFrame): The current reservoir.
+        chunk (pd.DataFrame): The next rows of the file.
+        rows_seen (int): Number of rows read before this chunk.
+        rng (np.random.Generator): Random generator.
+
+    Returns:
+        pd.DataFrame: The updated reservoir, of the same size.
+    """
+    capacity = len(sample)
+    positions = np.arange(rows_seen + 1, rows_seen + len(chunk) + 1)
+    slots = (rng.random(len(chunk)) * positions).astype(np.int64)
+    accepted = np.nonzero(slots < capacity)[0]
+    if not len(accepted):
+        return sample
+    # A later row replacing the same slot wins, as in the sequential algorithm
+    slots, first = np.unique(slots[accepted][::-1], return_index=True)
+    rows = accepted[::-1][first]
+    kept = sample.drop(index=sample.index[slots])
+    return pd.concat([kept, chunk.iloc[rows]], ignore_index=True)
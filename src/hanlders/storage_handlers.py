@@ -0,0 +1,246 @@
+# src/hanlders/storage_handlers.py
+import os
+import json
+import pathlib
+import shutil
+import tempfile
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+from typing import Any, List, Optional
+from utils.contsant import COLUMNAR_CACHE_DIR, COLUMNAR_CACHE_MAX_BYTES
+from utils.fingerprint import fingerprint_file, fingerprint_options
+
+ROOT_DIR = pathlib.Path(__file__).parent.parent.parent
+# Schema metadata key under which DataFrame.attrs are stored, since Arrow drops them
+ATTRS_METADATA_KEY = b'deltax.attrs'
+
+
+def to_arrow(df: pd.DataFrame) -> pa.Table:
+    """Convert a DataFrame to an Arrow table, keeping its attrs in the schema metadata."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if df.attrs:
+        metadata = dict(table.schema.metadata or {})
+        metadata[ATTRS_METADATA_KEY] = json.dumps(df.attrs, default=str).encode('utf-8')
+        table = table.replace_schema_metadata(metadata)
+    return table
+
+
+def from_arrow(table: pa.Table) -> pd.DataFrame:
+    """Convert an Arrow table written by to_arrow back to a DataFrame with its attrs."""
+    df = table.to_pandas()
+    attrs = (table.schema.metadata or {}).get(ATTRS_METADATA_KEY)
+    if attrs:
+        df.attrs.update(json.loads(attrs))
+    return df
+
+
+class ColumnarCache:
+    """
+    On-disk cache of parsed datasets stored as uncompressed Arrow IPC files.
+
+    Each entry is a directory named after the content fingerprint of the source and the
+    reader options, holding one ``<n>.arrow`` file per DataFrame. Uncompressed IPC files
+    can be memory-mapped, so a cached dataset is loaded without parsing any text and
+    survives browser refreshes and server restarts. Once the cache grows past its size
+    limit the least recently used entries are removed.
+
+    Attributes:
+        directory (pathlib.Path): Directory holding the cache entries.
+        max_bytes (int): Maximum disk space used by the cache.
+    """
+
+    def __init__(self, directory: str = COLUMNAR_CACHE_DIR, max_bytes: int = COLUMNAR_CACHE_MAX_BYTES) -> None:
+        self.directory = ROOT_DIR.joinpath(directory)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(file: Any, **options: Any) -> str:
+        """Build the cache key for an uploaded file and the options used to read it."""
+        return f"{fingerprint_file(file)}-{fingerprint_options(**options)[:16]}"
+
+    def path(self, key: str) -> pathlib.Path:
+        """Return the directory of a cache entry."""
+        return self.directory.joinpath(key)
+
+    def load(self, key: str) -> Optional[List[pd.DataFrame]]:
+        """
+        Load the DataFrames of a cache entry by memory-mapping its Arrow files.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[List[pd.DataFrame]]: The cached DataFrames, or None if the entry is missing or unreadable.
+        """
+        entry = self.path(key)
+        if not entry.is_dir():
+            return None
+        try:
+            dfs = [from_arrow(self.read_table(path)) for path in self._files(entry)]
+        except (OSError, pa.ArrowException) as e:
+            st.warning(f"Ignoring unreadable cache entry '{key}': {e}")
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+        # Mark the entry as recently used for the eviction policy
+        os.utime(entry)
+        return dfs
+
+    @staticmethod
+    def read_table(path: pathlib.Path) -> pa.Table:
+        """Memory-map a single Arrow IPC file and return it as an Arrow table."""
+        # The table's buffers keep the mapping alive, so the source is not closed here
+        source = pa.memory_map(str(path), 'r')
+        return pa.ipc.open_file(source).read_all()
+
+    def save(self, key: str, dfs: List[pd.DataFrame]) -> bool:
+        """
+        Write DataFrames to the cache as one Arrow IPC file each.
+
+        The entry is written to a temporary directory first and renamed into place, so a
+        concurrent reader never sees a partially written entry. Frames that Arrow cannot
+        represent (e.g. mixed-type object columns) are not cached.
+
+        Args:
+            key (str): The cache key.
+            dfs (List[pd.DataFrame]): The DataFrames to store.
+
+        Returns:
+            bool: True if the entry was written, False otherwise.
+        """
+        if not dfs or any(not all(isinstance(col, str) for col in df.columns) for df in dfs):
+            # Arrow stringifies column labels, which would not round-trip
+            return False
+        self.directory.mkdir(parents=True, exist_ok=True)
+        staging = pathlib.Path(tempfile.mkdtemp(dir=self.directory, prefix='.tmp-'))
+        try:
+            for i, df in enumerate(dfs):
+                table = to_arrow(df)
+                with pa.OSFile(str(staging.joinpath(f"{i}.arrow")), 'wb') as sink:
+                    with pa.ipc.new_file(sink, table.schema) as writer:
+                        writer.write_table(table)
+            entry = self.path(key)
+            if entry.exists():
+                shutil.rmtree(entry, ignore_errors=True)
+            os.replace(staging, entry)
+        except (OSError, pa.ArrowException):
+            shutil.rmtree(staging, ignore_errors=True)
+            return False
+        self.evict()
+        return True
+
+    def writer(self, key: str) -> "ColumnarWriter":
+        """
+        Open a writer that streams DataFrame chunks into a single-frame cache entry.
+
+        Args:
+            key (str): The cache key of the entry to create.
+
+        Returns:
+            ColumnarWriter: The writer; call commit() to publish the entry or abort() to discard it.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return ColumnarWriter(self, key)
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits its size limit."""
+        usage = {}
+        for path in self.directory.iterdir():
+            if not path.is_dir() or path.name.startswith('.tmp-'):
+                continue
+            try:
+                usage[path] = (path.stat().st_mtime, sum(f.stat().st_size for f in path.iterdir()))
+            except OSError:
+                # Removed by a concurrent eviction
+                continue
+        total = sum(size for _, size in usage.values())
+        for path, (_, size) in sorted(usage.items(), key=lambda item: item[1][0]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    @staticmethod
+    def _files(entry: pathlib.Path) -> List[pathlib.Path]:
+        """Return the Arrow files of an entry in the order they were written."""
+        return sorted(entry.glob('*.arrow'), key=lambda p: int(p.stem))
+
+
+class ColumnarWriter:
+    """
+    Incrementally writes DataFrame chunks into one Arrow IPC file of a cache entry.
+
+    Chunks are appended as record batches, so a dataset larger than memory can be
+    persisted while only one chunk is held at a time. Every chunk must share the
+    schema of the first one; chunks are cast to it where Arrow allows.
+
+    Attributes:
+        cache (ColumnarCache): The cache the entry belongs to.
+        key (str): The cache key of the entry being written.
+    """
+
+    def __init__(self, cache: ColumnarCache, key: str) -> None:
+        self.cache = cache
+        self.key = key
+        self._staging = pathlib.Path(tempfile.mkdtemp(dir=cache.directory, prefix='.tmp-'))
+        self._sink = None
+        self._writer = None
+        self._schema = None
+
+    @property
+    def file(self) -> pathlib.Path:
+        """The Arrow file of the entry, for writers that produce it themselves, e.g. Polars' sink_ipc."""
+        return self._staging.joinpath('0.arrow')
+
+    def write(self, df: pd.DataFrame) -> None:
+        """
+        Append a chunk to the entry.
+
+        Raises:
+            pa.ArrowException: If the chunk cannot be converted to the entry's schema.
+        """
+        self.write_table(to_arrow(df))
+
+    def write_table(self, table: pa.Table) -> None:
+        """
+        Append an Arrow table to the entry, e.g. one read by Polars.
+
+        Raises:
+            pa.ArrowException: If the table cannot be converted to the entry's schema.
+        """
+        if self._writer is None:
+            self._schema = table.schema
+            self._sink = pa.OSFile(str(self.file), 'wb')
+            self._writer = pa.ipc.new_file(self._sink, self._schema)
+        elif not table.schema.equals(self._schema, check_metadata=False):
+            table = table.cast(self._schema)
+        self._writer.write_table(table)
+
+    def commit(self) -> pathlib.Path:
+        """Close the file, publish the entry and return its directory."""
+        self._close()
+        entry = self.cache.path(self.key)
+        if entry.exists():
+            shutil.rmtree(entry, ignore_errors=True)
+        os.replace(self._staging, entry)
+        self.cache.evict()
+        return entry
+
+    def abort(self) -> None:
+        """Close the file and discard everything written so far."""
+        try:
+            self._close()
+        finally:
+            shutil.rmtree(self._staging, ignore_errors=True)
+
+    def _close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+
+
+# Process-wide columnar cache shared by every session
+COLUMNAR_CACHE = ColumnarCache()
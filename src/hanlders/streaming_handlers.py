@@ -0,0 +1,138 @@
+# src/hanlders/streaming_handlers.py
+import time
+import threading
+import contextvars
+import streamlit as st
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+from utils.contsant import STREAM_RENDER_INTERVAL_SECONDS
+
+# The token stream of the question being answered in the current script thread.
+# LLM clients are pooled across sessions, so the sink cannot live on the client.
+TOKEN_SINK: contextvars.ContextVar[Optional["TokenStream"]] = contextvars.ContextVar('token_sink', default=None)
+
+
+class TokenStream:
+    """
+    Receives LLM output while it is generated.
+
+    Each LLM call (code generation, error correction, explanation) is reported as a
+    start(), any number of write() calls with the new text, and an end().
+    """
+
+    def start(self) -> None:
+        """Called when an LLM call starts."""
+
+    def write(self, token: str) -> None:
+        """Called with each piece of generated text."""
+
+    def end(self) -> None:
+        """Called when an LLM call has finished."""
+
+
+class StreamlitTokenStream(TokenStream):
+    """
+    Renders streamed LLM output into a Streamlit container.
+
+    Every LLM call gets its own placeholder below the previous ones. Re-renders are
+    throttled to one every STREAM_RENDER_INTERVAL_SECONDS, since each one sends the
+    whole text so far to the browser.
+
+    Attributes:
+        container (Any): The Streamlit container the output is rendered in.
+    """
+
+    def __init__(self, container: Any) -> None:
+        self.container = container
+        self._placeholder = None
+        self._text = ''
+        self._rendered_at = 0.0
+
+    def start(self) -> None:
+        self._placeholder = self.container.empty()
+        self._text = ''
+        self._rendered_at = 0.0
+
+    def write(self, token: str) -> None:
+        self._text += token
+        now = time.monotonic()
+        if now - self._rendered_at >= STREAM_RENDER_INTERVAL_SECONDS:
+            self._placeholder.markdown(self._text)
+            self._rendered_at = now
+
+    def end(self) -> None:
+        if self._placeholder is not None:
+            self._placeholder.markdown(self._text)
+
+
+class DeferredTokenStream(TokenStream):
+    """
+    Collects LLM output generated in the background until a placeholder is attached.
+
+    Used for output whose place on the page is created after its generation started,
+    such as an answer's explanation: the text written so far is rendered on attach()
+    and later text as it arrives. Writes come from a worker thread, attach() from the
+    script thread.
+    """
+
+    def __init__(self) -> None:
+        self._placeholder = None
+        self._text = ''
+        self._rendered_at = 0.0
+        self._lock = threading.Lock()
+
+    def attach(self, placeholder: Any) -> None:
+        """Render the output into a Streamlit placeholder from now on."""
+        with self._lock:
+            self._placeholder = placeholder
+            if self._text:
+                self._placeholder.markdown(self._text)
+
+    def start(self) -> None:
+        with self._lock:
+            self._text = ''
+            self._rendered_at = 0.0
+
+    def write(self, token: str) -> None:
+        with self._lock:
+            self._text += token
+            now = time.monotonic()
+            if self._placeholder is not None and now - self._rendered_at >= STREAM_RENDER_INTERVAL_SECONDS:
+                self._placeholder.markdown(self._text)
+                self._rendered_at = now
+
+    def end(self) -> None:
+        with self._lock:
+            if self._placeholder is not None:
+                self._placeholder.markdown(self._text)
+
+
+@contextmanager
+def stream_tokens(sink: TokenStream) -> Iterator[TokenStream]:
+    """
+    Send the output of every LLM call made inside the block to a token stream.
+
+    Args:
+        sink (TokenStream): The stream receiving the output.
+    """
+    token = TOKEN_SINK.set(sink)
+    try:
+        yield sink
+    finally:
+        TOKEN_SINK.reset(token)
+
+
+@contextmanager
+def streaming_response() -> Iterator[None]:
+    """
+    Stream LLM output into a temporary area of the page while the block runs.
+
+    The streamed text is cleared once the block exits, so the final answer rendered by
+    display_results replaces it.
+    """
+    area = st.empty()
+    with stream_tokens(StreamlitTokenStream(area.container())):
+        try:
+            yield
+        finally:
+            area.empty()
@@ -0,0 +1,50 @@
+import logging
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pandasai")
+
+from src.hanlders import budget_handlers
+from src.hanlders.budget_handlers import CONTEXT_LEVELS, fit_context
+from utils.contsant import PROMPT_RESERVED_TOKENS
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    # Count four characters per token instead of loading a tiktoken encoding
+    monkeypatch.setattr(budget_handlers, '_encoding', lambda model: None)
+
+    def set_budget(tokens):
+        monkeypatch.setattr(budget_handlers, 'prompt_budget', lambda credentials: ('test-model', tokens))
+    return set_budget
+
+
+def wide_frame():
+    return pd.DataFrame({
+        f'column_{i}': [f'a fairly long text value {j} of column {i}' for j in range(50)] for i in range(60)
+    })
+
+
+def test_full_detail_when_the_context_fits(budget):
+    budget(1_000_000)
+    connectors, usage = fit_context([wide_frame()], {})
+    assert usage['level'] == 0
+    assert len(connectors) == 1
+
+
+def test_detail_is_reduced_until_the_context_fits(budget):
+    budget(1_000_000)
+    _, full = fit_context([wide_frame()], {})
+    budget(PROMPT_RESERVED_TOKENS + full['context_tokens'] // 2)
+    _, usage = fit_context([wide_frame()], {})
+    assert 0 < usage['level'] < len(CONTEXT_LEVELS)
+    assert usage['context_tokens'] <= full['context_tokens'] // 2
+
+
+def test_most_compact_level_is_used_when_nothing_fits(budget, caplog):
+    budget(PROMPT_RESERVED_TOKENS + 1)
+    with caplog.at_level(logging.WARNING, logger=budget_handlers.__name__):
+        _, usage = fit_context([wide_frame()], {})
+    assert usage['level'] == len(CONTEXT_LEVELS) - 1
+    assert "exceeds" in caplog.text
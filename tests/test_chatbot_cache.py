@@ -0,0 +1,85 @@
+import threading
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pandasai")
+pytest.importorskip("streamlit")
+
+from src.hanlders import chatbot_handlers
+from src.hanlders.result_cache_handlers import CodeReplayStore, ResultCache
+
+
+class FakeAgent:
+    def __init__(self):
+        self.questions = []
+        self.memory = []
+        self.last_result = None
+        self.last_code_executed = None
+
+    def start_new_conversation(self):
+        self.memory = []
+
+    def add_message(self, message, is_user=False):
+        self.memory.append((message, is_user))
+
+    def chat(self, query):
+        self.questions.append((query, list(self.memory)))
+        self.last_result = {'type': 'number', 'value': len(self.questions)}
+        self.last_code_executed = "result = {'type': 'number', 'value': 0}"
+
+    def explain(self):
+        return "Counted."
+
+
+# Released each time an answer has been cached
+CACHED = threading.Semaphore(0)
+
+
+@pytest.fixture
+def agent(monkeypatch, tmp_path):
+    agent = FakeAgent()
+    monkeypatch.setattr(chatbot_handlers, 'st', SimpleNamespace(session_state={'prompt_usage': {}}))
+    monkeypatch.setattr(chatbot_handlers, 'RESULT_CACHE', ResultCache(path=str(tmp_path / 'results.sqlite')))
+    monkeypatch.setattr(chatbot_handlers, 'CODE_REPLAYS', CodeReplayStore(path=str(tmp_path / 'results.sqlite')))
+    monkeypatch.setattr(chatbot_handlers, 'get_agent', lambda dfs: agent)
+    monkeypatch.setattr(chatbot_handlers, 'log_prompt_usage', lambda *args: None)
+    # Answers are cached by a done-callback of their explanation; let ask() wait for it
+    cache_explained_response = chatbot_handlers.cache_explained_response
+
+    def cache_and_signal(*args):
+        cache_explained_response(*args)
+        CACHED.release()
+
+    monkeypatch.setattr(chatbot_handlers, 'cache_explained_response', cache_and_signal)
+    return agent
+
+
+def ask(dfs, query, followup=False):
+    response = chatbot_handlers.chatbot_handler(dfs, query, followup)
+    if isinstance(response['explanation'], Future):
+        assert CACHED.acquire(timeout=5)
+    return response
+
+
+def test_repeated_question_in_the_same_session_is_a_cache_hit(agent):
+    dfs = [pd.DataFrame({'region': ['EU', 'US'], 'amount': [1.0, 2.0]})]
+    first = ask(dfs, "How many rows are there?")
+    second = ask(dfs, "how many rows  are there")
+    assert not first['cached'] and second['cached']
+    assert second['result'] == first['result']
+    assert len(agent.questions) == 1
+
+
+def test_follow_up_sees_the_conversation_and_is_keyed_on_it(agent):
+    dfs = [pd.DataFrame({'region': ['EU', 'US'], 'amount': [1.0, 2.0]})]
+    ask(dfs, "How many rows are there?")
+    ask(dfs, "How many rows are there?")
+    ask(dfs, "And per region?", followup=True)
+    assert agent.questions[-1] == ("And per region?", [("How many rows are there?", True), ("1", False)])
+    # Asked on its own, the same words are a different question
+    ask(dfs, "And per region?")
+    assert [query for query, _ in agent.questions] == ["How many rows are there?", "And per region?", "And per region?"]
+    assert agent.questions[-1][1] == []
@@ -0,0 +1,102 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pandas")
+sqlalchemy = pytest.importorskip("sqlalchemy")
+pytest.importorskip("pandasai")
+pytest.importorskip("streamlit")
+
+from sqlalchemy.dialects import mysql, postgresql
+
+from src.hanlders.database_hanlders import EnginePool, PushdownQueryMixin
+
+
+class FakeEngine:
+    def __init__(self):
+        self.disposed = 0
+
+    def dispose(self):
+        self.disposed += 1
+
+
+def test_engines_are_shared_per_account():
+    pool = EnginePool()
+    created = []
+
+    def factory():
+        created.append(FakeEngine())
+        return created[-1]
+
+    key = EnginePool.key('postgresql', 'db', 5432, 'sales', 'ana', 'secret')
+    assert pool.acquire(key, factory) is pool.acquire(key, factory)
+    assert len(created) == 1
+    other = EnginePool.key('postgresql', 'db', 5432, 'sales', 'ana', 'other secret')
+    assert other != key and 'secret' not in other
+    assert pool.acquire(other, factory) is created[1]
+
+
+def test_engines_in_use_are_not_disposed():
+    pool = EnginePool()
+    engine = FakeEngine()
+    key = EnginePool.key('sqlite', None, None, 'sales.db', None, None)
+    pool.acquire(key, lambda: engine)
+    pool.acquire(key, lambda: engine)
+    pool.release(key)
+    pool.dispose(key)
+    assert engine.disposed == 0
+    pool.release(key)
+    pool.dispose(key)
+    assert engine.disposed == 1
+    assert pool.acquire(key, FakeEngine) is not engine
+
+
+def test_idle_engines_are_disposed_on_the_next_acquire():
+    pool = EnginePool(idle_timeout=-1)
+    idle, held = FakeEngine(), FakeEngine()
+    idle_key = EnginePool.key('sqlite', None, None, 'idle.db', None, None)
+    held_key = EnginePool.key('sqlite', None, None, 'held.db', None, None)
+    pool.acquire(idle_key, lambda: idle)
+    pool.release(idle_key)
+    pool.acquire(held_key, lambda: held)
+    pool.acquire(EnginePool.key('sqlite', None, None, 'other.db', None, None), FakeEngine)
+    # Unused engines leave the pool; engines still acquired only close their idle connections
+    assert idle.disposed == 1 and held.disposed == 1
+    assert pool.acquire(held_key, FakeEngine) is held
+    assert pool.acquire(idle_key, FakeEngine) is not idle
+
+
+def connector(dialect, engine=None, **pushdown):
+    query = PushdownQueryMixin()
+    query.config = SimpleNamespace(table='shop.sales')
+    query._engine = engine or SimpleNamespace(dialect=SimpleNamespace(name=dialect))
+    query.set_pushdown(**pushdown)
+    return query
+
+
+def compiled(query, dialect):
+    return str(query.build_query().compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+
+
+def test_build_query_selects_the_slice():
+    sql = compiled(connector('postgresql', columns=['region', 'amount'], where=[['year', '>=', 2023]], limit=10),
+                   postgresql.dialect())
+    assert sql.split() == 'SELECT region, amount FROM shop.sales WHERE year >= 2023 LIMIT 10'.split()
+
+
+def test_build_query_samples_on_the_server():
+    sql = compiled(connector('postgresql', sample=5.0), postgresql.dialect())
+    assert 'TABLESAMPLE bernoulli(5.0)' in sql
+    sql = compiled(connector('mysql', sample=5.0), mysql.dialect())
+    assert 'rand() < 0.05' in sql
+
+
+def test_sqlite_sampling_keeps_about_the_requested_share():
+    engine = sqlalchemy.create_engine('sqlite://')
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ATTACH DATABASE ':memory:' AS shop")
+        connection.exec_driver_sql("CREATE TABLE shop.sales (id INTEGER)")
+        connection.exec_driver_sql("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 20000) "
+                                   "INSERT INTO shop.sales SELECT i FROM n")
+        rows = connection.execute(connector('sqlite', engine, sample=25.0).build_query()).fetchall()
+    assert 4_000 < len(rows) < 6_000
@@ -0,0 +1,55 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from src.hanlders.dtype_handlers import optimize_dtypes, optimize_series
+
+
+def sales():
+    return pd.DataFrame({
+        'region': ['EU', 'US', 'EU', 'APAC'] * 50,
+        'amount': [1.5, 2.0, 3.25, 4.0] * 50,
+    })
+
+
+def test_low_cardinality_text_is_not_made_categorical():
+    optimized = optimize_dtypes(sales())
+    assert not isinstance(optimized['region'].dtype, pd.CategoricalDtype)
+    assert isinstance(optimized['region'].dtype, pd.StringDtype)
+
+
+def test_groupby_output_is_unchanged():
+    df = sales()
+    optimized = optimize_dtypes(df)
+    # Filtering out a region must not leave an empty group behind
+    expected = df[df['region'] != 'APAC'].groupby('region')['amount'].sum()
+    actual = optimized[optimized['region'] != 'APAC'].groupby('region')['amount'].sum()
+    pd.testing.assert_series_equal(actual, expected, check_dtype=False, check_index_type=False)
+    # Comparing with a value that never occurs is simply False
+    assert not (optimized['region'] == 'LATAM').any()
+
+
+def test_integers_are_downcast_only_when_they_fit():
+    assert optimize_series(pd.Series([1, -2, 3], dtype='int64')).dtype == 'int32'
+    assert optimize_series(pd.Series([1, 2 ** 40], dtype='int64')).dtype == 'int64'
+
+
+def test_floats_are_downcast_only_when_lossless():
+    assert optimize_series(pd.Series([0.5, 1.25, None])).dtype == 'float32'
+    assert optimize_series(pd.Series([0.1, 1 / 3])).dtype == 'float64'
+
+
+def test_text_holding_dates_is_parsed():
+    dates = optimize_series(pd.Series(['2024-01-01', '2024-02-15', None]))
+    assert pd.api.types.is_datetime64_any_dtype(dates)
+    # Numbers such as years are not read as timestamps
+    years = optimize_series(pd.Series(['2023', '2024']))
+    assert isinstance(years.dtype, pd.StringDtype)
+
+
+def test_mixed_and_boolean_columns_are_left_alone():
+    mixed = pd.Series([1, 'a', 2.5])
+    assert optimize_series(mixed) is mixed
+    flags = pd.Series([True, False])
+    assert optimize_series(flags) is flags
@@ -0,0 +1,36 @@
+import pytest
+
+from src.hanlders.filter_handlers import parse_filter, parse_filter_value
+
+
+def test_parse_filter_value_types():
+    assert parse_filter_value("2023") == 2023
+    assert parse_filter_value(" 1.5 ") == 1.5
+    assert parse_filter_value("'2023'") == "2023"
+    assert parse_filter_value("EU") == "EU"
+
+
+def test_parse_filter_value_lists_keep_commas_inside_quotes():
+    assert parse_filter_value("('US, North', 'EU', 3)") == ["US, North", "EU", 3]
+    with pytest.raises(ValueError):
+        parse_filter_value("('US', 'EU)")
+
+
+@pytest.mark.parametrize("line, condition", [
+    ("year >= 2023", ["year", ">=", 2023]),
+    ("year>=2023", ["year", ">=", 2023]),
+    ("region in ('EU', 'US')", ["region", "IN", ["EU", "US"]]),
+    ("name NOT  LIKE 'A%'", ["name", "NOT LIKE", "A%"]),
+    ("closed_at is not null", ["closed_at", "IS NOT NULL"]),
+    ("`order date` < '2024-01-01'", ["order date", "<", "2024-01-01"]),
+    ("sales.amount <> 0", ["sales.amount", "<>", 0]),
+])
+def test_parse_filter(line, condition):
+    assert parse_filter(line) == condition
+
+
+def test_word_operators_must_be_set_off_from_the_column():
+    # "inventory" is a column name, not "inv" followed by IN
+    with pytest.raises(ValueError):
+        parse_filter("inventory")
+    assert parse_filter("island = 'Crete'") == ["island", "=", "Crete"]
@@ -0,0 +1,83 @@
+import pytest
+
+pytest.importorskip("pyarrow")
+pytest.importorskip("pandasai")
+pytest.importorskip("streamlit")
+
+from src.hanlders.outofcore_handlers import plan_access
+
+COLUMNS = ['year', 'region', 'amount', 'units']
+
+
+def result(expression: str) -> str:
+    return f"result = {{'type': 'number', 'value': {expression}}}"
+
+
+def test_selected_columns_and_filter_are_pushed_down():
+    code = "df = dfs[0]\nsales = df[df['year'] == 2023]\n" + result("sales['amount'].sum()")
+    assert plan_access(code, 0, COLUMNS) == (['year', 'amount'], [['year', '=', 2023]])
+
+
+def test_combined_and_swapped_conditions():
+    code = "df = dfs[0]\nx = df[(df['year'] >= 2020) & (5 < df['units'])]\n" + result("x['amount'].mean()")
+    assert plan_access(code, 0, COLUMNS) == (['year', 'units', 'amount'], [['year', '>=', 2020], ['units', '>', 5]])
+
+
+def test_row_count_loads_one_column():
+    assert plan_access("df = dfs[0]\n" + result("len(df)"), 0, COLUMNS) == (['year'], [])
+
+
+def test_unknown_use_loads_everything():
+    assert plan_access("df = dfs[0]\n" + result("df.describe()"), 0, COLUMNS) == (None, [])
+    assert plan_access("for df in dfs:\n    print(df)\n", 0, COLUMNS) == (None, [])
+    assert plan_access("df = dfs[0]\n" + result("df.shape[1]"), 0, COLUMNS) == (None, [])
+
+
+def test_whole_frame_used_outside_the_mask_is_not_filtered():
+    code = "df = dfs[0]\nx = df[df['year'] == 2023]\n" + result("x['amount'].sum() / df['amount'].sum()")
+    assert plan_access(code, 0, COLUMNS) == (['year', 'amount'], [])
+
+
+def test_filtered_name_rebound_to_the_whole_frame_is_not_filtered():
+    code = "df = dfs[0]\nx = df[df['year'] == 2023]\nx = df\n" + result("x['amount'].sum()")
+    assert plan_access(code, 0, COLUMNS) == (['year', 'amount'], [])
+
+
+def test_filtered_dfs_item_rebound_to_the_whole_frame_is_not_filtered():
+    code = ("sales = dfs[0][dfs[0]['year'] == 2023]\ntotal = sales['amount'].sum()\nsales = dfs[0]\n"
+            + result("total + sales['amount'].sum()"))
+    assert plan_access(code, 0, COLUMNS) == (['year', 'amount'], [])
+
+
+def test_alias_of_a_rebound_name_is_not_filtered():
+    code = "df = dfs[0]\nx = df[df['year'] == 2023]\ny = x\ny = df\n" + result("y['amount'].sum()")
+    assert plan_access(code, 0, COLUMNS) == (['year', 'amount'], [])
+
+
+def test_chained_assignment_aliases_are_checked():
+    code = "df = dfs[0]\na = b = df\n" + result("b.describe()")
+    assert plan_access(code, 0, COLUMNS) == (None, [])
+
+
+@pytest.fixture
+def connector(tmp_path):
+    import pandas as pd
+    from src.hanlders.outofcore_handlers import DatasetStore, OutOfCoreConnector
+
+    writer = DatasetStore(str(tmp_path)).writer('sales', 'sales.csv')
+    writer.write(pd.DataFrame({'year': [2022, 2023], 'region': ['EU', 'US'], 'amount': [1.0, 2.0], 'units': [1, 2]}))
+    connector = OutOfCoreConnector(writer.commit(), 0)
+    connector.bind({'last_prompt_id': 'first', 'current_code_executed': "df = dfs[0]\n" + result("len(df)")})
+    return connector
+
+
+def test_same_code_retried_for_the_same_question_loads_everything(connector):
+    assert list(connector.load().columns) == ['year']
+    assert list(connector.load().columns) == COLUMNS
+
+
+def test_same_code_for_a_new_question_is_narrowed_again(connector):
+    code = connector._context['current_code_executed']
+    assert list(connector.load().columns) == ['year']
+    connector.bind({'last_prompt_id': 'second', 'current_code_executed': code})
+    assert list(connector.load().columns) == ['year']
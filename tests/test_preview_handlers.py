@@ -0,0 +1,46 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pa = pytest.importorskip("pyarrow")
+
+from src.hanlders import preview_handlers
+from src.hanlders.preview_handlers import PreviewCache, page_count, preview_page
+
+
+def table(rows):
+    return pa.table({'value': list(range(rows))})
+
+
+def test_least_recently_used_pages_are_evicted_over_budget():
+    page = table(100)
+    cache = PreviewCache(max_bytes=2 * page.nbytes)
+    cache.put(('a', 0, 100), page)
+    cache.put(('b', 0, 100), page)
+    assert cache.get(('a', 0, 100)) is page
+    cache.put(('c', 0, 100), page)
+    assert cache.get(('b', 0, 100)) is None
+    assert cache.get(('a', 0, 100)) is page and cache.get(('c', 0, 100)) is page
+
+
+def test_pages_larger_than_the_budget_are_not_cached():
+    cache = PreviewCache(max_bytes=1)
+    cache.put(('a', 0, 100), table(100))
+    assert cache.get(('a', 0, 100)) is None
+
+
+def test_preview_page_converts_one_page_and_caches_it(monkeypatch):
+    monkeypatch.setattr(preview_handlers, 'PREVIEW_CACHE', PreviewCache())
+    df = pd.DataFrame({'value': range(25)})
+    assert page_count(df, 10) == 3 and page_count(df.iloc[:0], 10) == 1
+    page = preview_page(df, 2, 10)
+    assert page.num_rows == 5
+    assert page.column('value').to_pylist() == list(range(20, 25))
+    assert preview_page(df, 2, 10) is page
+
+
+def test_pages_arrow_cannot_hold_fall_back_to_the_slice(monkeypatch):
+    monkeypatch.setattr(preview_handlers, 'PREVIEW_CACHE', PreviewCache())
+    mixed = pd.DataFrame({'value': [1, 'a', 2.5]})
+    assert isinstance(preview_page(mixed, 0, 10), pd.DataFrame)
+    duplicated = pd.DataFrame([[1, 2]], columns=['a', 'a'])
+    assert isinstance(preview_page(duplicated, 0, 10), pd.DataFrame)
@@ -0,0 +1,56 @@
+import pytest
+
+pytest.importorskip("pandas")
+
+from src.hanlders import result_cache_handlers
+from src.hanlders.result_cache_handlers import ResultCache, normalize_question
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(result_cache_handlers.time, 'time', clock)
+    return clock
+
+
+def test_normalize_question_ignores_case_spacing_and_trailing_punctuation():
+    assert normalize_question("  How many  ROWS are there?! ") == "how many rows are there"
+    assert normalize_question("What's the total?") == normalize_question("what's the total")
+
+
+def test_normalize_question_keeps_quoted_literals():
+    assert normalize_question("Sales in 'North  East'?") == "sales in 'North  East'"
+    assert normalize_question("Sales in 'North'") != normalize_question("Sales in 'north'")
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = ResultCache(path=str(tmp_path / 'results.sqlite'), ttl=60)
+    cache.put('key', {'result': 1})
+    clock.now += 30
+    assert cache.get('key') == {'result': 1, 'cached': True}
+    # A shorter ttl passed by the caller wins
+    assert cache.get('key', ttl=10) is None
+    cache.put('key', {'result': 2})
+    clock.now += 61
+    assert cache.get('key') is None
+
+
+def test_least_recently_used_entries_are_dropped(tmp_path, clock):
+    cache = ResultCache(path=str(tmp_path / 'results.sqlite'), max_entries=2)
+    cache.store('a', 1)
+    clock.now += 1
+    cache.store('b', 2)
+    clock.now += 1
+    assert cache.load('a') == 1
+    clock.now += 1
+    cache.store('c', 3)
+    assert cache.load('b') is None
+    assert (cache.load('a'), cache.load('c')) == (1, 3)
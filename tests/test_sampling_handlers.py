@@ -0,0 +1,31 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+np = pytest.importorskip("numpy")
+
+from src.hanlders.sampling_handlers import reservoir_update
+
+
+def sample_rows(total, capacity, chunk_rows, rng):
+    rows = pd.DataFrame({'row': np.arange(total)})
+    sample = rows.iloc[:capacity].reset_index(drop=True)
+    for start in range(capacity, total, chunk_rows):
+        sample = reservoir_update(sample, rows.iloc[start:start + chunk_rows], start, rng)
+    return sample
+
+
+def test_reservoir_keeps_its_size_and_distinct_rows():
+    sample = sample_rows(10_000, 100, 1_000, np.random.default_rng(0))
+    assert len(sample) == 100
+    assert sample['row'].is_unique
+    assert sample['row'].between(0, 9_999).all()
+
+
+def test_every_row_is_kept_with_equal_probability():
+    rng = np.random.default_rng(0)
+    kept = np.zeros(100)
+    for _ in range(2_000):
+        kept[sample_rows(100, 10, 7, rng)['row'].to_numpy()] += 1
+    # Each row is expected in 10% of the 2000 samples, i.e. 200 times
+    early, late = kept[:50].mean(), kept[50:].mean()
+    assert 180 < early < 220 and 180 < late < 220
@@ -1,4 +1,6 @@
 # utils/contsant.py
+import os
+
 PROVIDERS= {
         "PandasAI": {"key":"PANDASAI_API_KEY","url":"https://www.pandabi.ai/admin/api-keys"},
         "OpenAI": {"key":"OPENAI_API_KEY","url":"https://platform.openai.com/api-keys"},
@@ -7,3 +9,161 @@ PROVIDERS= {
         "Antropic": {"key":"ANTROPIC_API_KEY","url":"https://console.anthropic.com/settings/keys"}
     }
 
+
+# Upper bound on the memory held by the in-process ingestion cache (bytes)
+INGESTION_CACHE_MAX_BYTES = 2 * 1024 ** 3
+# Upper bound on the number of parsed uploads kept in the ingestion cache
+INGESTION_CACHE_MAX_ENTRIES = 32
+
+# Directory of the on-disk columnar (Arrow IPC) cache of parsed datasets
+COLUMNAR_CACHE_DIR = "data/cache/columnar"
+# Upper bound on the disk space used by the columnar cache (bytes)
+COLUMNAR_CACHE_MAX_BYTES = 20 * 1024 ** 3
+
+# Number of worker threads used to parse multi-file uploads concurrently (1 disables it)
+INGESTION_MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+# Rows per chunk when streaming CSV/TSV uploads (None reads each file in one shot)
+CSV_CHUNK_ROWS = 100_000
+# Memory ceiling for a single CSV/TSV upload held in memory (bytes)
+CSV_MEMORY_BUDGET_BYTES = 1024 ** 3
+# What to do when an upload exceeds the budget: "sample" keeps a uniform random sample,
+# "spill" additionally writes the full dataset to the columnar cache
+CSV_BUDGET_POLICY = "sample"
+
+# Share of sampled values that must parse as dates before a column is converted
+DATETIME_MIN_PARSE_RATIO = 0.95
+
+# Library that parses CSV/TSV/Excel uploads: "pandas" or the multi-threaded "polars"
+FILE_BACKEND = "pandas"
+# Rows Polars inspects to infer the column types of a CSV/TSV upload (None reads every row)
+POLARS_INFER_SCHEMA_ROWS = 10_000
+
+# Engine used to read Excel sheets: "openpyxl" or the faster streaming "calamine" reader
+EXCEL_ENGINE = "openpyxl"
+# Number of worker processes reading Excel sheets concurrently (1 disables it)
+EXCEL_MAX_WORKERS = min(4, os.cpu_count() or 1)
+# Workbooks smaller than this are read in-process, as spawning workers would cost more
+EXCEL_PARALLEL_MIN_BYTES = 5 * 1024 ** 2
+
+# Seconds an unused LLM client stays in the process-wide pool before it is closed
+LLM_CLIENT_IDLE_SECONDS = 15 * 60
+# Seconds an idle HTTP connection to an LLM provider is kept alive for reuse
+LLM_KEEPALIVE_SECONDS = 120
+# Maximum number of idle keep-alive connections per LLM client
+LLM_MAX_KEEPALIVE_CONNECTIONS = 10
+
+# SQLite file holding cached answers to questions
+RESULT_CACHE_PATH = "data/cache/results.sqlite"
+# Seconds a cached answer stays valid
+RESULT_CACHE_TTL_SECONDS = 7 * 24 * 3600
+# Maximum number of cached answers; the least recently used are dropped first
+RESULT_CACHE_MAX_ENTRIES = 5000
+
+# Seconds a provider's model listing is served without being refreshed
+MODEL_CATALOG_TTL_SECONDS = 6 * 3600
+# JSON file persisting provider model listings across restarts
+MODEL_CATALOG_PATH = "data/cache/models.json"
+
+# Seconds each provider gets to list its models during the concurrent sign-in prefetch
+PROVIDER_PREFETCH_TIMEOUT_SECONDS = 10
+
+# Render LLM output token by token while a question is being answered
+STREAM_RESPONSES = True
+# Minimum seconds between two re-renders of streamed text
+STREAM_RENDER_INTERVAL_SECONDS = 0.05
+
+# Upper bound on the memory held by the rendered chart cache (bytes)
+CHART_CACHE_MAX_BYTES = 64 * 1024 ** 2
+
+# Connections kept open per database engine, and extra connections allowed under load
+DB_POOL_SIZE = 5
+DB_MAX_OVERFLOW = 10
+# Seconds after which a pooled database connection is replaced, before servers drop it
+DB_POOL_RECYCLE_SECONDS = 30 * 60
+# Seconds an engine no session uses is kept before it is disposed
+DB_ENGINE_IDLE_SECONDS = 15 * 60
+
+# Fetch query results through server-side cursors in batches instead of all at once
+DB_STREAM_RESULTS = True
+# Rows fetched from the server per batch
+DB_FETCH_BATCH_ROWS = 50_000
+# Memory (bytes) the fetched rows may take before the rest of the result is dropped
+DB_FETCH_MEMORY_CAP_BYTES = 1024 ** 3
+
+# Seconds introspected table and column metadata of a database is reused
+DB_CATALOG_TTL_SECONDS = 30 * 60
+# Seconds answers and charts about database tables that are not loaded yet stay cached,
+# since their rows can change without their schema changing
+DB_RESULT_TTL_SECONDS = 30 * 60
+# Sample rows per table shown to the LLM when working with a whole database
+DB_SCHEMA_SAMPLE_ROWS = 3
+
+# Upper bound on the number of dataset profiles kept in memory
+PROFILE_CACHE_MAX_ENTRIES = 256
+# Most frequent values listed per text column in a dataset profile
+PROFILE_TOP_VALUES = 3
+# Longest value, in characters, quoted in a dataset profile
+PROFILE_VALUE_MAX_CHARS = 40
+# Distinct values above which a text column is treated as identifiers or free text
+PROFILE_HIGH_CARDINALITY = 1000
+
+# Context window (tokens) per provider, used when the model is not listed below
+PROVIDER_CONTEXT_TOKENS = {
+    "PandasAI": 8_192,
+    "OpenAI": 128_000,
+    "Google Gemini": 1_000_000,
+    "Groq": 8_192,
+    "Antropic": 200_000,
+}
+# Context window (tokens) of specific models
+MODEL_CONTEXT_TOKENS = {
+    "gpt-3.5-turbo": 16_385,
+    "gpt-4": 8_192,
+    "gpt-4-turbo": 128_000,
+    "gpt-4o": 128_000,
+    "gpt-4o-mini": 128_000,
+    "llama3-8b-8192": 8_192,
+    "llama3-70b-8192": 8_192,
+    "llama-3.1-8b-instant": 131_072,
+    "llama-3.1-70b-versatile": 131_072,
+    "mixtral-8x7b-32768": 32_768,
+    "gemma2-9b-it": 8_192,
+    "gemini-1.5-flash": 1_048_576,
+    "gemini-1.5-pro": 2_097_152,
+}
+# Share of the model's context window a prompt may use
+PROMPT_CONTEXT_SHARE = 0.5
+# Upper bound on the prompt size whatever the model (tokens); latency grows with it
+PROMPT_MAX_TOKENS = 12_000
+# Tokens reserved for PandasAI's instructions, the question and conversation memory
+PROMPT_RESERVED_TOKENS = 1_500
+
+# Rows per page of the data preview; smaller frames are shown in full
+PREVIEW_PAGE_ROWS = 5_000
+# Rows shown of a dataset that is not loaded into memory
+PREVIEW_SAMPLE_ROWS = 100
+# Upper bound on the memory held by cached preview pages (bytes)
+PREVIEW_CACHE_MAX_BYTES = 256 * 1024 ** 2
+
+# Run generated analysis as SQL on an embedded DuckDB by default
+DUCKDB_ENGINE = False
+# Worker threads DuckDB uses per query
+DUCKDB_THREADS = os.cpu_count() or 1
+# Memory DuckDB may use before spilling to DUCKDB_TEMP_DIR
+DUCKDB_MEMORY_LIMIT = "4GB"
+# Directory DuckDB spills intermediate results to
+DUCKDB_TEMP_DIR = "data/cache/duckdb"
+
+# Keep uploads and query results on disk and load only what generated code uses
+OUT_OF_CORE = False
+# Directory of the Parquet datasets of the out-of-core mode
+OUT_OF_CORE_DIR = "data/cache/datasets"
+# Upper bound on the disk space used by out-of-core datasets (bytes)
+OUT_OF_CORE_MAX_BYTES = 100 * 1024 ** 3
+# Rows per Parquet row group, the unit in which out-of-core rows are loaded
+OUT_OF_CORE_ROW_GROUP_ROWS = 100_000
+# Row groups per Parquet file of a dataset
+OUT_OF_CORE_FILE_ROW_GROUPS = 16
+# Largest slice of an out-of-core dataset loaded for one piece of generated code (bytes)
+OUT_OF_CORE_MAX_LOAD_BYTES = 8 * 1024 ** 3
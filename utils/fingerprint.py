@@ -0,0 +1,141 @@
+# utils/fingerprint.py
+import hashlib
+import json
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+import pandas as pd
+
+# Streamlit keeps the same file_id for an upload across reruns, so the digest
+# of an upload only needs to be computed once per file_id.
+_FILE_DIGESTS: "OrderedDict[str, str]" = OrderedDict()
+_MAX_FILE_DIGESTS = 256
+
+# Digests of live DataFrames by id(): a weak reference to the frame, its column and
+# shape signature, and the digest. Unlike df.attrs, the memo is not copied into frames
+# derived from the hashed one.
+_FRAME_DIGESTS: Dict[int, Tuple[weakref.ref, str, str]] = {}
+
+
+def fingerprint_bytes(data: bytes) -> str:
+    """Return a stable content hash for a block of bytes.
+
+    Args:
+        data (bytes): The raw content to hash.
+
+    Returns:
+        str: The hex digest of the content.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def fingerprint_file(file: Any) -> str:
+    """Return a content hash for an uploaded file.
+
+    The digest is memoised on the upload's ``file_id`` (when Streamlit provides one)
+    so large uploads are hashed once rather than on every rerun.
+
+    Args:
+        file (Any): An uploaded file object exposing ``getvalue()``.
+
+    Returns:
+        str: The hex digest of the file content.
+    """
+    file_id = getattr(file, 'file_id', None)
+    if file_id is not None and file_id in _FILE_DIGESTS:
+        _FILE_DIGESTS.move_to_end(file_id)
+        return _FILE_DIGESTS[file_id]
+
+    digest = fingerprint_bytes(file.getvalue())
+    if file_id is not None:
+        _FILE_DIGESTS[file_id] = digest
+        if len(_FILE_DIGESTS) > _MAX_FILE_DIGESTS:
+            _FILE_DIGESTS.popitem(last=False)
+    return digest
+
+
+def fingerprint_options(**options: Any) -> str:
+    """Return a stable hash for a set of reader options.
+
+    Args:
+        **options (Any): Keyword options, e.g. separator or selected sheets.
+
+    Returns:
+        str: The hex digest of the options.
+    """
+    payload = json.dumps(options, sort_keys=True, default=str)
+    return fingerprint_bytes(payload.encode('utf-8'))
+
+
+def fingerprint_frame(df: pd.DataFrame) -> str:
+    """Return a content hash for a DataFrame.
+
+    The hash covers the column names, dtypes and every value. Columns holding
+    unhashable values, such as the dicts and lists of JSON database columns, are hashed
+    through their string form. The digest is memoised per DataFrame object, so each
+    frame is only hashed once; the memo is dropped when its columns or shape change.
+    Database tables that are not loaded yet provide their own ``fingerprint`` instead.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to hash.
+
+    Returns:
+        str: The hex digest of the DataFrame.
+    """
+    if not isinstance(df, pd.DataFrame):
+        # Lazily loaded database tables hash their metadata instead of their rows
+        return df.fingerprint
+    signature = json.dumps([[str(col), str(dtype)] for col, dtype in df.dtypes.items()] + [list(df.shape)])
+    memo = _FRAME_DIGESTS.get(id(df))
+    if memo is not None and memo[0]() is df and memo[1] == signature:
+        return memo[2]
+
+    digest = hashlib.sha256()
+    digest.update(signature.encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df.index).to_numpy().tobytes())
+    for i in range(df.shape[1]):
+        column = df.iloc[:, i]
+        try:
+            values = pd.util.hash_pandas_object(column, index=False)
+        except TypeError:
+            values = pd.util.hash_pandas_object(column.astype(str), index=False)
+        digest.update(values.to_numpy().tobytes())
+    fingerprint = digest.hexdigest()
+    if memo is None:
+        # DataFrames are unhashable, so the memo is keyed by identity and dropped with the frame
+        weakref.finalize(df, _FRAME_DIGESTS.pop, id(df), None)
+    _FRAME_DIGESTS[id(df)] = (weakref.ref(df), signature, fingerprint)
+    return fingerprint
+
+
+def fingerprint_frames(dfs: List[pd.DataFrame]) -> str:
+    """Return a content hash for an ordered list of DataFrames.
+
+    Args:
+        dfs (List[pd.DataFrame]): The DataFrames to hash.
+
+    Returns:
+        str: The hex digest of the DataFrames.
+    """
+    return fingerprint_bytes('|'.join(fingerprint_frame(df) for df in dfs).encode('utf-8'))
+
+
+def schema_signature(dfs: List[pd.DataFrame]) -> str:
+    """Return a hash of the column names and dtypes of an ordered list of DataFrames.
+
+    Two datasets with the same signature can run the same generated code, even if
+    their values differ.
+
+    Args:
+        dfs (List[pd.DataFrame]): The DataFrames to describe.
+
+    Returns:
+        str: The hex digest of the schemas.
+    """
+    schemas = [
+        [[str(col), str(dtype)] for col, dtype in df.dtypes.items()] if isinstance(df, pd.DataFrame)
+        else [list(col) for col in df.column_types]
+        for df in dfs
+    ]
+    return fingerprint_bytes(json.dumps(schemas).encode('utf-8'))
@@ -1,4 +1,12 @@
 # utils/get_models.py
+import os
+import asyncio
+import json
+import time
+import hashlib
+import pathlib
+import tempfile
+import threading
 import openai
 import groq
 import streamlit as st
@@ -13,6 +21,12 @@ from openai import (
     AuthenticationError,
     InternalServerError,
 )
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from utils.contsant import MODEL_CATALOG_PATH, MODEL_CATALOG_TTL_SECONDS, PROVIDER_PREFETCH_TIMEOUT_SECONDS
+from src.hanlders.llm_handlers import GEMINI_LOCK
+
+ROOT_DIR = pathlib.Path(__file__).parent.parent
 
 class ModelProvider:
     """Base class for all model providers.
@@ -29,19 +43,56 @@ class ModelProvider:
         """
         self.api_key = api_key
 
-    def get_models(self) -> list[str]:
-        """Retrieve a list of models from the provider.
+    def list_models(self) -> list[str]:
+        """Retrieve a list of models from the provider, letting errors propagate.
 
         Raises:
             NotImplementedError: If the subclass does not implement this method.
         """
         raise NotImplementedError("Subclasses should implement this method.")
 
+    def get_models(self) -> list[str]:
+        """Retrieve a list of models from the provider, reporting errors in the page.
+
+        Must be called from the Streamlit script thread; other threads use `list_models`.
+
+        Returns:
+            list[str]: A list containing the available models, empty if the listing failed.
+        """
+        try:
+            return self.list_models()
+        except Exception as e:
+            st.error(self.error_message(e))
+            return []
+
+    def error_message(self, error: Exception) -> str:
+        """Describe an error raised by `list_models` for the user."""
+        return f"An error occurred in {type(self).__name__.removesuffix('Provider')}: {error}"
+
+    async def get_models_async(self, executor: Optional[Executor] = None) -> list[str]:
+        """Retrieve the list of models without blocking the event loop.
+
+        Like `list_models`, errors are raised rather than reported in the page, so
+        concurrent callers can attribute them to the provider. The default runs
+        `list_models` on a worker thread of executor; providers with an async SDK
+        override it and ignore executor.
+
+        Args:
+            executor (Optional[Executor]): Runs blocking calls; None uses the event loop's default executor.
+
+        Returns:
+            list[str]: A list containing the available models.
+        """
+        return await asyncio.get_running_loop().run_in_executor(executor, self.list_models)
+
+    #: Whether listing models checks the API key against the provider
+    validates_key = True
+
 
 class PandasAIProvider(ModelProvider):
     """Provider for the PandasAI models."""
 
-    def get_models(self) -> list[str]:
+    def list_models(self) -> list[str]:
         """Get the list of models available in PandasAI.
 
         Returns:
@@ -49,11 +100,13 @@ class PandasAIProvider(ModelProvider):
         """
         return ["BambooLLM"]
 
+    validates_key = False
+
 
 class OpenAIProvider(ModelProvider):
     """Provider for the OpenAI models."""
 
-    def get_models(self) -> list[str]:
+    def list_models(self) -> list[str]:
         """Get the list of text chat models available in OpenAI.
 
         Returns:
@@ -69,53 +122,69 @@ class OpenAIProvider(ModelProvider):
             APITimeoutError: If the request times out.
             OpenAIError: For other OpenAI-related errors.
         """
-        try:
-            client = openai.Client(api_key=self.api_key)
-            models = client.models.list().to_dict()
-            text_chat_models = [
-                model['id'] for model in models['data']
-                if any(keyword in model['id'] for keyword in ['gpt', 'davinci', 'turbo'])
-            ]
-            return text_chat_models
-        except (APIConnectionError, AuthenticationError, BadRequestError, 
-                RateLimitError, InternalServerError, APIStatusError, 
-                APITimeoutError, OpenAIError) as e:
-            st.error(f"{e.body.get('message')}")
-            return []  # Return an empty list in case of error
-        except Exception as e:
-            st.error(f"An unexpected error occurred in OpenAI: {e}")
-            return []
+        client = openai.Client(api_key=self.api_key)
+        models = client.models.list().to_dict()
+        return self.chat_models([model['id'] for model in models['data']])
 
+    def error_message(self, error: Exception) -> str:
+        body = getattr(error, 'body', None)
+        if isinstance(error, (APIConnectionError, AuthenticationError, BadRequestError, RateLimitError,
+                              InternalServerError, APIStatusError, APITimeoutError, OpenAIError)) \
+                and isinstance(body, dict):
+            return f"{body.get('message')}"
+        return f"An unexpected error occurred in OpenAI: {error}"
 
-class GoogleGeminiProvider(ModelProvider):
-    """Provider for the Google Gemini models."""
-
-    def get_models(self) -> list[str]:
-        """Get the list of Gemini models available in Google.
+    async def get_models_async(self, executor: Optional[Executor] = None) -> list[str]:
+        """Get the list of text chat models available in OpenAI with the async client.
 
         Returns:
-            list[str]: A list containing the available Gemini models.
+            list[str]: A list containing the text chat model IDs.
 
         Raises:
-            Exception: For any errors that occur while retrieving models.
+            OpenAIError: If the listing fails.
         """
+        client = openai.AsyncClient(api_key=self.api_key)
         try:
+            page = await client.models.list()
+            return self.chat_models([model.id for model in page.data])
+        finally:
+            await client.close()
+
+    @staticmethod
+    def chat_models(model_ids: list[str]) -> list[str]:
+        """Keep the IDs of text chat models."""
+        return [
+            model_id for model_id in model_ids
+            if any(keyword in model_id for keyword in ['gpt', 'davinci', 'turbo'])
+        ]
+
+
+class GoogleGeminiProvider(ModelProvider):
+    """Provider for the Google Gemini models."""
+
+    def list_models(self) -> list[str]:
+        """List the Gemini models, letting errors propagate.
+
+        ``google.configure`` sets the API key for the whole process, so the listing runs
+        under the GEMINI_LOCK that LLM requests configure their own key under.
+        """
+        with GEMINI_LOCK:
             google.configure(api_key=self.api_key)
-            models = google.list_models()
-            gemini_models = [
-                model.name.split("/")[1] for model in models
-                if "gemini" in model.name and "vision" not in model.name
-            ]
-            return gemini_models
-        except Exception as e:
-            st.error(f"An error occurred in Google Gemini: {e}")
-            return []
+            # The listing is paged lazily; read every page with this key configured
+            models = list(google.list_models())
+        return [
+            model.name.split("/")[1] for model in models
+            if "gemini" in model.name and "vision" not in model.name
+        ]
+
+    def error_message(self, error: Exception) -> str:
+        return f"An error occurred in Google Gemini: {error}"
 
 
 class GroqProvider(ModelProvider):
     """Provider for the Groq models."""
 
-    def get_models(self) -> list[str]:
+    def list_models(self) -> list[str]:
         """Get the list of models available in Groq.
 
         Returns:
@@ -126,28 +195,44 @@ class GroqProvider(ModelProvider):
             groq.APIConnectionError: If there is a connection error.
             groq.APIStatusError: If there is a status error.
             groq.APIError: For other Groq-related errors.
-            Exception: For any other errors.
         """
+        client = groq.Client(api_key=self.api_key)
+        models = client.models.list().data
+        return [
+            model.id for model in models
+            if model.id not in ['whisper-large-v3', 'distil-whisper-large-v3-en']
+        ]
+
+    def error_message(self, error: Exception) -> str:
+        body = getattr(error, 'body', None)
+        if isinstance(error, groq.APIError) and isinstance(body, dict) and isinstance(body.get('error'), dict):
+            return f"{body['error'].get('message')}"
+        return f"An error occurred in Groq: {error}"
+
+    async def get_models_async(self, executor: Optional[Executor] = None) -> list[str]:
+        """Get the list of models available in Groq with the async client.
+
+        Returns:
+            list[str]: A list containing the available Groq model IDs.
+
+        Raises:
+            groq.APIError: If the listing fails.
+        """
+        client = groq.AsyncClient(api_key=self.api_key)
         try:
-            client = groq.Client(api_key=self.api_key)
-            models = client.models.list().data
+            page = await client.models.list()
             return [
-                model.id for model in models
+                model.id for model in page.data
                 if model.id not in ['whisper-large-v3', 'distil-whisper-large-v3-en']
             ]
-        except (groq.AuthenticationError, groq.APIConnectionError, 
-                groq.APIStatusError, groq.APIError) as e:
-            st.error(f"{e.body.get('error').get('message')}")
-            return []  # Return an empty list in case of error
-        except Exception as e:
-            st.error(f"An error occurred in Groq: {e}")
-            return []
+        finally:
+            await client.close()
 
 
 class AnthropicProvider(ModelProvider):
     """Provider for the Anthropic models."""
 
-    def get_models(self) -> list[str]:
+    def list_models(self) -> list[str]:
         """Get the list of available models from Anthropic.
 
         Returns:
@@ -160,6 +245,8 @@ class AnthropicProvider(ModelProvider):
             'claude-3-haiku-20240307'
         ]
 
+    validates_key = False
+
 
 def get_provider(provider_name: str, api_key: str) -> ModelProvider | None:
     """Retrieve the appropriate model provider class based on the provider name.
@@ -187,6 +274,195 @@ def get_provider(provider_name: str, api_key: str) -> ModelProvider | None:
         return None
 
 
+class ModelCatalogCache:
+    """Cache of provider model listings, kept in memory and persisted to disk.
+
+    Listings are keyed by provider and a hash of the API key. Fresh entries are served
+    directly; entries older than the TTL are still served while a background thread
+    refreshes them, so the sign-in dialog never waits on the network for a provider
+    it has listed before. Empty listings (usually an invalid key) are not cached.
+    """
+
+    def __init__(self, path: str = MODEL_CATALOG_PATH, ttl: float = MODEL_CATALOG_TTL_SECONDS) -> None:
+        """Initialize the cache and load the listings persisted by earlier runs.
+
+        Args:
+            path (str): JSON file holding the persisted listings, relative to the project root.
+            ttl (float): Seconds a listing is served without being refreshed.
+        """
+        self.path = ROOT_DIR.joinpath(path)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._refreshing: set = set()
+        self._entries: Dict[str, Dict] = self._load()
+
+    @staticmethod
+    def key(provider_name: str, api_key: str) -> str:
+        """Build the cache key for a provider and an API key."""
+        return f"{provider_name}:{hashlib.sha256(api_key.encode('utf-8')).hexdigest()}"
+
+    def get(self, provider_name: str, api_key: str, fetch: Callable[[], list[str]]) -> list[str]:
+        """Return the model listing of a provider, fetching it only when it is missing.
+
+        Args:
+            provider_name (str): The name of the provider.
+            api_key (str): The API key used for the listing.
+            fetch (Callable[[], list[str]]): Retrieves the listing from the provider, raising on errors.
+
+        Returns:
+            list[str]: The cached or freshly fetched model names.
+
+        Raises:
+            Exception: Whatever fetch raised, if there was no listing to serve instead.
+        """
+        key = self.key(provider_name, api_key)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return self._refresh(key, fetch)
+        if time.time() - entry['fetched_at'] > self.ttl:
+            with self._lock:
+                start = key not in self._refreshing
+                self._refreshing.add(key)
+            if start:
+                threading.Thread(target=self._revalidate, args=(key, fetch), daemon=True).start()
+        return entry['models']
+
+    def put(self, provider_name: str, api_key: str, models: list[str]) -> None:
+        """Store a listing fetched elsewhere, e.g. by the concurrent prefetch."""
+        if not models:
+            return
+        with self._lock:
+            self._entries[self.key(provider_name, api_key)] = {'models': models, 'fetched_at': time.time()}
+            self._save()
+
+    def _revalidate(self, key: str, fetch: Callable[[], list[str]]) -> None:
+        """Refresh a stale listing in the background, keeping it if the provider fails."""
+        try:
+            self._refresh(key, fetch)
+        except Exception:
+            # Served stale until a later get() refreshes it successfully
+            pass
+
+    def _refresh(self, key: str, fetch: Callable[[], list[str]]) -> list[str]:
+        """Fetch a listing and store it unless it came back empty; errors of fetch propagate."""
+        try:
+            models = fetch()
+            if models:
+                with self._lock:
+                    self._entries[key] = {'models': models, 'fetched_at': time.time()}
+                    self._save()
+            return models
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _load(self) -> Dict[str, Dict]:
+        """Read the persisted listings, ignoring a missing or corrupt file."""
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self) -> None:
+        """Write the listings atomically; must be called with the lock held."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # The in-memory cache still works without the disk layer
+            pass
+
+
+MODEL_CATALOG = ModelCatalogCache()
+
+
+def get_models_cached(provider_name: str, api_key: str) -> Tuple[list[str], Optional[str]]:
+    """Retrieve the models of a provider through the model catalog cache.
+
+    Errors are returned rather than shown, so the caller decides where to report them.
+
+    Args:
+        provider_name (str): The name of the provider.
+        api_key (str): The API key for accessing the provider's services.
+
+    Returns:
+        Tuple[list[str], Optional[str]]: The available models, empty if the provider is unknown or the
+        listing failed, and the error message, if any.
+    """
+    provider = get_provider(provider_name, api_key)
+    if provider is None:
+        # Reported by get_provider
+        return [], None
+    try:
+        return MODEL_CATALOG.get(provider_name, api_key, provider.list_models), None
+    except Exception as e:
+        return [], provider.error_message(e)
+
+
+async def prefetch_model_catalogs_async(
+    api_keys: List[Tuple[str, str, str]],
+    timeout: float = PROVIDER_PREFETCH_TIMEOUT_SECONDS,
+) -> Dict[str, Dict]:
+    """List models and validate API keys of several providers concurrently.
+
+    Every provider gets its own timeout, so the whole prefetch takes as long as the
+    slowest provider rather than the sum of all of them. Successful listings are
+    stored in the model catalog cache. Blocking SDK calls run on a thread pool of their
+    own that is shut down without waiting, so a provider that timed out does not hold
+    up the return, nor asyncio.run's shutdown of the default executor.
+
+    Args:
+        api_keys (List[Tuple[str, str, str]]): (label, provider name, API key) triples, e.g.
+            ("Groq voice", "Groq", key) for the separate voice assistant key.
+        timeout (float): Seconds each provider gets before it is reported as timed out.
+
+    Returns:
+        Dict[str, Dict]: Per label, the models found, whether the key is valid (None when the
+        provider cannot check it) and the error message, if any.
+    """
+    async def prefetch(provider_name: str, api_key: str) -> Dict:
+        provider = get_provider(provider_name, api_key)
+        if provider is None:
+            return {'models': [], 'valid': False, 'error': f"Unknown provider: {provider_name}"}
+        try:
+            models = await asyncio.wait_for(provider.get_models_async(executor), timeout=timeout)
+        except asyncio.TimeoutError:
+            return {'models': [], 'valid': False, 'error': f"{provider_name} did not answer within {timeout:g}s"}
+        except Exception as e:
+            return {'models': [], 'valid': False, 'error': provider.error_message(e)}
+        MODEL_CATALOG.put(provider_name, api_key, models)
+        return {'models': models, 'valid': bool(models) if provider.validates_key else None, 'error': None}
+
+    # wait_for cannot stop a call already running on a thread; it finishes in the background
+    executor = ThreadPoolExecutor(max_workers=max(1, len(api_keys)), thread_name_prefix='prefetch')
+    try:
+        results = await asyncio.gather(*(prefetch(provider_name, api_key) for _, provider_name, api_key in api_keys))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return {label: result for (label, _, _), result in zip(api_keys, results)}
+
+
+def prefetch_model_catalogs(api_keys: List[Tuple[str, str, str]],
+                            timeout: float = PROVIDER_PREFETCH_TIMEOUT_SECONDS) -> Dict[str, Dict]:
+    """Synchronous entry point of `prefetch_model_catalogs_async` for Streamlit scripts.
+
+    Args:
+        api_keys (List[Tuple[str, str, str]]): (label, provider name, API key) triples.
+        timeout (float): Seconds each provider gets before it is reported as timed out.
+
+    Returns:
+        Dict[str, Dict]: The per-label results of the prefetch.
+    """
+    if not api_keys:
+        return {}
+    return asyncio.run(prefetch_model_catalogs_async(api_keys, timeout))
+
+
 def main() -> None:
     """Main function to execute the model provider retrieval.
 
@@ -1,6 +1,4 @@
 import streamlit as st
-import os
-import pathlib
 from components.display_components import (display_welcome_message, 
                                            display_dataframes,
                                            display_results,
@@ -11,13 +9,46 @@ from components.input_components import (get_uploaded_files,
                                          get_recording)
 
 from src.hanlders.files_handlers import handle_uploaded_files
-from src.hanlders.database_hanlders import handle_database_connection
+from src.hanlders.database_hanlders import DatabaseSession, handle_database_connection, release_database_connection
 from src.hanlders.chatbot_handlers import chatbot_handler
+from src.hanlders.outofcore_handlers import handle_uploaded_files_out_of_core, persist_query
+from src.hanlders.profile_handlers import profile_frames
 from src.hanlders.transcription import transcribe_audio
+from src.hanlders.streaming_handlers import streaming_response
+from utils.contsant import DUCKDB_ENGINE, OUT_OF_CORE, STREAM_RESPONSES
+from utils.fingerprint import fingerprint_file, fingerprint_options
+from typing import Any, Callable, List
 
 
 
 
+def load_source(key: str, load: Callable[[], List[Any]]) -> List[Any]:
+    """
+    Return the data of a source, loading and profiling it only when the source changed.
+
+    Every rerun of the page asks for the data again; while the key stays the same the
+    same DataFrame objects are returned, so their memoised fingerprints and profiles are
+    reused and nothing is read or hashed again.
+
+    Args:
+        key (str): A fingerprint of the source and the options it is loaded with.
+        load (Callable[[], List[Any]]): Loads the source's DataFrames or connectors.
+
+    Returns:
+        List[Any]: The loaded DataFrames or connectors.
+    """
+    loaded = st.session_state.get('loaded_source')
+    if loaded is not None and loaded[0] == key:
+        return loaded[1]
+    dfs = load()
+    # Column profiles replace sample rows in the prompt; compute them while the data is fresh
+    profile_frames(dfs)
+    if dfs:
+        # A source that failed to load is tried again on the next rerun
+        st.session_state['loaded_source'] = (key, dfs)
+    return dfs
+
+
 def delta_ai_page() -> None:
     """
     The main page for the DeltaX Data Professor application.
@@ -43,6 +74,12 @@ def delta_ai_page() -> None:
         st.session_state['process'] = False
     if 'dfs' not in st.session_state:
         st.session_state['dfs'] = None
+    if 'streaming' not in st.session_state:
+        st.session_state['streaming'] = STREAM_RESPONSES
+    if 'duckdb_engine' not in st.session_state:
+        st.session_state['duckdb_engine'] = DUCKDB_ENGINE
+    if 'out_of_core' not in st.session_state:
+        st.session_state['out_of_core'] = OUT_OF_CORE
 
     # Initialize local variables to None
     uploaded_files = None
@@ -54,6 +91,7 @@ def delta_ai_page() -> None:
 
         if source == 'Upload File':
             st.session_state['dfs'] = None
+            release_database_connection()
             uploaded_files = get_uploaded_files()
             if uploaded_files:
                 st.session_state['file_uploaded'] = True
@@ -69,6 +107,15 @@ def delta_ai_page() -> None:
             else:
                 st.warning("Please connect to a database to proceed")
 
+        st.session_state['streaming'] = st.toggle("Stream responses", value=st.session_state['streaming'],
+                                                  help="Show the generated code and explanation as they are written")
+        st.session_state['duckdb_engine'] = st.toggle("DuckDB SQL engine", value=st.session_state['duckdb_engine'],
+                                                      help="Let generated code run its filters, joins and aggregations "
+                                                           "as multi-threaded SQL instead of pandas")
+        st.session_state['out_of_core'] = st.toggle("Out-of-core mode", value=st.session_state['out_of_core'],
+                                                    help="Keep the data on disk and load only the columns and rows "
+                                                         "each question uses, for data larger than memory")
+
         # Process button (single button for both actions)
         process = st.button("Process")
         
@@ -78,10 +125,27 @@ def delta_ai_page() -> None:
         # Handle processing based on whether a file is uploaded or a database is connected
         if st.session_state['process']:
             if st.session_state['file_uploaded'] and uploaded_files is not None:
-                st.session_state['dfs'] = handle_uploaded_files(uploaded_files)
+                files = uploaded_files if isinstance(uploaded_files, list) else [uploaded_files]
+                key = fingerprint_options(files=[fingerprint_file(file) for file in files],
+                                          options=st.session_state.get('file_load_options'),
+                                          sheets=st.session_state.get('selected_sheets'),
+                                          backend=st.session_state.get('file_backend'),
+                                          out_of_core=st.session_state['out_of_core'])
+                if st.session_state['out_of_core']:
+                    st.session_state['dfs'] = load_source(key, lambda: handle_uploaded_files_out_of_core(uploaded_files))
+                else:
+                    st.session_state['dfs'] = load_source(key, lambda: handle_uploaded_files(uploaded_files))
             elif st.session_state['db_connected'] and db_credentials is not None:
                 connector = handle_database_connection(db_credentials)
-                st.session_state['dfs'] = [connector.execute()]
+                key = fingerprint_options(connector=st.session_state.get('connector_key'),
+                                          out_of_core=st.session_state['out_of_core'])
+                if isinstance(connector, DatabaseSession):
+                    # Tables are loaded by the Agent when generated code uses them
+                    st.session_state['dfs'] = load_source(key, lambda: connector.tables)
+                elif st.session_state['out_of_core']:
+                    st.session_state['dfs'] = load_source(key, lambda: [persist_query(connector)])
+                else:
+                    st.session_state['dfs'] = load_source(key, lambda: [connector.execute()])
 
     # Display dataframes if available
     if st.session_state['dfs'] is not None:
@@ -94,6 +158,8 @@ def delta_ai_page() -> None:
         # st.info(f"Groq{st.session_state.api_key}")
         # st.info(f"Voice {st.session_state.groq_api_key}")
         
+        followup = st.checkbox("Follow-up question", disabled=not st.session_state.get('conversation'),
+                               help="Answer the next question in the context of the earlier questions and answers")
         prompt=None          
         if st.session_state['groq_api_key'] is not None and st.session_state['has_groq']:
             with cols[0]:
@@ -126,11 +192,12 @@ def delta_ai_page() -> None:
 
             st.code(prompt,language="text",wrap_lines=True)
             with st.spinner("Generating response..."):
-                PLOT_PATH=pathlib.Path(__file__).parent.parent.joinpath('exports/charts/temp_chart.png')
-                if os.path.exists(PLOT_PATH):
-                    os.remove(PLOT_PATH)
-                agent = chatbot_handler(dfs=st.session_state['dfs'], query=prompt)
-                display_results(agent)
+                if st.session_state['streaming']:
+                    with streaming_response():
+                        response = chatbot_handler(dfs=st.session_state['dfs'], query=prompt, followup=followup)
+                else:
+                    response = chatbot_handler(dfs=st.session_state['dfs'], query=prompt, followup=followup)
+                display_results(response)
 
 
 # Calling the function to display the page